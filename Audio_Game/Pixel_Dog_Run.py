@@ -1,31 +1,58 @@
-import sys
-
-try:
-    import pyaudio
-except ModuleNotFoundError:
-    # Friendly message when pyaudio isn't installed in the Python environment
-    print("ERROR: the 'pyaudio' package is not installed in this Python interpreter.")
-    print("Options to fix:")
-    print("  1) Activate the project's virtual environment and run: source .venv/bin/activate")
-    print("     then: pip install pyaudio")
-    print("  2) Or run the script with the project's venv directly:")
-    print("     ./.venv/bin/python Audio_Game/Pixel_Dog_Run.py")
-    print("  3) On macOS you may need portaudio: brew install portaudio && pip install pyaudio")
-    sys.exit(1)
-
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import matplotlib.patches as patches
+import matplotlib.transforms as mtransforms
 import sys
+import os
+import argparse
+import time
+
+# 同目录下的辅助模块（背景合成等）：脚本方式或包方式运行时都能导入
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GAME_DIR not in sys.path:
+    sys.path.insert(0, _GAME_DIR)
+
+from pixel_background import PixelBackgroundCompositor
+from pixel_sprites import DOG_PATTERNS, PixelSprite, compile_pattern, get_sprite_atlas
+from pixel_effects import DangerBorder, EffectPool
+from audio_capture import AudioCapture
+from audio_sources import AudioSourceError, make_audio_source
+from loudness import make_loudness_estimator
+from spectral import SPECTRAL_FEATURES, SpectralAnalyzer
+from dog_run_sim import ChaseParams, ChaseSimulation, RaceSimulation
+from track_entities import ENTITY_KINDS, make_course
+from session_record import KIND_RAW, KIND_VOLUME, SessionRecorder, SessionReplay
+from frame_profiler import FrameProfiler
+from fixed_step import FixedStepClock
+from telemetry import LEVELS as TELEMETRY_LEVELS, Telemetry
+from pixel_blit import BlitRenderer
+from pixel_framebuffer import FramebufferRenderer
+from pixel_font import CELL_W, PixelText
+from quality import QUALITY_LEVELS, QUALITY_PRESETS, QualityController, decoration_count
+from tile_stream import ScrollingBackground, TileStreamer
+
+# 渲染后端：patches（Matplotlib 图像与色块）或 framebuffer（NumPy 帧缓冲，整帧一张图像）
+RENDER_BACKENDS = ('patches', 'framebuffer')
+# 控制方式：loudness（音量越大越快）或频谱特征 pitch / centroid（音高越高越快）
+CONTROL_MODES = ('loudness',) + SPECTRAL_FEATURES
+# 多人模式：每位玩家一个输入声道、一只狗（信息框最多容纳 4 人）
+MAX_PLAYERS = 4
 
 
 class PixelCarChaseDogGame:
-    def __init__(self):
-        # 音频参数
+    def __init__(self, record_path=None, replay_path=None, record_kind='raw',
+                 show_perf_hud=False, perf_json_path=None, render_backend='patches', use_blit=True,
+                 telemetry_level='off', telemetry_path=None, control_mode='loudness', audio_source='mic',
+                 players=1, level_length=None, obstacles=0, course_seed=0, quality='high', auto_quality=False):
+        if not 1 <= players <= MAX_PLAYERS:
+            raise ValueError(f"玩家人数应为 1–{MAX_PLAYERS}: {players}")
+        self.players = players
+
+        # 音频参数（每位玩家占一个声道）
         self.RATE = 44100
         self.CHUNK = 1024
-        self.CHANNELS = 1
+        self.CHANNELS = players
 
         # 游戏参数
         self.GAME_WIDTH = 12
@@ -36,12 +63,24 @@ class PixelCarChaseDogGame:
         # 车辆像素大小（相对通用像素放大，车体更大一些）
         self.CAR_PIXEL_SIZE = self.PIXEL_SIZE * 1.15
         self.DOG_PIXEL_SIZE = 0.058  # 狗的像素块大小（更大）
+        self.ITEM_PIXEL_SIZE = 0.1   # 道具的像素块大小
+        # 关卡长度：默认正好一屏；更长时摄像机跟随领先的狗，背景按列分块随摄像机生成（见 tile_stream）
+        self.level_length = float(level_length or self.GAME_WIDTH)
+        if self.level_length < self.GAME_WIDTH:
+            raise ValueError(f"关卡长度不能短于一屏（{self.GAME_WIDTH}）: {level_length}")
+        self.scrolling = self.level_length > self.GAME_WIDTH
+        self.tile_width = 4.0     # 图块宽度（世界单位，50 个像素格子）
+        self.camera_lead = 0.6    # 跟随时领先的狗停在画面宽度 60% 处
 
         # 游戏状态（车在后，小狗在前）
         self.car_x = 0.5  # 车辆起始X位置（左侧更靠后）
         self.car_y = self.GAME_HEIGHT / 2
         self.dog_x = 2.0  # 狗起始位置在前面
         self.dog_y = self.GAME_HEIGHT / 2
+        # 每只狗的位置（多人时按跑道分行，P1 在最上面）；单人时只有一只，dog_x 即 dog_xs[0]
+        self.dog_xs = np.full(players, self.dog_x)
+        offsets = np.linspace(1.2, -1.2, players) if players > 1 else np.zeros(1)
+        self.dog_ys = self.dog_y + offsets
 
         # 速度参数
         self.car_speed = 0.0
@@ -63,30 +102,53 @@ class PixelCarChaseDogGame:
         self.game_over = False
         self.game_time = 0
 
-        # 音频控制参数
-        self.FORMAT = pyaudio.paInt16  # 16-bit PCM
+        # 渲染用的显示状态（两种渲染后端共用）
+        self.dog_pose = 'start'
+        self.dash_phase = 0
+        self.danger_flash = False
+
+        # 音源：'mic'（默认）、'wav:PATH'、'loop:PATH'、'sine[:HZ]'、'noise'、'envelope:T:A,...' 或 AudioSource 对象
+        # 所有音源都按 RATE / CHUNK 输出 16-bit PCM
+        self.audio_source = audio_source
 
         # 音量控制（归一化到0..1）——降低敏感度：提高门限、扩大归一化分母、加长平滑窗口
         self.volume_threshold = 0.004   # 原 0.0008 → 更不易触发
         self.max_volume = 0.06            # 原 0.04 → 同样RMS得到更低的归一化值
-        self.volume_history = [0.0] * 20 # 原 12 帧 → 更平滑、更稳
-
-        # 摄像机固定在初始画面
+        # 响度平滑：'moving_average'（滑动平均，原 20 帧 volume_history）或 'envelope'（起音快、释音慢）
+        self.loudness_mode = 'moving_average'
+        self.volume_window = 20           # 原 12 帧 → 更平滑、更稳
+        self.loudness_latency_ms = None   # 控制延迟预算（毫秒）；设置后按预算推导平滑参数
+        # 频谱控制（pitch / centroid）：音量仍作门限，频率在 [pitch_low_hz, pitch_high_hz] 内按对数映射到 0..1
+        if control_mode not in CONTROL_MODES:
+            raise ValueError(f"未知的控制方式: {control_mode}（可选: {', '.join(CONTROL_MODES)}）")
+        if control_mode != 'loudness' and players > 1:
+            raise ValueError("多人模式只支持 loudness 控制")
+        self.control_mode = control_mode
+        self.pitch_low_hz = 120.0
+        self.pitch_high_hz = 1000.0
+
+        # 摄像机：一屏长的关卡固定在初始画面，长关卡跟随领先的狗；结束时停在原处
         self.prev_camera_left = 0.0
         self.freeze_camera = False
         self.freeze_camera_left = None
 
         # 终点：小狗的目标线
-        self.finish_x = self.GAME_WIDTH - 1.0
+        self.finish_x = self.level_length - 1.0
         # 规则：不要撞到小狗，小狗安全到达终点即胜利
         self.mission_success = False  # True: 小狗安全到达终点
         self.dog_escaped = False      # True: 小狗到达终点
         self.dog_hit = False          # True: 车辆撞到小狗（失败）
         self.catch_margin = 0.2       # 碰撞判定的间距
 
-        # 重开/退出请求标记（用于图形窗口按键触发）
-        self.request_restart = False
+        # 退出请求标记（用于图形窗口按键触发）；重开在窗口内原地完成（见 reset）
         self.request_quit = False
+        self.game_over_displayed = False
+        self.game_over_text = None
+        self.game_over_overlay = []
+        self._restart_started = None
+        self._frame_pending = False  # 非 blit 模式：game_loop 已推进、等待整幅重绘的一帧
+        self.timer = None
+        self.ani = None
 
         # 像素风格色彩
         self.pixel_colors = {
@@ -102,70 +164,114 @@ class PixelCarChaseDogGame:
             'yellow': '#FFFF00',
         }
 
+        # 渲染模式：blit 时静态场景缓存为位图，每帧只重画动态对象
+        if render_backend not in RENDER_BACKENDS:
+            raise ValueError(f"未知的渲染后端: {render_backend}（可选: {', '.join(RENDER_BACKENDS)}）")
+        self.render_backend = render_backend
+        self.use_blit = use_blit
+        self.frame_interval_ms = 25
+
+        # 画质：预设决定启动 DPI、framebuffer 内部分辨率、装饰密度与动态效果频率（见 quality.py）；
+        # auto_quality 时按实测帧耗时（推进 + 绘制）在三档之间自动升降，目标是不超过一个 tick（25 ms）
+        if quality not in QUALITY_PRESETS:
+            raise ValueError(f"未知的画质: {quality}（可选: {', '.join(QUALITY_LEVELS)}）")
+        self.quality = quality
+        preset = QUALITY_PRESETS[quality]
+        self.figure_dpi = preset['dpi']
+        self.framebuffer_ppu = preset['framebuffer_ppu']  # framebuffer 后端：每个世界单位的像素数（high 为 1200×800）
+        self.decoration_density = preset['decoration_density']
+        self.effect_every = preset['effect_every']
+        self.quality_controller = None
+        if auto_quality:
+            self.quality_controller = QualityController(quality, budget_ms=self.frame_interval_ms)
+
+        # 按真实时间推进模拟：每个 tick 固定 25 ms，渲染慢时一帧补多步、跳过绘制，而不是整体变慢
+        self.realtime_physics = True
+        self.max_steps_per_frame = 5   # 一帧最多补 5 步，再多的积压直接丢弃
+        self.max_frame_skip = 1        # 落后时最多连续跳过 1 次绘制
+        self.clock = FixedStepClock(self.frame_interval_ms / 1000.0, self.max_steps_per_frame)
+        self._skipped_draws = 0
+
+        # 逐阶段帧耗时统计（P 键切换性能面板；结束时输出 JSON 汇总）
+        self.profiler = FrameProfiler((
+            'analyze_audio', 'update_positions', 'update_pixel_sprites',
+            'update_camera', 'update_dynamic_effects', 'rasterize', 'draw', 'frame',
+        ))
+        self.show_perf_hud = show_perf_hud
+        self.perf_json_path = perf_json_path
+        self.perf_hud_every = 10  # 每 10 帧刷新一次面板文字
+        self._last_frame_start = None
+
+        # 调试遥测（默认关闭）：逐帧音量等记录交给后台线程批量写出，不在游戏循环里 print
+        self.telemetry = Telemetry(telemetry_level, telemetry_path)
+
+        self.loudness = make_loudness_estimator(
+            self.loudness_mode, frame_ms=self.frame_interval_ms,
+            window=self.volume_window, latency_budget_ms=self.loudness_latency_ms, channels=self.players
+        )
+        print(f"响度平滑: {self.loudness_mode}, 控制延迟约 {self.loudness.lag_ms:.0f} ms")
+        self.spectral = None
+        if self.control_mode in SPECTRAL_FEATURES:
+            self.spectral = SpectralAnalyzer(self.control_mode, self.RATE, self.CHUNK,
+                                             self.pitch_low_hz, self.pitch_high_hz)
+            # 频谱控制值用包络跟随平滑：升调立即加速，停顿时缓慢回落
+            self.spectral_smoothing = make_loudness_estimator('envelope', frame_ms=self.frame_interval_ms)
+            print(f"控制方式: {self.control_mode}（{self.pitch_low_hz:.0f}–{self.pitch_high_hz:.0f} Hz）")
+
+        # 道具赛道（可选）：起跑线之后、终点之前随机撒 obstacles 个水坑 / 骨头 / 路障，布局只由数量与种子决定
+        self.course = None
+        if obstacles:
+            if self.players > 1:
+                raise ValueError("道具模式只支持单人")
+            self.course = make_course(obstacles, self.dog_x + 2.0, self.finish_x - 0.5, course_seed)
+            print(f"道具: {obstacles} 个（种子 {course_seed}）")
+
+        # 纯模拟核心（无界面、无音频）：游戏只负责输入音量、绘制状态
+        if self.players > 1:
+            self.sim = RaceSimulation(ChaseParams.from_game(self), self.players)
+        else:
+            self.sim = ChaseSimulation(ChaseParams.from_game(self), course=self.course)
+        self.last_volumes = np.zeros(self.players)
+
+        # 录制 / 回放（.dogrec）：回放时不打开麦克风，按帧喂回 analyze_audio
+        self.recorder = None
+        self.replay = None
+        if replay_path:
+            self.replay = SessionReplay(replay_path)
+            if self.replay.kind == KIND_RAW and self.replay.channels != self.CHANNELS:
+                raise ValueError(f"录音是 {self.replay.channels} 声道，与玩家人数 {self.players} 不符")
+            if self.replay.kind == KIND_VOLUME and self.players > 1:
+                raise ValueError("多人模式只能回放原始音频录音（raw）")
+            print(f"▶️  回放录音: {replay_path}（{self.replay.count} 帧）")
+        if record_path:
+            if record_kind == 'volume' and self.players > 1:
+                raise ValueError("多人模式只能录制原始音频（--record-kind raw）")
+            self.recorder = SessionRecorder(record_path, record_kind, self.RATE, self.CHUNK, self.CHANNELS)
+            print(f"⏺️  录制到: {record_path}（{record_kind}）")
+
         # 初始化音频与图形
         self.setup_audio()
 
     def setup_audio(self):
-        """初始化音频系统"""
-        self.p = pyaudio.PyAudio()
+        """初始化音频系统：先打开音源（失败时抛出 AudioSourceError，不创建窗口），再初始化图形"""
+        if self.replay is not None:
+            # 回放模式：数据来自录音文件，不需要音频设备
+            self.audio_source = None
+            self.setup_graphics()
+            return
+
+        # 音源把采样写入环形缓冲区（麦克风为 PyAudio 回调，其它音源为按真实时间节奏的读取线程），游戏循环不阻塞读流
+        self.audio_source = make_audio_source(self.audio_source, self.RATE, self.CHUNK, self.CHANNELS)
+        self.capture = AudioCapture(self.CHUNK, self.CHANNELS)
+        self.audio_source.start(self.capture)
+        print(f"🎤 音源: {self.audio_source.describe()}")
 
         # 初始化图形
         self.setup_graphics()
 
-        # 选择输入设备
-        input_devices = []
-        for i in range(self.p.get_device_count()):
-            device_info = self.p.get_device_info_by_index(i)
-            if device_info.get('maxInputChannels', 0) > 0:
-                input_devices.append((i, device_info))
-
-        if input_devices:
-            print("可用输入设备:")
-            for idx, info in input_devices:
-                print(f"  - index={idx}, name={info.get('name')}, channels={info.get('maxInputChannels')}, defaultSR={info.get('defaultSampleRate')}")
-
-        try:
-            default_info = self.p.get_default_input_device_info()
-            input_device = default_info.get('index')
-            print(f"优先选择系统默认输入设备: index={input_device}, name={default_info.get('name')}")
-        except Exception:
-            input_device = None
-
-        if input_device is None and input_devices:
-            preferred_names = ['Built-in Microphone', 'MacBook', 'Microphone', '内建麦克风']
-            for idx, info in input_devices:
-                name = (info.get('name') or '').lower()
-                if any(p.lower() in name for p in preferred_names):
-                    input_device = idx
-                    print(f"匹配到首选麦克风: index={idx}, name={info.get('name')}")
-                    break
-
-        if input_device is None and input_devices:
-            input_device = input_devices[0][0]
-            print(f"使用第一个可用输入设备: index={input_device}, name={input_devices[0][1].get('name')}")
-
-        if input_device is None:
-            print("❌ 未找到音频输入设备!")
-            sys.exit(1)
-
-        try:
-            print(f"[DEBUG] 选择的音频输入设备: index={input_device}, name={self.p.get_device_info_by_index(input_device).get('name')}")
-            self.stream = self.p.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK,
-                input_device_index=input_device
-            )
-            print("✅ 音频流初始化成功!")
-        except Exception as e:
-            print(f"❌ 音频流初始化失败: {e}")
-            sys.exit(1)
-
     def setup_graphics(self):
         """初始化像素风格游戏图形界面"""
-        self.fig, self.ax = plt.subplots(1, 1, figsize=(16, 9))
+        self.fig, self.ax = plt.subplots(1, 1, figsize=(16, 9), dpi=self.figure_dpi)
 
         self.ax.set_xlim(0, self.GAME_WIDTH)
         self.ax.set_ylim(0, self.GAME_HEIGHT)
@@ -176,26 +282,86 @@ class PixelCarChaseDogGame:
         self.fig.patch.set_facecolor('#000033')
         self.ax.set_facecolor('#000033')
 
+        # 全部精灵图案只编译一次（按调色板缓存），两种渲染后端都从图集取数据
+        self.atlas = get_sprite_atlas(self.pixel_colors)
+
+        # 背景：赛道与终点线（狗的目标）
         self.create_pixel_background()
         self.ax.axis('off')
 
-        self.create_pixel_track()
-        # 终点线（狗的目标）
-        self.create_finish_line()
-
-        self.create_pixel_car()
-        self.create_pixel_dog()
-        self.create_pixel_ui()
-        self.add_pixel_decorations()
+        self.framebuffer = None
+        if self.render_backend == 'framebuffer':
+            # 帧缓冲后端：UI 与装饰只登记布局，画面全部由 FramebufferRenderer 合成
+            self.create_pixel_ui()
+            self.create_perf_hud()
+            self.create_player_labels()
+            self.add_pixel_decorations()
+            self.framebuffer = FramebufferRenderer(self, self.framebuffer_ppu)
+            self.framebuffer.render()
+        else:
+            self.attach_background()
+            self.create_item_sprites()
+            self.create_pixel_car()
+            self.create_pixel_dog()
+            self.create_pixel_ui()
+            self.create_perf_hud()
+            self.create_player_labels()
+            self.add_pixel_decorations()
+            self.create_pixel_effects()
+        if self.scrolling:
+            self.pin_hud_to_screen()
+
+        # 每帧会变化的对象（blit 模式下只重画这些）
+        self.dynamic_artists = self.collect_dynamic_artists()
+        self.blitter = None
+        if self.use_blit:
+            self.blitter = BlitRenderer(self.fig)
+            self.blitter.add_artists(self.dynamic_artists)
 
         # 绑定按键事件（在窗口内按 R 或 Ctrl+C 重开；按 Q 退出）
         try:
             self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
         except Exception:
             pass
+        if self.blitter is None:
+            # 整幅重绘发生在 game_loop 返回之后，画完（draw_event）才算这一帧结束
+            self.fig.canvas.mpl_connect('draw_event', self.on_full_draw)
+        self.apply_decoration_density()
 
         plt.tight_layout()
 
+    def collect_dynamic_artists(self):
+        """收集每帧可能变化的 artist：虚线、车、狗、星星、音量条与信息文字"""
+        if self.framebuffer is not None:
+            # 帧缓冲整幅重画，叠在它上面的文字也要每帧重画
+            return [self.framebuffer.image, self.info_text, self.volume_text, self.perf_text] + self.player_labels
+        if self.scrolling:
+            # 长关卡的背景随摄像机滚动、每帧重画，叠在它上面的 HUD 底框与云也要一起重画（背景须排在最前）
+            artists = [self.background.image]
+            artists.extend(sprite.image for sprite in self.info_bg_pixels + self.volume_bg_pixels + self.cloud_pixels)
+            artists.append(self.volume_text)
+        else:
+            artists = [self.background.dash_image]
+        for pool in self.item_pools.values():
+            artists.extend(pool.artists)
+        artists.append(self.car_sprite.image)
+        artists.extend(sprite.image for sprite in self.dog_sprites)
+        artists.extend(self.player_labels)
+        artists.extend(self.star_pixels)
+        artists.extend(self.volume_pixels)
+        artists.append(self.info_text)
+        artists.append(self.perf_text)
+        artists.append(self.danger_border.image)
+        return [a for a in artists if a is not None]
+
+    def register_overlays(self, artists):
+        """登记叠加在游戏画面上的额外对象（framebuffer + blit 时要随帧缓冲每帧重画）"""
+        if self.framebuffer is None or self.blitter is None:
+            return
+        artists = [a for a in artists if a not in self.dynamic_artists]
+        self.dynamic_artists.extend(artists)
+        self.blitter.add_artists(artists)
+
     def on_key_press(self, event):
         """处理窗口内按键（用于重开或退出）"""
         try:
@@ -212,15 +378,17 @@ class PixelCarChaseDogGame:
                 pass
             return
 
+        # P 切换性能面板
+        if key == 'p':
+            self.toggle_perf_hud()
+            return
+
         # 只有在游戏结束后才允许重开
         if getattr(self, 'game_over', False):
             # Matplotlib 常见按键字符串：'ctrl+c'、'r'、'enter'、'return', ' '（空格）
             if key in ('r', 'enter', 'return', ' ' ) or key == 'ctrl+c' or key == 'cmd+c':
-                self.request_restart = True
-                try:
-                    plt.close(self.fig)
-                except Exception:
-                    pass
+                print("\n🔁 RESTARTING GAME (window: R/Enter/Space/Ctrl+C)...")
+                self.reset()
 
     def create_pixel_block(self, x, y, size, color, edge_color=None, linewidth=1, antialiased=None):
         """创建单个像素块
@@ -239,120 +407,145 @@ class PixelCarChaseDogGame:
         return pixel
 
     def create_pixel_sprite(self, x, y, pattern, size):
-        """根据图案创建像素精灵"""
+        """根据图案创建逐格 Rectangle 组成的像素精灵（颜色只解析一次；游戏本身改用图集图像）"""
+        rgba = compile_pattern(pattern, self.pixel_colors)
         pixels = []
-        for row_idx, row in enumerate(pattern):
-            for col_idx, color in enumerate(row):
-                if color != 'T':
-                    pixel_x = x + col_idx * size
-                    pixel_y = y + (len(pattern) - 1 - row_idx) * size
-                    pixel = self.create_pixel_block(pixel_x, pixel_y, size,
-                                                    self.pixel_colors.get(color, color))
-                    pixels.append(pixel)
+        for row_idx, col_idx in np.argwhere(rgba[..., 3] > 0):
+            pixel_x = x + col_idx * size
+            pixel_y = y + (len(pattern) - 1 - row_idx) * size
+            pixels.append(self.create_pixel_block(pixel_x, pixel_y, size, tuple(rgba[row_idx, col_idx])))
         return pixels
 
     def create_pixel_background(self):
-        """创建像素风格背景"""
-        for x in range(0, int(self.GAME_WIDTH / self.PIXEL_SIZE)):
-            for y in range(int(6 / self.PIXEL_SIZE), int(self.GAME_HEIGHT / self.PIXEL_SIZE)):
-                if y % 3 == 0:
-                    color = '#4169E1'
-                elif y % 3 == 1:
-                    color = '#6495ED'
-                else:
-                    color = '#87CEEB'
-                self.create_pixel_block(x * self.PIXEL_SIZE, y * self.PIXEL_SIZE,
-                                        self.PIXEL_SIZE, color)
+        """创建像素风格背景（栅格化到背景合成器，而非逐块添加 Rectangle）
 
-        for x in range(0, int(self.GAME_WIDTH / self.PIXEL_SIZE)):
-            for y in range(0, int(2 / self.PIXEL_SIZE)):
-                color = '#228B22' if (x + y) % 2 == 0 else '#32CD32'
-                self.create_pixel_block(x * self.PIXEL_SIZE, y * self.PIXEL_SIZE,
-                                        self.PIXEL_SIZE, color)
-
-    def create_pixel_track(self):
+        一屏长的关卡一次性合成；更长的关卡只生成摄像机附近的图块，随摄像机移动流式生成与淘汰。
+        """
+        if self.scrolling:
+            tile_cols = int(round(self.tile_width / self.PIXEL_SIZE))
+            self.tiles = TileStreamer(self.render_track_tile, tile_cols, int(self.level_length / self.PIXEL_SIZE))
+            self.background = ScrollingBackground(self.tiles, self.GAME_WIDTH, self.GAME_HEIGHT, self.PIXEL_SIZE)
+            return
+        self.background = PixelBackgroundCompositor(self.GAME_WIDTH, self.GAME_HEIGHT, self.PIXEL_SIZE)
+        self.paint_level(self.background)
+
+    def paint_level(self, background):
+        """在合成器覆盖的列范围内画出天空、草地、赛道与终点线"""
+        background.paint_sky_and_grass(int(6 / self.PIXEL_SIZE), int(2 / self.PIXEL_SIZE))
+        self.create_pixel_track(background)
+        self.create_finish_line(background)
+
+    def render_track_tile(self, index):
+        """长关卡的第 index 个图块：画出这一段赛道并撒上几朵花，返回各虚线相位的不透明像素"""
+        cols = self.tiles.tile_cols
+        background = PixelBackgroundCompositor(cols * self.PIXEL_SIZE, self.GAME_HEIGHT, self.PIXEL_SIZE,
+                                               col_offset=index * cols)
+        self.paint_level(background)
+        # 花的位置只由图块序号决定：淘汰后重新生成的图块与原来一模一样
+        flower = self.atlas.get('flower')
+        rng = np.random.default_rng(index)
+        for _ in range(2):
+            col = index * cols + int(rng.integers(0, cols - flower.shape[1]))
+            background.paint_pattern(flower, col, int(rng.integers(14, 22)))
+        return background.opaque_frames(self.ax.get_facecolor())
+
+    def create_pixel_track(self, background):
         """创建像素化赛道"""
         track_y_start = int(2 / self.PIXEL_SIZE)
         track_y_end = int(6 / self.PIXEL_SIZE)
+        background.paint_track(int(0.5 / self.PIXEL_SIZE), int((self.level_length - 0.5) / self.PIXEL_SIZE),
+                               track_y_start, track_y_end)
 
-        for x in range(int(0.5 / self.PIXEL_SIZE), int((self.GAME_WIDTH - 0.5) / self.PIXEL_SIZE)):
-            for y in range(track_y_start, track_y_end):
-                if y == track_y_start or y == track_y_end - 1:
-                    color = '#FFD700'
-                elif (x + y) % 4 == 0:
-                    color = '#404040'
-                elif (x + y) % 4 == 2:
-                    color = '#505050'
-                else:
-                    color = '#606060'
-                self.create_pixel_block(x * self.PIXEL_SIZE, y * self.PIXEL_SIZE,
-                                        self.PIXEL_SIZE, color)
-
-        self.center_pixels = []
+        # 中心虚线：每 4 格两块，闪烁由背景合成器的相位帧完成；只登记合成器覆盖的那一段
         center_y = int(4 / self.PIXEL_SIZE)
-        for x in range(1, int(self.GAME_WIDTH / self.PIXEL_SIZE), 4):
+        first = max(0, (background.col_offset - 2) // 4)
+        end = min(int(self.level_length / self.PIXEL_SIZE), background.col_offset + background.cols)
+        dash_cells = []
+        for x in range(1 + 4 * first, end, 4):
             for i in range(2):
-                pixel = self.create_pixel_block((x + i) * self.PIXEL_SIZE,
-                                                center_y * self.PIXEL_SIZE,
-                                                self.PIXEL_SIZE, '#FFFF00')
-                self.center_pixels.append(pixel)
+                dash_cells.append((x + i, center_y))
+        background.set_center_dashes(dash_cells, '#FFFF00', first_index=2 * first)
 
-    def create_finish_line(self):
+    def create_finish_line(self, background):
         """创建终点线（狗的目标，棋盘格）"""
         line_x = max(self.PIXEL_SIZE, self.finish_x - 0.2)
         start_y = 2.0
         end_y = 6.0
-        size = self.PIXEL_SIZE
-        y = start_y
-        toggle = 0
-        self.finish_pixels = []
-        while y < end_y:
-            color = '#000000' if toggle % 2 == 0 else '#FFFFFF'
-            px = self.create_pixel_block(line_x, y, size, color, edge_color=color)
-            self.finish_pixels.append(px)
-            px2 = self.create_pixel_block(line_x + size, y, size,
-                                          ('#FFFFFF' if color == '#000000' else '#000000'),
-                                          edge_color=('#FFFFFF' if color == '#000000' else '#000000'))
-            self.finish_pixels.append(px2)
-            y += size
-            toggle += 1
+        background.paint_checker_column(
+            background.cell(line_x), background.cell(start_y),
+            background.cell(end_y - start_y), '#000000', '#FFFFFF'
+        )
+
+    def attach_background(self):
+        """把合成好的静态背景作为单个图像放到坐标轴上"""
+        self.background_image = self.background.attach(self.ax, zorder=0)
+
+    def create_item_sprites(self):
+        """道具精灵池：每种道具一个小池，每帧只把画面附近的道具分配给池里的精灵
+
+        池容量取该种类在布局中最密的一段可见区间（visible_items 的宽度）里的道具数，
+        道具再密也不会有画不出来、却仍会被碰到的道具。
+        """
+        self.item_pools = {}
+        if self.course is None:
+            return
+        width = self.GAME_WIDTH + 2.0
+        for kind, name in enumerate(ENTITY_KINDS):
+            capacity = self.course.peak_count(kind, width)
+            if capacity:
+                self.item_pools[kind] = EffectPool(self.ax, self.atlas, f'item/{name}', self.ITEM_PIXEL_SIZE,
+                                                   capacity, zorder=1.5)
+        self.update_item_sprites()
+
+    def visible_items(self):
+        """画面附近仍在赛道上的道具：(种类下标数组, x 数组)；没有道具赛道时为空"""
+        if self.course is None:
+            return (), ()
+        left = self.prev_camera_left
+        return self.course.visible(left - 1.0, left + self.GAME_WIDTH + 1.0)
+
+    def update_item_sprites(self):
+        """把画面附近的道具放到精灵上（吃掉的骨头、撞倒的路障不再出现）"""
+        if not self.item_pools:
+            return
+        for pool in self.item_pools.values():
+            pool.release_all()
+        kinds, xs = self.visible_items()
+        for kind, x in zip(kinds, xs):
+            pool = self.item_pools[kind]
+            sprite = pool.sprites[0]
+            pool.spawn(x - sprite.width / 2, self.dog_y - sprite.height / 2)
+
+    def item_status(self, target):
+        """信息栏里 'dog' / 'car' 当前的道具效果（' BOOST' / ' SLOW'，无效果时为空）"""
+        status = self.course.status(target) if self.course is not None else ''
+        return f" {status}" if status else ''
 
     def create_pixel_car(self):
-        """创建像素风格车辆"""
-        car_pattern = [
-            ['T', 'T', 'car_red', 'car_red', 'car_red', 'T', 'T'],
-            ['T', 'car_red', 'white', 'white', 'white', 'car_red', 'T'],
-            ['car_red', 'white', 'car_blue', 'car_blue', 'car_blue', 'white', 'car_red'],
-            ['car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red'],
-            ['T', 'black', 'T', 'T', 'T', 'black', 'T'],
-        ]
-        self.car_pixels = self.create_pixel_sprite(
-            self.car_x - len(car_pattern[0]) * self.CAR_PIXEL_SIZE / 2,
-            self.car_y - len(car_pattern) * self.CAR_PIXEL_SIZE / 2,
-            car_pattern, self.CAR_PIXEL_SIZE
-        )
+        """创建像素风格车辆（单个精灵对象，之后只平移）"""
+        self.car_sprite = PixelSprite(self.ax, self.atlas, {'drive': 'car'}, self.CAR_PIXEL_SIZE)
+        self.car_sprite.move_to(self.car_x, self.car_y)
 
     def create_pixel_dog(self):
-        """创建像素风格狗"""
-        dog_pattern = [
-            ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
-            ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
-            ['T', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'T'],
-            ['dog_gold', 'dog_gold', 'white', 'black', 'black', 'white', 'dog_gold', 'dog_gold'],
-            ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
-            ['dog_gold', 'dog_gold', 'black', 'pink', 'pink', 'black', 'dog_gold', 'dog_gold'],
-            ['T', 'dog_gold', 'dog_gold', 'pink', 'pink', 'dog_gold', 'dog_gold', 'T'],
-            ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-            ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
-            ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-            ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
-            ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
-        ]
-        self.dog_pixels = self.create_pixel_sprite(
-            self.dog_x - len(dog_pattern[0]) * self.DOG_PIXEL_SIZE / 2,
-            self.dog_y - len(dog_pattern) * self.DOG_PIXEL_SIZE / 2,
-            dog_pattern, self.DOG_PIXEL_SIZE
-        )
+        """创建像素风格狗（预编译全部姿势，之后只平移或切换姿势）"""
+        poses = {pose: f'dog/{pose}' for pose in DOG_PATTERNS}
+        self.dog_sprites = []
+        for x, y in zip(self.dog_xs, self.dog_ys):
+            sprite = PixelSprite(self.ax, self.atlas, poses, self.DOG_PIXEL_SIZE)
+            sprite.move_to(x, y)
+            self.dog_sprites.append(sprite)
+        self.dog_sprite = self.dog_sprites[0]
+
+    def create_player_labels(self):
+        """多人模式：每只狗头上的 P1/P2… 标签（单人时不创建）"""
+        self.player_labels = []
+        if self.players == 1:
+            return
+        for i, (x, y) in enumerate(zip(self.dog_xs, self.dog_ys)):
+            self.player_labels.append(self.ax.text(
+                x, y + 0.5, f"P{i + 1}", ha='center', va='bottom', fontsize=9, fontweight='bold',
+                color='yellow', family='monospace', zorder=5
+            ))
 
     def create_pixel_ui(self):
         """创建像素风格UI界面"""
@@ -366,7 +559,7 @@ class PixelCarChaseDogGame:
             for x in range(info_cols):
                 row.append('white' if (y == 0 or y == info_rows - 1 or x == 0 or x == info_cols - 1) else 'black')
             info_bg_pattern.append(row)
-        self.info_bg_pixels = self.create_pixel_sprite(info_x, info_y, info_bg_pattern, info_size)
+        self.info_bg = ('hud/info', info_size, [(info_x, info_y)])
 
         # 音量可视化：放在信息框右侧，紧挨着信息栏
         volume_bg_pattern = []
@@ -378,11 +571,22 @@ class PixelCarChaseDogGame:
         volume_x = info_x + info_cols * info_size + 0.12  # 紧邻信息栏，右侧留一点间距
         volume_y = info_y + 0.40                          # 与原来大致同高度
         volume_cell = 0.06
-        self.volume_bg_pixels = self.create_pixel_sprite(volume_x, volume_y, volume_bg_pattern, volume_cell)
+        self.volume_bg = ('hud/volume', volume_cell, [(volume_x, volume_y)])
+        self.atlas.add_many({'hud/info': info_bg_pattern, 'hud/volume': volume_bg_pattern})
+        self.volume_x, self.volume_y, self.volume_cell = volume_x, volume_y, volume_cell
+        self.volume_cells = 23
+        self.volume_active = 0
+        self.volume_color = 'lime'
+
+        self.info_bg_pixels = []
+        self.volume_bg_pixels = []
+        self.volume_pixels = []
+        if self.render_backend == 'patches':
+            self.info_bg_pixels = self.create_atlas_sprites(*self.info_bg)
+            self.volume_bg_pixels = self.create_atlas_sprites(*self.volume_bg)
 
         # 严格限制在边框内部，最多100%
-        self.volume_pixels = []
-        for i in range(23):
+        for i in range(self.volume_cells if self.render_backend == 'patches' else 0):
             # 进度条像素：黑色描边，关闭抗锯齿，显得更“像素风”
             pixel = self.create_pixel_block(
                 volume_x + volume_cell + i * volume_cell,
@@ -396,13 +600,16 @@ class PixelCarChaseDogGame:
             pixel.set_alpha(0)
             self.volume_pixels.append(pixel)
 
-        # 信息文字放在边框内，留出一个像素单元的内边距
-        self.info_text = self.ax.text(
-            info_x + info_size * 2.0,
-            info_y + info_rows * info_size - info_size * 3.5,
-            '', fontsize=10, fontweight='bold',
-            color='lime', family='monospace',
-            verticalalignment='top'
+        # 信息文字放在边框内，留出一个像素单元的内边距；用像素字体，字形只栅格化一次，每帧只重画变化的字符
+        # 列数取能放下的列数与最长一行两者的较大值，长关卡的数字更长时字体相应缩小，不截断
+        text_x = info_x + info_size * 2.0
+        text_width = info_x + (info_cols - 1) * info_size - text_x
+        font_px = info_size / 5
+        cols = max(int(text_width / (CELL_W * font_px)), self.info_columns())
+        font_px = min(font_px, text_width / (cols * CELL_W))
+        self.info_text = PixelText(
+            self.ax, text_x, info_y + (info_rows - 2.5) * info_size,
+            rows=5, cols=cols, pixel_size=font_px, color='lime'
         )
         # 标题放在音量条上方一些
         self.volume_text = self.ax.text(
@@ -414,233 +621,402 @@ class PixelCarChaseDogGame:
         self.hud_groups = [self.info_bg_pixels, self.volume_bg_pixels, self.volume_pixels]
         self.hud_texts = [self.info_text, self.volume_text]
 
-    def add_pixel_decorations(self):
-        """添加像素装饰元素"""
-        cloud_pattern = [
-            ['T', 'white', 'white', 'T'],
-            ['white', 'white', 'white', 'white'],
-            ['T', 'white', 'white', 'T'],
+    def info_columns(self):
+        """信息栏最长一行的字符数（按 game_loop 的格式代入最大值估计：距离最多是整条关卡，得分是车跑过距离的 10 倍）"""
+        far = f"{self.level_length:.1f}M"
+        score = f"{self.level_length * 10:.1f}M"
+        speed = f"{self.max_car_speed * 1000:.0f}"
+        lines = [
+            f"DIST: {score}  CAR:{speed}", f"SPEED: {speed} BOOST", f"GAP: {far}  LEFT:{far}",
+            "VOL: 100%  RAW:0.000", f"P{self.players} 100% GAP:{far}",
         ]
-        cloud_positions = [(2, 8.5), (5, 7), (8, 6.8), (10, 7.2)]
+        return max(len(line) for line in lines)
+
+    def create_perf_hud(self):
+        """性能面板：放在音量条下方（信息框右侧），默认隐藏"""
+        x = self.volume_x
+        y = self.volume_y - 0.12
+        self.perf_text = self.ax.text(
+            x, y, '', fontsize=7, color='cyan', family='monospace',
+            verticalalignment='top', zorder=4,
+            bbox=dict(boxstyle='square,pad=0.3', facecolor='black', edgecolor='cyan', linewidth=1)
+        )
+        # 面板上的简短阶段名
+        self.perf_labels = {
+            'analyze_audio': 'audio', 'update_positions': 'physics', 'update_pixel_sprites': 'sprites',
+            'update_camera': 'camera', 'update_dynamic_effects': 'effects', 'rasterize': 'raster',
+            'draw': 'draw', 'frame': 'frame',
+        }
+        self.perf_text.set_visible(self.show_perf_hud)
+        self.hud_texts.append(self.perf_text)
+
+    def toggle_perf_hud(self):
+        """显示 / 隐藏性能面板"""
+        self.show_perf_hud = not self.show_perf_hud
+        self.perf_text.set_visible(self.show_perf_hud)
+        if self.show_perf_hud:
+            self.perf_text.set_text('\n'.join(self.profiler.hud_lines(self.perf_labels)))
+        if self.blitter is None:
+            self.fig.canvas.draw_idle()
+
+    def add_pixel_decorations(self):
+        """添加像素装饰元素（云和花取自图集）"""
+        self.clouds = ('cloud', 0.12, [(2, 8.5), (5, 7), (8, 6.8), (10, 7.2)])
+        self.flowers = ('flower', 0.08, [(0.5, 1.2), (1.2, 1.5), (11, 1.3), (11.5, 1.8)])
+        if self.scrolling:
+            self.flowers = ('flower', 0.08, [])  # 长关卡的花画在各个图块里，随赛道滚动
+
+        self.star_positions = [(6, 7.5), (3.5, 7.8), (9.5, 7.6), (11.2, 7.9)]
+        self.star_alphas = [1.0] * len(self.star_positions)
+
         self.cloud_pixels = []
-        for x, y in cloud_positions:
-            clouds = self.create_pixel_sprite(x, y, cloud_pattern, 0.12)
-            self.cloud_pixels.extend(clouds)
-
-        flower_pattern = [
-            ['T', 'pink', 'T'],
-            ['pink', 'yellow', 'pink'],
-            ['T', 'pink', 'T'],
-            ['T', 'green', 'T'],
-        ]
-        flower_positions = [(0.5, 1.2), (1.2, 1.5), (11, 1.3), (11.5, 1.8)]
         self.flower_pixels = []
-        for x, y in flower_positions:
-            flowers = self.create_pixel_sprite(x, y, flower_pattern, 0.08)
-            self.flower_pixels.extend(flowers)
-
-        star_positions = [(6, 7.5), (3.5, 7.8), (9.5, 7.6), (11.2, 7.9)]
         self.star_pixels = []
-        for x, y in star_positions:
+        if self.render_backend != 'patches':
+            return
+        self.cloud_pixels = self.create_atlas_sprites(*self.clouds)
+        self.flower_pixels = self.create_atlas_sprites(*self.flowers)
+        for x, y in self.star_positions:
             star = self.create_pixel_block(x, y, 0.1, 'white')
             self.star_pixels.append(star)
 
+    def pin_hud_to_screen(self):
+        """长关卡：HUD、星星、云与危险边框改用屏幕坐标（即摄像机在 x=0 时的世界坐标），摄像机移动时原地不动"""
+        transform = mtransforms.Affine2D().scale(1.0 / self.GAME_WIDTH, 1.0 / self.GAME_HEIGHT) + self.ax.transAxes
+        artists = list(self.hud_texts) + self.star_pixels
+        for group in self.hud_groups + [self.cloud_pixels]:
+            artists.extend(item.image if isinstance(item, PixelSprite) else item for item in group)
+        if self.framebuffer is not None:
+            artists.append(self.framebuffer.image)
+        else:
+            artists.append(self.danger_border.image)
+        for artist in artists:
+            artist.set_transform(transform)
+
+    def create_atlas_sprites(self, name, size, positions, zorder=1):
+        """在每个左下角坐标放一个取自图集的静态精灵（与原逐格 Rectangle 同层）"""
+        sprites = []
+        for x, y in positions:
+            sprite = PixelSprite(self.ax, self.atlas, name, size, zorder=zorder)
+            sprite.place(x, y)
+            sprites.append(sprite)
+        return sprites
+
+    def static_sprites(self):
+        """静态图案层（按绘制顺序）：[(图集名称, 格子大小, [左下角坐标])]；云和花按装饰密度取前几个"""
+        layers = [self.info_bg, self.volume_bg]
+        for name, size, positions in (self.clouds, self.flowers):
+            layers.append((name, size, positions[:decoration_count(len(positions), self.decoration_density)]))
+        return layers
+
+    def shown_stars(self):
+        """按装饰密度保留的星星位置"""
+        return self.star_positions[:decoration_count(len(self.star_positions), self.decoration_density)]
+
+    def apply_decoration_density(self):
+        """patches 后端：超出装饰密度的云、花与星星隐藏（framebuffer 后端在合成静态层时取舍）"""
+        for group in (self.cloud_pixels, self.flower_pixels, self.star_pixels):
+            shown = decoration_count(len(group), self.decoration_density)
+            for i, item in enumerate(group):
+                item.set_visible(i < shown)
+
+    def set_quality(self, quality):
+        """切换画质档位：装饰密度、动态效果频率与 framebuffer 内部分辨率（DPI 只在启动时按预设设置，改它会改变窗口大小）"""
+        preset = QUALITY_PRESETS[quality]
+        self.quality = quality
+        self.decoration_density = preset['decoration_density']
+        self.effect_every = preset['effect_every']
+        self.framebuffer_ppu = preset['framebuffer_ppu']
+        self.apply_decoration_density()
+        if self.framebuffer is not None:
+            self.framebuffer.set_resolution(self.framebuffer_ppu)
+            self.framebuffer.render()
+        if self.blitter is not None:
+            # 静态的云和花在背景位图里，重新抓取
+            self.blitter.invalidate()
+        else:
+            self.fig.canvas.draw_idle()
+
+    def observe_frame_time(self):
+        """把本帧从 game_loop 开始到画完的耗时交给画质调节，需要时换档"""
+        controller = self.quality_controller
+        if controller is None or self.game_over or self._last_frame_start is None:
+            return
+        ms = (time.perf_counter() - self._last_frame_start) * 1000.0
+        level = controller.observe(ms)
+        if level is None:
+            return
+        print(f"🎚️  画质: {self.quality} → {level}（最近帧耗时 p90 {controller.last_p90:.1f} ms，预算 {controller.budget_ms:.0f} ms）")
+        self.telemetry.info('quality', level=level, p90_ms=controller.last_p90)
+        self.profiler.counters['quality_drops'] = controller.drops
+        self.profiler.counters['quality_raises'] = controller.raises
+        self.set_quality(level)
+
+    def create_pixel_effects(self):
+        """预先创建全部特效对象（隐藏），之后只切换可见性"""
+        self.danger_border = DangerBorder(self.ax, self.GAME_WIDTH, self.GAME_HEIGHT, 0.2, 'red')
+        self.explosion_pool = EffectPool(self.ax, self.atlas, 'explosion', 0.1, 8)
+        self.firework_pool = EffectPool(self.ax, self.atlas, 'firework', 0.1, 10)
+        self.trophy_pool = EffectPool(self.ax, self.atlas, 'trophy', 0.12, 1)
+        self.effect_pools = {
+            'explosion': self.explosion_pool, 'firework': self.firework_pool, 'trophy': self.trophy_pool,
+        }
+
     def analyze_audio(self):
         """分析音频信号，返回音量级别"""
         try:
-            data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-            audio_data = np.frombuffer(data, dtype=np.int16)
+            if self.replay is not None and self.replay.kind == KIND_VOLUME:
+                return self.replay_volume()
+            audio_data = self.read_audio_window()
+            if audio_data is None:
+                return getattr(self, 'last_volume', 0.0)
             if audio_data.size == 0:
                 return 0.0
+            if self.recorder is not None and self.recorder.kind == KIND_RAW:
+                self.recorder.write_chunk(audio_data)
+            if self.players > 1:
+                return self.analyze_channels(audio_data)
             audio_float = audio_data.astype(np.float32) / 32768.0
             volume = float(np.sqrt(np.mean(np.square(audio_float))))
-            self.volume_history.pop(0)
-            self.volume_history.append(volume)
-            smooth_volume = float(np.mean(self.volume_history))
+            smooth_volume = self.loudness.update(volume)
             normalized_volume = min(smooth_volume / float(self.max_volume), 1.0)
             if smooth_volume < self.volume_threshold:
                 normalized_volume = 0.0
+            if self.spectral is not None:
+                normalized_volume = self.spectral_level(audio_float, volume)
             self.last_raw_volume = smooth_volume
             self.last_volume = normalized_volume
-            print(f"[DEBUG] 原始RMS: {smooth_volume:.5f} | 归一化: {normalized_volume:.3f}")
+            if self.recorder is not None and self.recorder.kind == KIND_VOLUME:
+                self.recorder.write_volume(normalized_volume)
+            self.telemetry.debug('audio', tick=self.sim.game_time, rms=volume,
+                                 smooth_rms=smooth_volume, volume=normalized_volume,
+                                 hz=self.spectral.frequency if self.spectral is not None else None)
             return normalized_volume
         except Exception as e:
             print(f"音频分析错误: {e}")
             return getattr(self, 'last_volume', 0.0)
 
-    def update_positions(self):
-        """更新车辆和狗的位置（车追狗）"""
-        volume_level = self.analyze_audio()
-
-        # 计时（用于车辆加速）
-        self.game_time += 1
-
-        # 车辆速度：随时间逐渐变快，直到最大值（首帧不叠加加速度，避免突兀加速感）
-        effective_time = max(0, self.game_time - 1)
-        # 分段加速：前期使用 car_accel，超过阈值后使用 late_car_accel（避免斜率回溯导致突然跳变）
-        if effective_time <= self.late_game_frames:
-            car_v = self.min_car_speed + self.car_accel * effective_time
+    def analyze_channels(self, audio_data):
+        """多人模式：交织采样 reshape 成 (帧, 声道) 视图（不拷贝），一次 einsum 求出全部声道的 RMS"""
+        frames = audio_data.reshape(-1, self.CHANNELS)
+        power = np.einsum('ij,ij->j', frames, frames, dtype=np.float64)
+        volumes = np.sqrt(power / len(frames)) / 32768.0
+        smooth = self.loudness.update(volumes)
+        levels = self.last_volumes
+        np.minimum(smooth / float(self.max_volume), 1.0, out=levels)
+        levels[smooth < self.volume_threshold] = 0.0
+        self.last_raw_volume = float(smooth.max())
+        self.last_volume = float(levels.max())
+        self.telemetry.debug('audio', tick=self.sim.game_time, rms=volumes.tolist(),
+                             smooth_rms=smooth.tolist(), volume=levels.tolist())
+        return levels
+
+    def spectral_level(self, audio_float, volume):
+        """频谱控制值：本帧音量低于门限时按静音处理（不做 FFT），否则取音高/质心映射后的 0..1"""
+        spectral = self.spectral  # 频谱控制只支持单人（单声道）
+        if volume < self.volume_threshold or audio_float.size < spectral.chunk:
+            spectral.frequency = 0.0
+            level = 0.0
         else:
-            car_v = (self.min_car_speed
-                     + self.car_accel * self.late_game_frames
-                     + self.late_car_accel * (effective_time - self.late_game_frames))
-        self.car_speed = min(car_v, self.max_car_speed)
-
-        # 小狗速度：由音量控制（越大越快），应用次线性映射减弱中段速度
-        level_adj = volume_level ** self.dog_speed_exponent
-        self.dog_speed = self.dog_min_speed + (self.dog_max_speed - self.dog_min_speed) * level_adj
-
-        # 前进
-        self.car_x += self.car_speed
-        self.dog_x += self.dog_speed
-
-        # 限制车辆在赛道内（与初始位置一致，避免首帧被强制夹到x=1产生抖动）
-        self.car_x = max(0.5, min(self.GAME_WIDTH - 0.5, self.car_x))
+            level = spectral.analyze(audio_float)
+        return min(self.spectral_smoothing.update(level), 1.0)
+
+    def read_audio_window(self):
+        """本帧要分析的 CHUNK：回放时取录音下一帧，否则非阻塞地取环形缓冲区最近一个 CHUNK"""
+        if self.replay is not None:
+            chunk = self.replay.next()
+            if chunk is None:
+                self.on_replay_finished()
+                return np.zeros(self.CHUNK * self.CHANNELS, dtype=np.int16)
+            return chunk
+        window = self.capture.latest_window()
+        return None if window is None else window.reshape(-1)
+
+    def replay_volume(self):
+        """回放逐帧归一化音量（跳过 RMS 与平滑）"""
+        volume = self.replay.next()
+        if volume is None:
+            self.on_replay_finished()
+            volume = 0.0
+        self.last_raw_volume = 0.0
+        self.last_volume = volume
+        if self.recorder is not None and self.recorder.kind == KIND_VOLUME:
+            self.recorder.write_volume(volume)
+        return volume
+
+    def on_replay_finished(self):
+        """录音放完后按静音继续"""
+        if not getattr(self, 'replay_finished', False):
+            self.replay_finished = True
+            print("⏹️  回放结束，之后按静音处理")
+
+    def update_positions(self, steps=1, alpha=1.0):
+        """更新车辆和狗的位置（车追狗）：每个 tick 读一次音量推进模拟核心，再同步状态用于绘制
+
+        steps 为本帧要推进的 tick 数（可为 0）；alpha 为绘制位置在上一步与当前步之间的插值系数。
+        """
+        profiler = self.profiler
+        sim = self.sim
+        volume_level = getattr(self, 'last_volume', 0.0)
+        for _ in range(steps):
+            if sim.game_over:
+                break
+            with profiler.section('analyze_audio'):
+                volume_level = self.analyze_audio()
+            with profiler.section('update_positions'):
+                self._prev_positions = (sim.car_x, sim.dog_x)
+                sim.step(volume_level)
+        with profiler.section('update_positions'):
+            self.sync_from_sim(1.0 if sim.game_over else alpha)
 
         # 更新像素精灵位置
-        self.update_pixel_sprites()
-        self.update_volume_display(volume_level)
-
-        # 失败：撞到小狗
-        if not self.game_over and self.car_x + self.catch_margin >= self.dog_x:
-            self.game_over = True
-            self.dog_hit = True
-            self.mission_success = False
-            self.freeze_camera = True
-            if self.freeze_camera_left is None:
-                self.freeze_camera_left = self.prev_camera_left
-            print("🚫 THE DOG DIED. MISSION FAILED.")
+        with profiler.section('update_pixel_sprites'):
+            self.update_pixel_sprites()
+            # 多人时音量条显示最响的玩家
+            self.update_volume_display(np.max(volume_level))
 
-        # 成功：小狗安全到达终点
-        if not self.game_over and self.dog_x >= self.finish_x:
+        if self.sim.game_over and not self.game_over:
             self.game_over = True
-            self.mission_success = True
-            self.dog_escaped = True
+            self.dog_hit = self.sim.dog_hit
+            self.mission_success = self.sim.mission_success
+            self.dog_escaped = self.sim.mission_success
             self.freeze_camera = True
             if self.freeze_camera_left is None:
                 self.freeze_camera_left = self.prev_camera_left
-            print("🏁🐶 DOG IS SAFE! MISSION SUCCESS!")
+            if self.players > 1:
+                print(f"🏁 RACE OVER: {self.result_headline()}")
+            elif self.dog_hit:
+                print("🚫 THE DOG DIED. MISSION FAILED.")
+            else:
+                print("🏁🐶 DOG IS SAFE! MISSION SUCCESS!")
+            self.telemetry.info('game_over', outcome=self.sim.outcome, ticks=self.sim.game_time,
+                                score=self.sim.score)
+
+    def sync_from_sim(self, alpha=1.0):
+        """把模拟核心的状态拷到渲染用的属性上；位置在上一步与当前步之间按 alpha 插值"""
+        sim = self.sim
+        prev_car_x, prev_dog_x = getattr(self, '_prev_positions', (sim.car_x, sim.dog_x))
+        self.car_x = prev_car_x + (sim.car_x - prev_car_x) * alpha
+        dog_x = prev_dog_x + (sim.dog_x - prev_dog_x) * alpha
+        self.car_speed = sim.car_speed
+        if self.players > 1:
+            # dog_x / dog_speed 取领先的狗，每只狗的位置在 dog_xs
+            self.dog_xs = dog_x
+            self.dog_x = float(dog_x.max())
+            self.dog_speed = float(sim.dog_speed.max())
+        else:
+            self.dog_x = dog_x
+            self.dog_xs[0] = dog_x
+            self.dog_speed = sim.dog_speed
+        self.game_time = sim.game_time
+        self.score = sim.score
 
     def update_pixel_sprites(self):
         """更新像素精灵位置"""
-        for pixel in getattr(self, 'car_pixels', []):
-            pixel.remove()
-        for pixel in getattr(self, 'dog_pixels', []):
-            pixel.remove()
-
-        car_pattern = [
-            ['T', 'T', 'car_red', 'car_red', 'car_red', 'T', 'T'],
-            ['T', 'car_red', 'white', 'white', 'white', 'car_red', 'T'],
-            ['car_red', 'white', 'car_blue', 'car_blue', 'car_blue', 'white', 'car_red'],
-            ['car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red'],
-            ['T', 'black', 'T', 'T', 'T', 'black', 'T'],
-        ]
-        self.car_pixels = self.create_pixel_sprite(
-            self.car_x - len(car_pattern[0]) * self.CAR_PIXEL_SIZE / 2,
-            self.car_y - len(car_pattern) * self.CAR_PIXEL_SIZE / 2,
-            car_pattern, self.CAR_PIXEL_SIZE
-        )
-
         # 狗表情在追逐中也变化
-        if (self.game_time // 90) % 2 == 0:
-            dog_pattern = [
-                ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
-                ['dog_brown', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_brown'],
-                ['dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown'],
-                ['dog_gold', 'dog_gold', 'white', 'black', 'black', 'white', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'black', 'pink', 'pink', 'black', 'dog_gold', 'dog_gold'],
-                ['T', 'dog_gold', 'dog_gold', 'pink', 'pink', 'dog_gold', 'dog_gold', 'T'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
-                ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
-            ]
-        else:
-            dog_pattern = [
-                ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
-                ['dog_brown', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_brown'],
-                ['dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown'],
-                ['dog_gold', 'dog_gold', 'car_red', 'black', 'black', 'car_red', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'black', 'car_red', 'car_red', 'black', 'dog_gold', 'dog_gold'],
-                ['T', 'dog_gold', 'car_red', 'pink', 'pink', 'car_red', 'dog_gold', 'T'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
-                ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
-                ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
-                ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
-            ]
-        self.dog_pixels = self.create_pixel_sprite(
-            self.dog_x - len(dog_pattern[0]) * self.DOG_PIXEL_SIZE / 2,
-            self.dog_y - len(dog_pattern) * self.DOG_PIXEL_SIZE / 2,
-            dog_pattern, self.DOG_PIXEL_SIZE
-        )
+        self.dog_pose = 'calm' if (self.game_time // 90) % 2 == 0 else 'alert'
+        for label, x, y in zip(self.player_labels, self.dog_xs, self.dog_ys):
+            label.set_position((x, y + 0.5))
+        if self.framebuffer is not None:
+            return  # 帧缓冲后端在 render 时按状态绘制
+        self.car_sprite.move_to(self.car_x, self.car_y)
+        for sprite, pose, x, y in zip(self.dog_sprites, self.player_poses(), self.dog_xs, self.dog_ys):
+            sprite.set_pose(pose)
+            sprite.move_to(x, y)
+        self.update_item_sprites()
+
+    def player_poses(self):
+        """每只狗的姿势：多人时被追上出局的狗保持 'start' 姿势"""
+        if self.players == 1:
+            return (self.dog_pose,)
+        return ['start' if caught else self.dog_pose for caught in self.sim.caught]
+
+    def player_status(self, i):
+        """多人模式信息栏中第 i 位玩家的一行"""
+        sim = self.sim
+        if sim.finished[i]:
+            place = list(sim.ranking()).index(i) + 1
+            return f"P{i + 1} SAFE #{place}"
+        if sim.caught[i]:
+            return f"P{i + 1} OUT"
+        gap = max(0.0, self.dog_xs[i] - self.car_x)
+        return f"P{i + 1} {min(int(round(self.last_volumes[i] * 100)), 100):3d}% GAP:{gap:.1f}M"
+
+    def result_headline(self):
+        """结束画面的标题行"""
+        if self.players == 1:
+            return "DOG IS SAFE!" if self.mission_success else "THE DOG DIED. MISSION FAILED."
+        if self.mission_success:
+            return "SAFE: " + ' '.join(f"P{i + 1}" for i in self.sim.ranking())
+        return "ALL DOGS CAUGHT. MISSION FAILED."
 
     def update_volume_display(self, volume_level):
         """更新音量显示"""
         volume_level = max(0.0, min(float(volume_level), 1.0))
-        total = len(self.volume_pixels)
+        total = self.volume_cells
         # 形态按0%~100%线性增长，满格对应100%
         active_pixels = int(volume_level * total)
         if volume_level > 0.0 and active_pixels == 0:
             active_pixels = 1
+        if volume_level > 0.8:
+            color = 'red'
+        elif volume_level > 0.5:
+            color = 'orange'
+        else:
+            color = 'lime'
+        self.volume_active = active_pixels
+        self.volume_color = color
         for i, pixel in enumerate(self.volume_pixels):
             if i < active_pixels:
                 pixel.set_alpha(1)
-                if volume_level > 0.8:
-                    pixel.set_facecolor('red')
-                elif volume_level > 0.5:
-                    pixel.set_facecolor('orange')
-                else:
-                    pixel.set_facecolor('lime')
+                pixel.set_facecolor(color)
             else:
                 pixel.set_alpha(0)
 
     def update_dynamic_effects(self):
         """更新动态效果"""
-        dash_offset = (self.game_time // 10) % 4
-        for i, pixel in enumerate(self.center_pixels):
-            pixel.set_alpha(1 if (i + dash_offset) % 8 < 4 else 0.3)
-        for i, star in enumerate(self.star_pixels):
-            star.set_alpha(1 if (self.game_time + i * 10) % 60 < 30 else 0.5)
+        self.dash_phase = (self.game_time // 10) % 4
+        self.background.set_dash_phase(self.dash_phase)
+        for i in range(len(self.star_positions)):
+            self.star_alphas[i] = 1 if (self.game_time + i * 10) % 60 < 30 else 0.5
+        for star, alpha in zip(self.star_pixels, self.star_alphas):
+            star.set_alpha(alpha)
 
     def update_camera(self):
-        """更新摄像机视角（固定）"""
-        camera_x = 0.0
-        dx = camera_x - self.prev_camera_left
+        """更新摄像机视角：一屏长的关卡固定；长关卡跟随领先的狗并滚动背景（HUD 在屏幕坐标里，不用平移）"""
+        if self.freeze_camera and self.freeze_camera_left is not None:
+            camera_x = self.freeze_camera_left
+        elif self.scrolling:
+            camera_x = self.dog_x - self.camera_lead * self.GAME_WIDTH
+            camera_x = min(max(camera_x, 0.0), self.level_length - self.GAME_WIDTH)
+        else:
+            camera_x = 0.0
         self.ax.set_xlim(camera_x, camera_x + self.GAME_WIDTH)
-        if dx != 0:
-            self.shift_hud(dx)
+        if self.scrolling:
+            self.background.scroll_to(camera_x)
+            self.profiler.counters['tiles_generated'] = self.tiles.generated
+            self.profiler.counters['tiles_evicted'] = self.tiles.evicted
         self.prev_camera_left = camera_x
 
-    def shift_hud(self, dx):
-        """HUD随相机平移"""
-        try:
-            for group in self.hud_groups:
-                for rect in group:
-                    x, y = rect.get_xy()
-                    rect.set_xy((x + dx, y))
-            for txt in self.hud_texts:
-                x, y = txt.get_position()
-                txt.set_position((x + dx, y))
-        except Exception:
-            pass
+    def overlay_x(self):
+        """结束画面与特效的水平中心：一屏长的关卡以车为中心，长关卡取画面中央（车可能已在画面外）"""
+        if self.scrolling:
+            return self.prev_camera_left + self.GAME_WIDTH / 2
+        return self.car_x
 
     def game_loop(self, frame):
         """主游戏循环"""
         if self.game_over:
-            if not hasattr(self, 'game_over_displayed'):
+            if not self.game_over_displayed:
                 if getattr(self, 'mission_success', False):
                     success_text = (
-                        f"DOG IS SAFE!\n\n"
+                        f"{self.result_headline()}\n\n"
                         f"DISTANCE: {self.score:.1f}M\n"
                         f"RATING: {'LEGEND!' if self.score > 700 else 'AWESOME!' if self.score > 500 else 'GREAT!'}\n\n"
                         f"PRESS CTRL+C OR R TO RESTART"
                     )
                     self.game_over_text = self.ax.text(
-                        self.car_x, self.GAME_HEIGHT/2,
+                        self.overlay_x(), self.GAME_HEIGHT/2,
                         success_text,
                         ha='center', va='center',
                         fontsize=20, fontweight='bold',
@@ -651,13 +1027,13 @@ class PixelCarChaseDogGame:
                     self.add_pixel_success_effects()
                 else:
                     game_over_text = (
-                        f"THE DOG DIED. MISSION FAILED.\n\n"
+                        f"{self.result_headline()}\n\n"
                         f"DISTANCE: {self.score:.1f}M\n"
                         f"RATING: {'AWESOME!' if self.score > 500 else 'GREAT!' if self.score > 200 else 'TRY AGAIN!'}\n\n"
                         f"PRESS CTRL+C OR R TO RESTART"
                     )
                     self.game_over_text = self.ax.text(
-                        self.car_x, self.GAME_HEIGHT/2,
+                        self.overlay_x(), self.GAME_HEIGHT/2,
                         game_over_text,
                         ha='center', va='center',
                         fontsize=20, fontweight='bold',
@@ -667,85 +1043,189 @@ class PixelCarChaseDogGame:
                     )
                     self.add_pixel_game_over_effects()
                 self.game_over_displayed = True
-            return
-
-        self.update_positions()
-        self.update_camera()
-        self.update_dynamic_effects()
-
-        # 分数基于车辆移动距离
-        self.score += self.car_speed * 10
-
-        # 间距与剩余距离
-        gap = max(0.0, self.dog_x - self.car_x)
+                self.update_danger_effects(False)
+                if self.framebuffer is not None:
+                    self.framebuffer.render()
+                # 结束画面作为动态叠加层画最后一帧，背景位图保持干净，重开时不必整幅重绘
+                self.game_over_overlay = [self.game_over_text] + self.active_effect_artists()
+                if self.blitter is not None:
+                    self.blitter.add_artists(self.game_over_overlay)
+                return self.dynamic_artists + self.game_over_overlay
+            return []
+
+        # 帧间隔（非 blit 模式下包含整幅重绘的耗时）
+        now = time.perf_counter()
+        if self._last_frame_start is not None:
+            self.profiler.record('frame', now - self._last_frame_start)
+        self._last_frame_start = now
+        self.profiler.frames += 1
+
+        if self.realtime_physics:
+            steps = self.clock.advance(now)
+            alpha = self.clock.alpha
+            self.profiler.counters['dropped_steps'] = self.clock.dropped_steps
+        else:
+            steps, alpha = 1, 1.0
+        self.update_positions(steps, alpha)
+        with self.profiler.section('update_camera'):
+            self.update_camera()
+        if self.profiler.frames % self.effect_every == 0:
+            with self.profiler.section('update_dynamic_effects'):
+                self.update_dynamic_effects()
+
+        # 间距与剩余距离（多人时取仍在跑的狗里离车最近的）
+        if self.players > 1:
+            running = self.sim.running
+            gap = max(0.0, float(self.dog_xs[running].min()) - self.car_x) if running.any() else 1.0
+        else:
+            gap = max(0.0, self.dog_x - self.car_x)
         to_finish = max(0.0, self.finish_x - self.dog_x)
 
         volume_level = getattr(self, 'last_volume', 0.0)
         raw_vol = getattr(self, 'last_raw_volume', 0.0)
-        info_text = (
-            f"DIST: {self.score:.1f}M\n"
-            f"SPEED: {self.car_speed*1000:.0f}\n"
-            f"DOG: {self.dog_speed*1000:.0f}\n"
-            f"GAP: {gap:.1f}M  LEFT:{to_finish:.1f}M\n"
-            f"VOL: {min(int(round(volume_level*100)), 100)}%  RAW:{raw_vol:.3f}"
-        )
+        if self.spectral is not None:
+            raw_label = f"HZ:{self.spectral.frequency:.0f}"
+        else:
+            raw_label = f"RAW:{raw_vol:.3f}"
+        if self.players > 1:
+            info_text = '\n'.join(
+                [f"DIST: {self.score:.1f}M  CAR:{self.car_speed*1000:.0f}"]
+                + [self.player_status(i) for i in range(self.players)]
+            )
+        else:
+            info_text = (
+                f"DIST: {self.score:.1f}M\n"
+                f"SPEED: {self.car_speed*1000:.0f}{self.item_status('car')}\n"
+                f"DOG: {self.dog_speed*1000:.0f}{self.item_status('dog')}\n"
+                f"GAP: {gap:.1f}M  LEFT:{to_finish:.1f}M\n"
+                f"VOL: {min(int(round(volume_level*100)), 100)}%  {raw_label}"
+            )
         self.info_text.set_text(info_text)
+        self.profiler.counters['hud_glyphs'] = self.info_text.redrawn
+        if self.show_perf_hud and self.profiler.frames % self.perf_hud_every == 0:
+            self.perf_text.set_text('\n'.join(self.profiler.hud_lines(self.perf_labels)))
 
         # 危险提示：与小狗距离过近，可能发生碰撞
-        if gap < 0.6:
-            self.add_pixel_danger_effects()
+        self.update_danger_effects(gap < 0.6)
+        if self.framebuffer is not None:
+            with self.profiler.section('rasterize'):
+                self.framebuffer.render()
+        return self.dynamic_artists
 
     def add_pixel_game_over_effects(self):
         """像素风格失败特效（红色爆炸）"""
-        explosion_pattern = [
-            ['T', 'yellow', 'T'],
-            ['yellow', 'white', 'yellow'],
-            ['T', 'yellow', 'T'],
-        ]
         for i in range(8):
             angle = i * 45
             radius = 1.5
-            x = self.car_x + radius * np.cos(np.radians(angle))
+            x = self.overlay_x() + radius * np.cos(np.radians(angle))
             y = self.GAME_HEIGHT/2 + radius * np.sin(np.radians(angle))
-            self.create_pixel_sprite(x, y, explosion_pattern, 0.1)
-
-    def add_pixel_danger_effects(self):
-        """像素风格危险警告效果（红色闪烁边框）"""
-        if self.game_time % 20 < 10:
-            for x in range(0, int(self.GAME_WIDTH / 0.2)):
-                self.create_pixel_block(x * 0.2, self.GAME_HEIGHT - 0.2, 0.2, 'red')
-                self.create_pixel_block(x * 0.2, 0, 0.2, 'red')
-            for y in range(0, int(self.GAME_HEIGHT / 0.2)):
-                self.create_pixel_block(0, y * 0.2, 0.2, 'red')
-                self.create_pixel_block(self.GAME_WIDTH - 0.2, y * 0.2, 0.2, 'red')
+            self.spawn_effect('explosion', x, y)
+
+    def update_danger_effects(self, in_danger):
+        """像素风格危险警告效果（红色闪烁边框，预分配后只开关）"""
+        self.danger_flash = bool(in_danger and self.game_time % 20 < 10)
+        if self.framebuffer is None:
+            self.danger_border.set_active(self.danger_flash)
 
     def add_pixel_success_effects(self):
         """像素风格胜利特效（绿色烟花+奖杯）"""
-        explosion_pattern = [
-            ['T', 'lime', 'T'],
-            ['lime', 'white', 'lime'],
-            ['T', 'lime', 'T'],
-        ]
         for i in range(10):
             angle = i * 36
             radius = 1.8
-            x = self.car_x + radius * np.cos(np.radians(angle))
+            x = self.overlay_x() + radius * np.cos(np.radians(angle))
             y = self.GAME_HEIGHT/2 + radius * np.sin(np.radians(angle))
-            self.create_pixel_sprite(x, y, explosion_pattern, 0.1)
-
-        trophy = [
-            ['T','yellow','yellow','yellow','T'],
-            ['yellow','yellow','white','yellow','yellow'],
-            ['yellow','yellow','yellow','yellow','yellow'],
-            ['T','yellow','yellow','yellow','T'],
-            ['T','T','yellow','T','T'],
-            ['T','T','yellow','T','T'],
-            ['T','yellow','yellow','yellow','T'],
-        ]
-        self.create_pixel_sprite(self.car_x - 0.25, self.GAME_HEIGHT/2 + 1.2, trophy, 0.12)
+            self.spawn_effect('firework', x, y)
+
+        self.spawn_effect('trophy', self.overlay_x() - 0.25, self.GAME_HEIGHT/2 + 1.2)
+
+    def active_effect_artists(self):
+        """当前显示中的特效 artist（帧缓冲后端的特效画在帧缓冲里）"""
+        if self.framebuffer is not None:
+            return []
+        return [sprite.image for pool in self.effect_pools.values() for sprite in pool.sprites[:pool.active]]
+
+    def reset(self, rewind=True):
+        """热重开：只把游戏状态恢复初值、收起结束画面与特效
+
+        音频流、窗口、静态背景与 blit 背景位图全部保留，不重新枚举设备、不重建图形。
+        回放时默认从头重放；rewind=False 时从录音当前位置接着放（录音里连续录了多局时按原顺序重现）。
+        """
+        self._restart_started = time.perf_counter()
+        self.sim.reset()
+        self._prev_positions = (self.sim.car_x, self.sim.dog_x)
+        self.sync_from_sim()
+        self.game_over = False
+        self.mission_success = False
+        self.dog_escaped = False
+        self.dog_hit = False
+        self.freeze_camera = False
+        self.freeze_camera_left = None
+        self.update_camera()
+        self.last_volume = 0.0
+        self.last_raw_volume = 0.0
+        self.last_volumes.fill(0.0)
+        self.loudness.reset()
+        if self.spectral is not None:
+            self.spectral_smoothing.reset()
+        self.clock.reset()
+        self._last_frame_start = None
+        self._skipped_draws = 0
+        if self.replay is not None and rewind:
+            self.replay.rewind()
+            self.replay_finished = False
+
+        # 收起结束画面与特效
+        if self.blitter is not None:
+            self.blitter.remove_artists(self.game_over_overlay)
+        if self.game_over_text is not None:
+            self.game_over_text.remove()
+            self.game_over_text = None
+        self.game_over_overlay = []
+        self.game_over_displayed = False
+        if self.framebuffer is not None:
+            self.framebuffer.clear_effects()
+        else:
+            for pool in self.effect_pools.values():
+                pool.release_all()
+
+        # 精灵与 HUD 回到开局样子
+        self.dog_pose = 'start'
+        self.update_danger_effects(False)
+        self.update_volume_display(0.0)
+        self.update_dynamic_effects()
+        if self.framebuffer is not None:
+            self.framebuffer.render()
+        else:
+            self.car_sprite.move_to(self.car_x, self.car_y)
+            for sprite, x, y in zip(self.dog_sprites, self.dog_xs, self.dog_ys):
+                sprite.set_pose(self.dog_pose)
+                sprite.move_to(x, y)
+            self.update_item_sprites()
+        for label, x, y in zip(self.player_labels, self.dog_xs, self.dog_ys):
+            label.set_position((x, y + 0.5))
+        self.info_text.set_text('')
+        if self.blitter is None:
+            self.fig.canvas.draw_idle()
+
+    def note_first_frame(self):
+        """重开后的首帧画完时记录重开耗时"""
+        if self._restart_started is None:
+            return
+        elapsed = time.perf_counter() - self._restart_started
+        self._restart_started = None
+        self.profiler.record('restart', elapsed)
+        print(f"⏱️  重开到首帧: {elapsed * 1000:.1f} ms")
+        self.telemetry.info('restart', ms=elapsed * 1000.0)
+
+    def spawn_effect(self, kind, x, y):
+        """在左下角 (x, y) 显示一个特效（explosion / firework / trophy）"""
+        if self.framebuffer is not None:
+            self.framebuffer.add_effect(kind, x, y)
+        else:
+            self.effect_pools[kind].spawn(x, y)
 
-    def start_game(self):
-        """开始游戏"""
+    def start_game(self, cleanup=True):
+        """开始游戏；cleanup=False 时窗口关闭或中断后保留音频流与图形，供 main 热重开复用"""
         print("🕹️ PIXEL CAR CHASE DOG GAME STARTED!")
         print("💡 8-BIT GAME INSTRUCTIONS:")
         print("   - LOUDER = DOG FASTER!")
@@ -756,26 +1236,82 @@ class PixelCarChaseDogGame:
         print("=" * 60)
 
         try:
-            self.ani = animation.FuncAnimation(
-                self.fig, self.game_loop, interval=25,
-                blit=False, cache_frame_data=False
-            )
+            if self.blitter is not None:
+                # blit 模式：自有定时器驱动，每帧只重画 game_loop 返回的脏对象
+                if self.timer is None:
+                    self.timer = self.fig.canvas.new_timer(interval=self.frame_interval_ms)
+                    self.timer.add_callback(self.blit_frame)
+                self.timer.start()
+            elif self.ani is None:
+                self.ani = animation.FuncAnimation(
+                    self.fig, self.full_frame, interval=self.frame_interval_ms,
+                    blit=False, cache_frame_data=False
+                )
+            else:
+                self.ani.event_source.start()
             plt.show()
         except KeyboardInterrupt:
             # 将中断交由上层处理（用于在游戏结束后按 Ctrl+C 触发重开）
             raise
         finally:
-            self.cleanup()
+            if self.timer is not None:
+                self.timer.stop()
+            if self.ani is not None:
+                self.ani.event_source.stop()
+            if cleanup:
+                self.cleanup()
+
+    def full_frame(self, frame):
+        """非 blit 模式下的一帧（之后由 FuncAnimation 整幅重绘）"""
+        artists = self.game_loop(frame)
+        self._frame_pending = True
+        return artists
+
+    def on_full_draw(self, event):
+        """非 blit 模式下整幅重绘完成：与 blit 模式一样在画完之后记录重开耗时、交给画质调节"""
+        if not self._frame_pending:
+            return  # 不是游戏帧引起的重绘（如重开时的 draw_idle、窗口缩放）
+        self._frame_pending = False
+        self.note_first_frame()
+        self.observe_frame_time()
+
+    def blit_frame(self):
+        """blit 模式下的一帧：推进游戏并只重画脏对象；落后于真实时间时跳过本次绘制"""
+        dirty = self.game_loop(None)
+        if not dirty:
+            return  # 没有变化（如结束画面已画好）：保持屏幕上的上一帧，不恢复背景
+        if (not self.game_over and self.realtime_physics and self.clock.behind
+                and self._skipped_draws < self.max_frame_skip):
+            self._skipped_draws += 1
+            self.profiler.counters['skipped_draws'] = self.profiler.counters.get('skipped_draws', 0) + 1
+            return
+        self._skipped_draws = 0
+        with self.profiler.section('draw'):
+            drawn = self.blitter.update(dirty)
+        if drawn:
+            self.note_first_frame()
+            self.observe_frame_time()
 
     def cleanup(self):
         """清理资源"""
         print("🧹 CLEANING UP PIXEL RESOURCES...")
         try:
-            if hasattr(self, 'stream'):
-                self.stream.stop_stream()
-                self.stream.close()
-            if hasattr(self, 'p'):
-                self.p.terminate()
+            self.dump_perf_summary()
+        except Exception as e:
+            print(f"PERF SUMMARY ERROR: {e}")
+        try:
+            if self.timer is not None:
+                self.timer.stop()
+            if hasattr(self, 'capture'):
+                self.capture.stop()
+            self.telemetry.close()
+            if self.recorder is not None:
+                self.recorder.close()
+                print(f"⏺️  录制完成: {self.recorder.path}（{self.recorder.count} 帧）")
+            if getattr(self, 'blitter', None) is not None:
+                self.blitter.disconnect()
+            if getattr(self, 'audio_source', None) is not None:
+                self.audio_source.close()
             # 关闭图形窗口，避免多次重启时累计窗口
             try:
                 plt.close(self.fig)
@@ -786,40 +1322,99 @@ class PixelCarChaseDogGame:
         print("✅ PIXEL CLEANUP COMPLETE!")
 
 
-def main():
-    """主函数：支持在游戏结束后按 Ctrl+C 快速重开"""
-    while True:
-        print("=" * 60)
-        print("🕹️ PIXEL CAR CHASE DOG - 8-BIT EDITION")
-        print("=" * 60)
-        print("LOADING PIXEL WORLD...")
+    def dump_perf_summary(self):
+        """输出逐阶段耗时汇总：指定 perf_json_path 时写文件，否则打印到终端"""
+        if self.profiler.frames == 0:
+            return
+        text = self.profiler.dump_json(self.perf_json_path)
+        if self.perf_json_path:
+            print(f"📊 性能汇总已写入: {self.perf_json_path}")
+        else:
+            print("📊 PERF SUMMARY:")
+            print(text)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Pixel Dog Run (8-bit audio game)')
+    parser.add_argument('--record', metavar='PATH', help='Record the session to a .dogrec file')
+    parser.add_argument('--record-kind', choices=('raw', 'volume'), default='raw',
+                        help='raw: int16 audio chunks per frame; volume: normalized volume per frame')
+    parser.add_argument('--replay', metavar='PATH', help='Replay a .dogrec file instead of the microphone')
+    parser.add_argument('--perf-hud', action='store_true', help='Show the per-phase frame-time overlay (toggle with P)')
+    parser.add_argument('--perf-json', metavar='PATH', help='Write the frame-time summary to PATH on exit')
+    parser.add_argument('--renderer', choices=RENDER_BACKENDS, default='patches',
+                        help='patches: Matplotlib images and patches; framebuffer: one NumPy-composited image per frame')
+    parser.add_argument('--no-blit', action='store_true', help='Redraw the whole figure every frame instead of blitting')
+    parser.add_argument('--audio-source', metavar='SPEC', default='mic',
+                        help='mic[:INDEX], wav:PATH, loop:PATH, sine[:HZ], noise or envelope:T:A,T:A,... '
+                             '(seconds:amplitude 0-1); default: mic')
+    parser.add_argument('--players', type=int, default=1, choices=range(1, MAX_PLAYERS + 1), metavar='N',
+                        help=f'Race with N dogs (1-{MAX_PLAYERS}); the input is opened with N channels, one per player')
+    parser.add_argument('--control', choices=CONTROL_MODES, default='loudness',
+                        help='loudness: louder is faster; pitch / centroid: higher pitch or brighter sound is faster')
+    parser.add_argument('--level-length', type=float, default=None, metavar='UNITS',
+                        help='Track length in world units (default: one 12-unit screen); longer levels scroll')
+    parser.add_argument('--obstacles', type=int, default=0, metavar='N',
+                        help='Scatter N puddles, bones and cones along the track (single player)')
+    parser.add_argument('--course-seed', type=int, default=0, metavar='SEED',
+                        help='Seed for the obstacle layout; use the same seed to replay a recorded run')
+    parser.add_argument('--quality', choices=QUALITY_LEVELS, default='high',
+                        help='low / medium / high: figure DPI, framebuffer resolution, decoration density and effect rate')
+    parser.add_argument('--auto-quality', action='store_true',
+                        help='Start at --quality and step between presets to keep each frame within the 25 ms budget')
+    parser.add_argument('--telemetry', choices=tuple(TELEMETRY_LEVELS), default='off',
+                        help='Telemetry level (debug logs per-tick audio levels); off by default')
+    parser.add_argument('--telemetry-out', metavar='PATH',
+                        help='Append telemetry as JSON lines to PATH (default: stdout)')
+    return parser.parse_args(argv)
 
-        game = None
-        try:
-            game = PixelCarChaseDogGame()
-            game.start_game()
-            # 根据窗口内按键请求判断是否重开或退出
-            if getattr(game, 'request_restart', False):
-                print("\n🔁 RESTARTING GAME (window: R/Enter/Space/Ctrl+C)...")
-                continue
-            if getattr(game, 'request_quit', False):
-                print("\nPIXEL GAME QUIT")
+
+def main():
+    """主函数：游戏结束后在窗口内按 R 或在终端按 Ctrl+C 重开，复用同一个游戏对象（热重开）"""
+    args = parse_args()
+    print("=" * 60)
+    print("🕹️ PIXEL CAR CHASE DOG - 8-BIT EDITION")
+    print("=" * 60)
+    print("LOADING PIXEL WORLD...")
+
+    game = None
+    try:
+        game = PixelCarChaseDogGame(record_path=args.record, replay_path=args.replay,
+                                    record_kind=args.record_kind, show_perf_hud=args.perf_hud,
+                                    perf_json_path=args.perf_json, render_backend=args.renderer,
+                                    use_blit=not args.no_blit, telemetry_level=args.telemetry,
+                                    telemetry_path=args.telemetry_out, control_mode=args.control,
+                                    audio_source=args.audio_source, players=args.players,
+                                    level_length=args.level_length, obstacles=args.obstacles,
+                                    course_seed=args.course_seed, quality=args.quality,
+                                    auto_quality=args.auto_quality)
+        while True:
+            try:
+                game.start_game(cleanup=False)
+                if getattr(game, 'request_quit', False):
+                    print("\nPIXEL GAME QUIT")
+                # 窗口被关闭则退出
                 break
-            # 未请求重开则退出循环
-            break
-        except KeyboardInterrupt:
-            # 只有当游戏已经结束（胜利或失败）时，使用 Ctrl+C 触发重开
-            if game is not None and getattr(game, 'game_over', False):
-                print("\n🔁 RESTARTING GAME (Ctrl+C after game over)...")
-                continue
-            else:
+            except KeyboardInterrupt:
+                # 只有当游戏已经结束（胜利或失败）时，使用 Ctrl+C 触发重开
+                if game.game_over and plt.fignum_exists(game.fig.number):
+                    print("\n🔁 RESTARTING GAME (Ctrl+C after game over)...")
+                    game.reset()
+                    continue
                 print("\nPIXEL GAME INTERRUPTED")
                 break
-        except Exception as e:
-            print(f"PIXEL GAME ERROR: {e}")
-            import traceback
-            traceback.print_exc()
-            break
+    except KeyboardInterrupt:
+        print("\nPIXEL GAME INTERRUPTED")
+    except AudioSourceError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"PIXEL GAME ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if game is not None:
+            game.cleanup()
 
 
 if __name__ == "__main__":
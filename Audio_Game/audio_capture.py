@@ -0,0 +1,141 @@
+"""音频采集子系统
+
+PyAudio 回调（或独立读取线程）把 int16 采样写进预分配的环形缓冲区，
+游戏循环只读取最近一段窗口，不再在 Matplotlib 定时器里阻塞等待 stream.read。
+渲染卡顿不会丢音频，音频等待也不会拖慢渲染。
+"""
+import threading
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """单生产者 / 单消费者的无锁环形缓冲区（int16）
+
+    写端先拷贝数据、再推进 written 计数（发布）；读端按 written 快照拷贝，
+    拷贝结束后再检查写端是否已追上被读区域（类似 seqlock），被覆盖则重读。
+    Python 整数赋值在 GIL 下是原子的，因此不需要锁。
+    """
+
+    def __init__(self, capacity, channels=1):
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self.data = np.zeros((self.capacity, self.channels), dtype=np.int16)
+        self.written = 0   # 累计写入的帧数（单调递增）
+        self.overruns = 0  # 读端来不及、数据被覆盖的次数
+
+    def write(self, samples):
+        """写入一段交织的 int16 采样（仅由生产者线程调用）"""
+        frames = np.asarray(samples, dtype=np.int16).reshape(-1, self.channels)
+        n = len(frames)
+        if n == 0:
+            return
+        if n > self.capacity:
+            frames = frames[-self.capacity:]
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = frames[:first]
+        if first < n:
+            self.data[:n - first] = frames[first:]
+        self.written += n
+
+    def latest(self, n, out=None):
+        """把最近 n 帧拷贝到 out（形状 (n, channels)）；数据不足 n 帧时返回 None"""
+        if out is None:
+            out = np.empty((n, self.channels), dtype=np.int16)
+        for _ in range(3):
+            end = self.written
+            if end < n:
+                return None
+            start = (end - n) % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self.data[start:start + first]
+            if first < n:
+                out[first:] = self.data[:n - first]
+            # 拷贝期间写端若绕回覆盖了读取区域，则重读
+            if self.written - end <= self.capacity - n:
+                return out
+            self.overruns += 1
+        return out
+
+
+class AudioCapture:
+    """把音频流接到环形缓冲区上
+
+    - callback 模式：PyAudio 在自己的线程里回调 on_audio
+    - thread 模式：独立守护线程循环调用 reader(chunk) 阻塞读取（任何带 read 的音源都可用）
+    """
+
+    def __init__(self, chunk, channels=1, buffer_chunks=32):
+        self.chunk = int(chunk)
+        self.channels = int(channels)
+        self.ring = AudioRingBuffer(self.chunk * buffer_chunks, self.channels)
+        self.window = np.zeros((self.chunk, self.channels), dtype=np.int16)
+        self.stream = None
+        self.status_flags = 0
+        self._thread = None
+        self._running = False
+        self._last_read = 0
+
+    def open_pyaudio(self, p, format, rate, input_device_index=None):
+        """以回调模式打开 PyAudio 输入流"""
+        import pyaudio
+        self._continue = pyaudio.paContinue
+        self.stream = p.open(
+            format=format,
+            channels=self.channels,
+            rate=rate,
+            input=True,
+            frames_per_buffer=self.chunk,
+            input_device_index=input_device_index,
+            stream_callback=self.on_audio,
+        )
+        self.stream.start_stream()
+        return self.stream
+
+    def on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudio 回调：只做一次拷贝进环形缓冲区"""
+        if status:
+            self.status_flags += 1
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, self._continue)
+
+    def start_reader(self, reader):
+        """thread 模式：在守护线程中循环调用 reader(chunk) -> bytes"""
+        self._running = True
+
+        def run():
+            while self._running:
+                try:
+                    data = reader(self.chunk)
+                except Exception:
+                    break
+                if not data:
+                    break
+                self.ring.write(np.frombuffer(data, dtype=np.int16))
+
+        self._thread = threading.Thread(target=run, name='audio-capture', daemon=True)
+        self._thread.start()
+
+    def latest_window(self):
+        """最近一个 CHUNK 的采样（复用同一块缓冲区）；尚无足够数据时返回 None"""
+        return self.ring.latest(self.chunk, self.window)
+
+    def has_new_data(self):
+        """自上次调用以来是否有新采样到达"""
+        written = self.ring.written
+        fresh = written != self._last_read
+        self._last_read = written
+        return fresh
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=0.5)
+            self._thread = None
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+            except Exception:
+                pass
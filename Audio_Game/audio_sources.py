@@ -0,0 +1,381 @@
+"""可插拔音源
+
+游戏只从 AudioCapture 的环形缓冲区读取最近一个 CHUNK，音源负责往里写 int16 采样：
+- MicrophoneSource：PyAudio 回调模式（pyaudio 只在这里按需导入，没装也不影响其它音源）；
+- WavFileSource / LoopingFileSource：用 wave 模块逐块从磁盘流式读取，不整体读入内存，
+  采样率或声道数与游戏配置不同时在线重采样 / 混音；
+- SyntheticSource：正弦、噪声，以及按脚本给出的响度包络，无需任何设备，适合 CI 与无头服务器。
+非麦克风音源由 AudioCapture 的读取线程按真实时间节奏拉取（每块 chunk / rate 秒），与麦克风的到达节奏一致。
+所有错误都以 AudioSourceError 抛出，由调用方决定如何处理，不在这里退出进程。
+"""
+import time
+import wave
+
+import numpy as np
+
+AUDIO_SOURCE_KINDS = ('mic', 'wav', 'loop', 'sine', 'noise', 'envelope')
+
+
+class AudioSourceError(RuntimeError):
+    """音源无法打开（没有输入设备、缺少 pyaudio、文件格式不支持等）"""
+
+
+class AudioSource:
+    """音源基类：按配置的 rate / chunk / channels 产出交织的 int16 采样
+
+    子类实现 generate(frames) -> int16 数组（frames × channels 个采样）；
+    start(capture) 默认启动 capture 的读取线程，按真实时间节奏调用 read。
+    """
+
+    name = 'source'
+
+    def __init__(self, rate=44100, chunk=1024, channels=1, realtime=True):
+        self.rate = int(rate)
+        self.chunk = int(chunk)
+        self.channels = int(channels)
+        self.realtime = realtime
+        self.frames_read = 0
+        self.finished = False
+        self._t0 = None
+
+    def describe(self):
+        return self.name
+
+    def generate(self, frames):
+        raise NotImplementedError
+
+    def read(self, frames=None):
+        """读取 frames 帧（默认一个 chunk）；realtime 时按采样率节奏等待，不会比真实时间跑得快"""
+        frames = self.chunk if frames is None else int(frames)
+        if self.realtime:
+            now = time.perf_counter()
+            if self._t0 is None:
+                self._t0 = now
+            wait = self._t0 + self.frames_read / self.rate - now
+            if wait > 0:
+                time.sleep(wait)
+        samples = self.generate(frames)
+        self.frames_read += frames
+        return samples
+
+    def start(self, capture):
+        """把音源接到 AudioCapture 上（读取线程模式）"""
+        capture.start_reader(lambda n: self.read(n).tobytes())
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """麦克风输入（PyAudio 回调模式）
+
+    device_index 为 None 时依次尝试：系统默认输入设备 → 名称匹配的内建麦克风 → 第一个可用输入设备。
+    """
+
+    name = 'mic'
+    PREFERRED_NAMES = ('Built-in Microphone', 'MacBook', 'Microphone', '内建麦克风')
+
+    def __init__(self, rate=44100, chunk=1024, channels=1, device_index=None):
+        super().__init__(rate, chunk, channels, realtime=False)
+        self.device_index = device_index
+        self.p = None
+        self.stream = None
+
+    def describe(self):
+        return f"mic (index={self.device_index})"
+
+    def start(self, capture):
+        try:
+            import pyaudio
+        except ModuleNotFoundError:
+            raise AudioSourceError(
+                "the 'pyaudio' package is not installed in this Python interpreter.\n"
+                "  1) Activate the project's virtual environment and run: pip install pyaudio\n"
+                "  2) On macOS you may need portaudio: brew install portaudio && pip install pyaudio\n"
+                "  3) Or run without a microphone: --audio-source sine:300 / noise / wav:PATH"
+            ) from None
+
+        self.p = pyaudio.PyAudio()
+        try:
+            if self.device_index is None:
+                self.device_index = self.select_device()
+            available = self.p.get_device_info_by_index(self.device_index).get('maxInputChannels', 0)
+            if available < self.channels:
+                raise AudioSourceError(
+                    f"输入设备 index={self.device_index} 只有 {available} 个输入声道，需要 {self.channels} 个"
+                    "（多支麦克风可先合并成一个聚合设备）"
+                )
+            print(f"选择的音频输入设备: index={self.device_index}, "
+                  f"name={self.p.get_device_info_by_index(self.device_index).get('name')}")
+            # 回调模式：PyAudio 线程把采样写入环形缓冲区，游戏循环不再阻塞读流
+            self.stream = capture.open_pyaudio(
+                self.p, pyaudio.paInt16, self.rate, input_device_index=self.device_index
+            )
+        except AudioSourceError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            raise AudioSourceError(f"音频流初始化失败: {e}") from e
+        print("✅ 音频流初始化成功!")
+
+    def select_device(self):
+        """选择输入设备；没有任何输入设备时抛出 AudioSourceError"""
+        p = self.p
+        input_devices = []
+        for i in range(p.get_device_count()):
+            device_info = p.get_device_info_by_index(i)
+            if device_info.get('maxInputChannels', 0) >= self.channels:
+                input_devices.append((i, device_info))
+
+        if input_devices:
+            print("可用输入设备:")
+            for idx, info in input_devices:
+                print(f"  - index={idx}, name={info.get('name')}, channels={info.get('maxInputChannels')}, defaultSR={info.get('defaultSampleRate')}")
+
+        try:
+            default_info = p.get_default_input_device_info()
+            print(f"优先选择系统默认输入设备: index={default_info.get('index')}, name={default_info.get('name')}")
+            if default_info.get('index') is not None and default_info.get('maxInputChannels', 0) >= self.channels:
+                return default_info.get('index')
+        except Exception:
+            pass
+
+        for idx, info in input_devices:
+            name = (info.get('name') or '').lower()
+            if any(preferred.lower() in name for preferred in self.PREFERRED_NAMES):
+                print(f"匹配到首选麦克风: index={idx}, name={info.get('name')}")
+                return idx
+
+        if input_devices:
+            idx, info = input_devices[0]
+            print(f"使用第一个可用输入设备: index={idx}, name={info.get('name')}")
+            return idx
+
+        raise AudioSourceError("未找到音频输入设备（可改用 --audio-source sine / noise / wav:PATH）")
+
+    def close(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+        if self.p is not None:
+            self.p.terminate()
+            self.p = None
+
+
+class WavFileSource(AudioSource):
+    """从 16-bit PCM WAV 文件流式读取
+
+    每次只从磁盘读取本块需要的帧。文件采样率不同时做线性插值重采样（相位在块之间连续），
+    声道数不同时混成单声道，或按顺序把文件声道分给各声道（不够时循环复用）。
+    放完后输出静音（finished=True）；loop=True 时从头循环。
+    """
+
+    name = 'wav'
+
+    def __init__(self, path, rate=44100, chunk=1024, channels=1, loop=False, realtime=True):
+        super().__init__(rate, chunk, channels, realtime)
+        self.path = path
+        self.loop = loop
+        try:
+            self._wav = wave.open(path, 'rb')
+        except (OSError, wave.Error, EOFError) as e:
+            raise AudioSourceError(f"无法打开 WAV 文件 {path}: {e}") from e
+        if self._wav.getsampwidth() != 2:
+            self._wav.close()
+            raise AudioSourceError(f"只支持 16-bit PCM WAV: {path}（{self._wav.getsampwidth() * 8}-bit）")
+        if self._wav.getnframes() == 0:
+            self._wav.close()
+            raise AudioSourceError(f"WAV 文件为空: {path}")
+        self.file_rate = self._wav.getframerate()
+        self.file_channels = self._wav.getnchannels()
+        self.step = self.file_rate / self.rate
+        # 重采样状态：尚未用完的源帧（float32，已混成目标声道数）及当前读位置的小数偏移
+        self._pending = np.zeros((0, self.channels), dtype=np.float32)
+        self._pos = 0.0
+        self._out = np.empty((self.chunk, self.channels), dtype=np.int16)
+
+    def describe(self):
+        mode = 'loop' if self.loop else 'wav'
+        return f"{mode}:{self.path} ({self.file_rate} Hz, {self.file_channels} ch)"
+
+    def read_file(self, frames):
+        """从磁盘读取至多 frames 帧并转换到目标声道数；到文件尾时按 loop 决定回绕还是结束"""
+        parts = []
+        remaining = frames
+        while remaining > 0:
+            raw = self._wav.readframes(remaining)
+            if not raw:
+                if not self.loop:
+                    self.finished = True
+                    break
+                self._wav.rewind()
+                continue
+            data = np.frombuffer(raw, dtype='<i2').reshape(-1, self.file_channels)
+            parts.append(data)
+            remaining -= len(data)
+        if not parts:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        data = np.concatenate(parts).astype(np.float32)
+        if self.file_channels != self.channels:
+            if self.channels == 1:
+                data = data.mean(axis=1, keepdims=True)
+            else:
+                # 多人模式：文件声道按顺序分给各玩家，不够时循环复用
+                data = data[:, np.arange(self.channels) % self.file_channels]
+        return data
+
+    def generate(self, frames):
+        out = self._out if frames == self.chunk else np.empty((frames, self.channels), dtype=np.int16)
+        if self.step == 1.0:
+            data = self.read_file(frames) if not self.finished else self._pending
+            out[:len(data)] = data
+            out[len(data):] = 0
+            return out.reshape(-1)
+
+        # 线性插值重采样：需要覆盖到 pos + (frames - 1) * step 的下一帧
+        positions = self._pos + np.arange(frames) * self.step
+        need = int(positions[-1]) + 2
+        if len(self._pending) < need and not self.finished:
+            self._pending = np.concatenate((self._pending, self.read_file(need - len(self._pending))))
+        pending = self._pending
+        if len(pending) == 0:
+            out[:] = 0
+            return out.reshape(-1)
+        index = np.arange(len(pending))
+        for c in range(self.channels):
+            out[:, c] = np.interp(positions, index, pending[:, c], right=0.0)
+        consumed = min(int(self._pos + frames * self.step), len(pending))
+        self._pos = self._pos + frames * self.step - consumed
+        self._pending = pending[consumed:]
+        return out.reshape(-1)
+
+    def close(self):
+        self._wav.close()
+
+
+class LoopingFileSource(WavFileSource):
+    """循环播放的 WAV 文件"""
+
+    name = 'loop'
+
+    def __init__(self, path, rate=44100, chunk=1024, channels=1, realtime=True):
+        super().__init__(path, rate, chunk, channels, loop=True, realtime=realtime)
+
+
+class SyntheticSource(AudioSource):
+    """合成信号：正弦（相位跨块连续）、白噪声，可叠加按脚本给出的响度包络
+
+    envelope 为 [(秒, 振幅), ...]，振幅 0..1（满幅 = 32767），按时间线性插值；
+    超出脚本末尾后保持最后的振幅，loop_envelope=True 时从头循环。
+    """
+
+    WAVEFORMS = ('sine', 'noise')
+
+    def __init__(self, waveform='sine', frequency=300.0, amplitude=0.3, envelope=None, loop_envelope=False,
+                 rate=44100, chunk=1024, channels=1, realtime=True, seed=0):
+        super().__init__(rate, chunk, channels, realtime)
+        if waveform not in self.WAVEFORMS:
+            raise AudioSourceError(f"未知的合成波形: {waveform}（可选: {', '.join(self.WAVEFORMS)}）")
+        self.waveform = waveform
+        self.frequency = float(frequency)
+        self.amplitude = float(amplitude)
+        self.loop_envelope = loop_envelope
+        self.envelope = None
+        if envelope:
+            points = sorted((float(t), float(a)) for t, a in envelope)
+            self.envelope = (np.array([t for t, _ in points]), np.array([a for _, a in points]))
+        self.rng = np.random.default_rng(seed)
+        self._phase = 0.0
+        self._ticks = np.arange(self.chunk, dtype=np.float64)
+        self._out = np.empty((self.chunk, self.channels), dtype=np.int16)
+
+    @property
+    def name(self):
+        return 'envelope' if self.envelope is not None else self.waveform
+
+    def describe(self):
+        if self.waveform == 'sine':
+            text = f"sine {self.frequency:.0f} Hz"
+        else:
+            text = 'noise'
+        if self.envelope is not None:
+            text += f", envelope {len(self.envelope[0])} points over {self.envelope[0][-1]:.1f} s"
+        return text
+
+    def gains(self, frames):
+        """本块每个采样的振幅（0..1）"""
+        if self.envelope is None:
+            return self.amplitude
+        times, amps = self.envelope
+        t = (self.frames_read + self._ticks[:frames]) / self.rate
+        if self.loop_envelope and times[-1] > 0:
+            t = np.mod(t, times[-1])
+        return np.interp(t, times, amps)
+
+    def generate(self, frames):
+        ticks = self._ticks if frames == self.chunk else np.arange(frames, dtype=np.float64)
+        if self.waveform == 'sine':
+            omega = 2.0 * np.pi * self.frequency / self.rate
+            signal = np.sin(self._phase + omega * ticks)
+            self._phase = (self._phase + omega * frames) % (2.0 * np.pi)
+        else:
+            signal = np.clip(self.rng.normal(0.0, 0.35, frames), -1.0, 1.0)
+        signal = signal * self.gains(frames) * 32767.0
+        out = self._out if frames == self.chunk else np.empty((frames, self.channels), dtype=np.int16)
+        out[:] = np.clip(signal, -32768, 32767)[:, None]
+        return out.reshape(-1)
+
+
+def parse_envelope(text):
+    """'0:0,2:0.8,5:0.2' → [(0.0, 0.0), (2.0, 0.8), (5.0, 0.2)]"""
+    points = []
+    for item in text.split(','):
+        t, _, a = item.partition(':')
+        try:
+            points.append((float(t), float(a)))
+        except ValueError:
+            raise AudioSourceError(f"包络格式应为 秒:振幅,秒:振幅,...，无法解析: {item!r}") from None
+    return points
+
+
+def make_audio_source(spec, rate=44100, chunk=1024, channels=1):
+    """按命令行描述创建音源
+
+    - mic 或 mic:INDEX      麦克风（可指定设备序号）
+    - wav:PATH / loop:PATH   WAV 文件（放完后静音 / 循环）
+    - sine 或 sine:HZ        正弦波（默认 300 Hz）
+    - noise                  白噪声
+    - envelope:T:A,T:A,...   按脚本响度包络变化的 300 Hz 正弦（循环播放）
+    """
+    if isinstance(spec, AudioSource):
+        return spec
+    kind, _, arg = spec.partition(':')
+    if kind == 'mic':
+        try:
+            device = int(arg) if arg else None
+        except ValueError:
+            raise AudioSourceError(f"麦克风设备序号应为整数: {arg!r}") from None
+        return MicrophoneSource(rate, chunk, channels, device)
+    if kind in ('wav', 'loop'):
+        if not arg:
+            raise AudioSourceError(f"缺少文件路径: {kind}:PATH")
+        if kind == 'loop':
+            return LoopingFileSource(arg, rate, chunk, channels)
+        return WavFileSource(arg, rate, chunk, channels)
+    if kind == 'sine':
+        try:
+            frequency = float(arg) if arg else 300.0
+        except ValueError:
+            raise AudioSourceError(f"正弦波频率应为数字（Hz）: {arg!r}") from None
+        return SyntheticSource('sine', frequency, rate=rate, chunk=chunk, channels=channels)
+    if kind == 'noise':
+        return SyntheticSource('noise', rate=rate, chunk=chunk, channels=channels)
+    if kind == 'envelope':
+        return SyntheticSource('sine', envelope=parse_envelope(arg), loop_envelope=True,
+                               rate=rate, chunk=chunk, channels=channels)
+    raise AudioSourceError(f"未知的音源: {spec}（可选: {', '.join(AUDIO_SOURCE_KINDS)}）")
@@ -0,0 +1,86 @@
+"""渲染后端基准：在同一段音量回放下比较 patches 与 framebuffer 两种后端的每帧耗时
+
+无需麦克风和窗口（Agg 后端）：
+    python Audio_Game/bench_renderers.py --frames 300
+每种组合（后端 × blit/整幅重绘）各跑一局，输出每帧耗时的均值与 p50 / p95（毫秒）。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GAME_DIR not in sys.path:
+    sys.path.insert(0, _GAME_DIR)
+
+from session_record import SessionRecorder
+from Pixel_Dog_Run import RENDER_BACKENDS, PixelCarChaseDogGame
+
+
+def make_volume_trace(path, frames, seed=0):
+    """写一段起伏的音量录音（一局通常不到 100 帧就结束）"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames)
+    volumes = np.clip(0.75 + 0.25 * np.sin(t / 23.0) + rng.normal(0.0, 0.05, frames), 0.0, 1.0)
+    recorder = SessionRecorder(path, 'volume')
+    for v in volumes:
+        recorder.write_volume(v)
+    recorder.close()
+
+
+def bench(backend, use_blit, replay_path, frames):
+    """反复开局直到累计 frames 帧，返回每帧耗时（毫秒）"""
+    times = []
+    while len(times) < frames:
+        game = PixelCarChaseDogGame(replay_path=replay_path, render_backend=backend, use_blit=use_blit)
+        game.realtime_physics = False  # 每帧固定推进一步，各组合处理的帧内容相同
+        canvas = game.fig.canvas
+        canvas.draw()
+        while not game.game_over and len(times) < frames:
+            start = time.perf_counter()
+            if use_blit:
+                game.blit_frame()
+            else:
+                game.game_loop(len(times))
+                canvas.draw()
+            times.append((time.perf_counter() - start) * 1000.0)
+        plt.close(game.fig)
+    return np.array(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Pixel Dog Run render backends')
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.dogrec')
+        make_volume_trace(path, args.frames)
+        frames = args.frames
+        rows = []
+        for backend in RENDER_BACKENDS:
+            for use_blit in (True, False):
+                times = bench(backend, use_blit, path, frames)
+                rows.append((backend, 'blit' if use_blit else 'full', times))
+
+    print(f"\n{frames} frames per run (ms per frame)")
+    print(f"{'backend':<12}{'mode':<6}{'mean':>8}{'p50':>8}{'p95':>8}")
+    for backend, mode, times in rows:
+        p50, p95 = np.percentile(times, (50, 95))
+        print(f"{backend:<12}{mode:<6}{times.mean():8.2f}{p50:8.2f}{p95:8.2f}")
+
+    # 两种后端在同一模式下的均值之比：>1 表示 framebuffer 更快
+    means = {(backend, mode): times.mean() for backend, mode, times in rows}
+    for mode in ('blit', 'full'):
+        ratio = means[('patches', mode)] / means[('framebuffer', mode)]
+        print(f"framebuffer vs patches ({mode}): {ratio:.2f}x {'faster' if ratio >= 1.0 else 'slower'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""难度调参：把录好的音量轨迹批量回放进模拟核心，搜索车速 / 狗速参数
+
+    python Audio_Game/difficulty_tuner.py sessions/*.dogrec --random 200
+    python Audio_Game/difficulty_tuner.py sessions/ --grid car_accel=0.001:0.002:5 --grid dog_speed_exponent=1.2,1.6,2.0
+
+- 语料：.dogrec 录音（volume 类型直接使用；raw 类型按游戏的 RMS → 滑动平均 → 门限/归一化流程换算成音量），
+  或 --synthetic N 生成的随机轨迹；
+- 搜索：--grid 给出的网格（start:stop:num 或逗号列表，未给出的参数保持默认），或 --random N 在默认值 ±30% 内均匀采样；
+- 每个配置把整个语料交给 BatchChaseSimulation 一次跑完，多个配置再拼成一批；
+  批次分给 ProcessPoolExecutor 的各个进程（语料只在进程初始化时传一次）；
+- 结果按 (语料内容, 完整参数) 的哈希缓存到 JSON 文件，重复运行时已算过的配置直接取缓存。
+输出每个配置的胜率、失败率与获胜用时（tick）分布，按与 --target-win-rate 的差距排序。
+"""
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GAME_DIR not in sys.path:
+    sys.path.insert(0, _GAME_DIR)
+
+from dog_run_sim import OUTCOME_LOSE, OUTCOME_WIN, BatchChaseSimulation, ChaseParams
+from loudness import make_loudness_estimator
+from session_record import KIND_VOLUME, SessionReplay
+
+# 可调参数（默认值即 PixelCarChaseDogGame 中手调的值）
+TUNABLE = ('car_accel', 'late_car_accel', 'dog_max_speed', 'dog_speed_exponent')
+CACHE_VERSION = 1
+
+# 与游戏的音量换算一致（PixelCarChaseDogGame.volume_threshold / max_volume / volume_window）
+VOLUME_THRESHOLD = 0.004
+MAX_VOLUME = 0.06
+VOLUME_WINDOW = 20
+
+
+def volumes_from_replay(replay):
+    """把录音换算成逐帧归一化音量（多声道 raw 录音取第一个声道）"""
+    if replay.kind == KIND_VOLUME:
+        return np.array(replay.data, dtype=np.float64)
+    frames = np.asarray(replay.data).reshape(replay.count, -1, replay.channels)[:, :, 0]
+    audio = frames.astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(np.square(audio), axis=1))
+    loudness = make_loudness_estimator('moving_average', window=VOLUME_WINDOW)
+    volumes = np.empty(replay.count)
+    for i, value in enumerate(rms):
+        smooth = loudness.update(float(value))
+        volumes[i] = 0.0 if smooth < VOLUME_THRESHOLD else min(smooth / MAX_VOLUME, 1.0)
+    return volumes
+
+
+def expand_paths(paths):
+    """目录展开为其中的 .dogrec，通配符按 glob 展开"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.dogrec'))))
+        else:
+            files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def load_corpus(paths):
+    """读取全部录音，拼成 (N, T) 音量矩阵与每条的长度"""
+    traces = []
+    for path in expand_paths(paths):
+        replay = SessionReplay(path)
+        if replay.count:
+            traces.append(volumes_from_replay(replay))
+    return pack_traces(traces)
+
+
+def synthetic_corpus(count, frames=400, seed=0):
+    """随机音量轨迹：不同的平均响度、起伏与停顿，模拟不同玩家"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames)
+    traces = []
+    for _ in range(count):
+        level = rng.uniform(0.3, 1.0)
+        wobble = rng.uniform(0.0, 0.4) * np.sin(t / rng.uniform(10.0, 60.0) + rng.uniform(0, 2 * np.pi))
+        pauses = rng.random(frames) < rng.uniform(0.0, 0.2)
+        trace = np.clip(level + wobble + rng.normal(0.0, 0.08, frames), 0.0, 1.0)
+        trace[pauses] = 0.0
+        traces.append(trace)
+    return pack_traces(traces)
+
+
+def pack_traces(traces):
+    """不等长的轨迹补零成矩阵，长度另存（回放时每条只用到自己的长度）"""
+    if not traces:
+        raise ValueError("语料为空：请给出 .dogrec 录音或使用 --synthetic N")
+    lengths = np.array([len(trace) for trace in traces], dtype=np.int64)
+    volumes = np.zeros((len(traces), int(lengths.max())))
+    for row, trace in zip(volumes, traces):
+        row[:len(trace)] = trace
+    return volumes, lengths
+
+
+def corpus_digest(volumes, lengths):
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(volumes).tobytes())
+    digest.update(np.ascontiguousarray(lengths).tobytes())
+    return digest.hexdigest()
+
+
+def parse_grid_axis(text):
+    """'car_accel=0.001:0.002:5' 或 'dog_speed_exponent=1.2,1.6,2.0' → (名称, 取值列表)"""
+    name, _, spec = text.partition('=')
+    if name not in TUNABLE:
+        raise ValueError(f"不可调的参数: {name}（可选: {', '.join(TUNABLE)}）")
+    if ':' in spec:
+        start, stop, num = spec.split(':')
+        values = np.linspace(float(start), float(stop), int(num)).tolist()
+    else:
+        values = [float(v) for v in spec.split(',') if v]
+    if not values:
+        raise ValueError(f"参数 {name} 没有取值")
+    return name, values
+
+
+def grid_configs(axes):
+    """网格搜索：各轴取值的笛卡尔积"""
+    names = [name for name, _ in axes]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in axes))]
+
+
+def random_configs(count, spread=0.3, seed=0):
+    """随机搜索：每个参数在默认值 ×(1 ± spread) 内均匀采样"""
+    rng = np.random.default_rng(seed)
+    base = ChaseParams()
+    configs = []
+    for _ in range(count):
+        configs.append({name: float(getattr(base, name) * rng.uniform(1.0 - spread, 1.0 + spread))
+                        for name in TUNABLE})
+    return configs
+
+
+def config_key(digest, config):
+    """缓存键：语料哈希 + 完整参数（含未调的默认值），参数取 repr 精度"""
+    params = ChaseParams(**config).as_dict()
+    text = json.dumps({'v': CACHE_VERSION, 'corpus': digest, 'params': params}, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def summarize(outcome, ticks, frame_ms=25.0):
+    """单个配置的胜率与获胜用时分布"""
+    wins = outcome == OUTCOME_WIN
+    summary = {
+        'games': int(outcome.size),
+        'win_rate': float(wins.mean()),
+        'lose_rate': float((outcome == OUTCOME_LOSE).mean()),
+    }
+    if wins.any():
+        p10, p50, p90 = np.percentile(ticks[wins], (10, 50, 90))
+        summary.update({
+            'win_ticks_mean': float(ticks[wins].mean()),
+            'win_ticks_p10': float(p10), 'win_ticks_p50': float(p50), 'win_ticks_p90': float(p90),
+            'win_seconds_p50': float(p50) * frame_ms / 1000.0,
+        })
+    return summary
+
+
+# 工作进程中的语料（由 initializer 设置，每个进程只接收一次）
+_CORPUS = None
+
+
+def _init_worker(volumes, lengths):
+    global _CORPUS
+    _CORPUS = (volumes, lengths)
+
+
+def evaluate_batch(configs):
+    """在工作进程中评估一批配置：K 个配置 × N 条轨迹拼成一次 BatchChaseSimulation"""
+    volumes, lengths = _CORPUS
+    n = len(volumes)
+    k = len(configs)
+    base = ChaseParams()
+    params = ChaseParams(**{
+        name: np.repeat([config.get(name, getattr(base, name)) for config in configs], n)
+        for name in TUNABLE
+    })
+    result = BatchChaseSimulation(params).run(np.tile(volumes, (k, 1)), np.tile(lengths, k))
+    outcome = result['outcome'].reshape(k, n)
+    ticks = result['ticks'].reshape(k, n)
+    return [summarize(outcome[i], ticks[i]) for i in range(k)]
+
+
+def load_cache(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"⚠️  缓存文件无法读取，忽略: {path}")
+        return {}
+
+
+def save_cache(path, cache):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def tune(configs, volumes, lengths, workers=None, batch_size=8, cache_path=None):
+    """评估全部配置，返回 [(config, summary), ...]；已缓存的配置不再计算"""
+    digest = corpus_digest(volumes, lengths)
+    cache = load_cache(cache_path)
+    keys = [config_key(digest, config) for config in configs]
+    todo = [i for i, key in enumerate(keys) if key not in cache]
+    print(f"{len(configs)} configurations, {len(configs) - len(todo)} cached, "
+          f"{len(todo)} to evaluate on {len(volumes)} traces")
+
+    if todo:
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(volumes, lengths)) as pool:
+            futures = [pool.submit(evaluate_batch, [configs[i] for i in batch]) for batch in batches]
+            for batch, future in zip(batches, futures):
+                for i, summary in zip(batch, future.result()):
+                    cache[keys[i]] = {'config': configs[i], 'summary': summary}
+        if cache_path:
+            save_cache(cache_path, cache)
+    return [(config, cache[key]['summary']) for config, key in zip(configs, keys)]
+
+
+def rank(results, target_win_rate):
+    """按胜率与目标的差距排序，差距相同时获胜更快的在前"""
+    def score(item):
+        summary = item[1]
+        return (abs(summary['win_rate'] - target_win_rate), summary.get('win_ticks_p50', float('inf')))
+    return sorted(results, key=score)
+
+
+def print_table(results, top):
+    header = ''.join(f"{name:>20}" for name in TUNABLE)
+    print(f"\n{header}{'win':>7}{'lose':>7}{'p10':>7}{'p50':>7}{'p90':>7}  (ticks to win)")
+    base = ChaseParams()
+    for config, summary in results[:top]:
+        values = ''.join(f"{config.get(name, getattr(base, name)):>20.5g}" for name in TUNABLE)
+        ticks = ''.join(f"{summary[key]:7.0f}" if key in summary else f"{'-':>7}"
+                        for key in ('win_ticks_p10', 'win_ticks_p50', 'win_ticks_p90'))
+        print(f"{values}{summary['win_rate']:7.2f}{summary['lose_rate']:7.2f}{ticks}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tune Pixel Dog Run difficulty on recorded volume traces')
+    parser.add_argument('paths', nargs='*', help='.dogrec files, globs or directories')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Use N generated traces instead of recordings')
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=SPEC',
+                        help='Grid axis: NAME=start:stop:num or NAME=v1,v2,... (repeatable)')
+    parser.add_argument('--random', type=int, metavar='N', help='Random search with N configurations')
+    parser.add_argument('--spread', type=float, default=0.3, help='Random search range around the defaults (±fraction)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--batch-size', type=int, default=8, help='Configurations per worker task')
+    parser.add_argument('--cache', default='tuner_cache.json', metavar='PATH', help='Result cache file')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--target-win-rate', type=float, default=0.5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', metavar='PATH', help='Write all results as JSON')
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        volumes, lengths = synthetic_corpus(args.synthetic, seed=args.seed)
+    else:
+        volumes, lengths = load_corpus(args.paths)
+
+    configs = [{}]  # 当前手调的默认值作为对照
+    if args.grid:
+        configs += grid_configs([parse_grid_axis(text) for text in args.grid])
+    if args.random:
+        configs += random_configs(args.random, args.spread, args.seed)
+
+    results = tune(configs, volumes, lengths, args.workers, args.batch_size,
+                   None if args.no_cache else args.cache)
+    baseline = results[0][1]
+    print(f"current defaults: win {baseline['win_rate']:.2f}, lose {baseline['lose_rate']:.2f}, "
+          f"p50 {baseline.get('win_ticks_p50', float('nan')):.0f} ticks")
+    ranked = rank(results, args.target_win_rate)
+    print_table(ranked, args.top)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([{'config': config, 'summary': summary} for config, summary in ranked], f, indent=2)
+        print(f"\nresults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
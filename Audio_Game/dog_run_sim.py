@@ -0,0 +1,538 @@
+"""无界面的定步长追逐模拟核心
+
+只依赖每帧一个音量采样（0..1），返回车和狗的位置、速度与胜负状态。
+速度曲线与游戏完全相同（car_accel / late_car_accel / dog_speed_exponent），
+不需要麦克风也不需要窗口，可以每秒跑上千局；PixelCarChaseDogGame 只负责把状态画出来。
+BatchChaseSimulation 用 NumPy 数组同时推进成千上万局，用于难度调参；
+RaceSimulation 是多人模式：一辆车追 N 只狗，每只狗由自己的声道驱动；
+PackSimulation 是群跑展示模式：数百条赛道的 AI 车和狗放在 float32 数组里一起推进。
+ChaseSimulation 可选带一条道具赛道（track_entities.Course）：道具按速度倍率影响车和狗。
+"""
+import numpy as np
+
+
+class ChaseParams:
+    """模拟参数（默认值与 PixelCarChaseDogGame.__init__ 一致）"""
+
+    FIELDS = (
+        'game_width', 'car_start_x', 'dog_start_x',
+        'min_car_speed', 'max_car_speed', 'car_accel', 'late_game_frames', 'late_car_accel',
+        'dog_min_speed', 'dog_max_speed', 'dog_speed_exponent',
+        'finish_x', 'catch_margin',
+    )
+
+    def __init__(self, **overrides):
+        self.game_width = 12  # 关卡长度（车被限制在 [0.5, game_width - 0.5]）
+        self.car_start_x = 0.5
+        self.dog_start_x = 2.0
+        self.min_car_speed = 0.05
+        self.max_car_speed = 0.60
+        self.car_accel = 0.0014
+        self.late_game_frames = 400
+        self.late_car_accel = 0.0019
+        self.dog_min_speed = 0.03
+        self.dog_max_speed = 0.125
+        self.dog_speed_exponent = 1.6
+        self.finish_x = self.game_width - 1.0
+        self.catch_margin = 0.2
+        for key, value in overrides.items():
+            if key not in self.FIELDS:
+                raise TypeError(f"未知的模拟参数: {key}")
+            setattr(self, key, value)
+
+    @classmethod
+    def from_game(cls, game):
+        """从游戏对象读取当前调好的参数"""
+        return cls(
+            game_width=game.level_length,
+            car_start_x=game.car_x,
+            dog_start_x=game.dog_x,
+            min_car_speed=game.min_car_speed,
+            max_car_speed=game.max_car_speed,
+            car_accel=game.car_accel,
+            late_game_frames=game.late_game_frames,
+            late_car_accel=game.late_car_accel,
+            dog_min_speed=game.dog_min_speed,
+            dog_max_speed=game.dog_max_speed,
+            dog_speed_exponent=game.dog_speed_exponent,
+            finish_x=game.finish_x,
+            catch_margin=game.catch_margin,
+        )
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+
+def car_speed_at(params, game_time):
+    """第 game_time 帧（从 1 开始）的车速：分段线性加速，封顶 max_car_speed"""
+    # 首帧不叠加加速度，避免突兀加速感
+    effective_time = max(0, game_time - 1)
+    # 分段加速：前期使用 car_accel，超过阈值后使用 late_car_accel
+    if effective_time <= params.late_game_frames:
+        car_v = params.min_car_speed + params.car_accel * effective_time
+    else:
+        car_v = (params.min_car_speed
+                 + params.car_accel * params.late_game_frames
+                 + params.late_car_accel * (effective_time - params.late_game_frames))
+    return min(car_v, params.max_car_speed)
+
+
+def dog_speed_for(params, volume_level):
+    """音量 → 狗速：次线性映射减弱中段速度"""
+    level_adj = volume_level ** params.dog_speed_exponent
+    return params.dog_min_speed + (params.dog_max_speed - params.dog_min_speed) * level_adj
+
+
+class ChaseSimulation:
+    """单局追逐模拟：每次 step 输入一个音量采样，推进一帧；course 为可选的道具赛道"""
+
+    def __init__(self, params=None, course=None):
+        self.params = params or ChaseParams()
+        self.course = course
+        self.reset()
+
+    def reset(self):
+        """回到开局状态"""
+        p = self.params
+        self.car_x = p.car_start_x
+        self.dog_x = p.dog_start_x
+        self.car_speed = 0.0
+        self.dog_speed = p.dog_min_speed
+        self.game_time = 0
+        self.score = 0.0
+        self.game_over = False
+        self.dog_hit = False
+        self.mission_success = False
+        if self.course is not None:
+            self.course.reset()
+
+    def step(self, volume_level):
+        """推进一帧；游戏结束后调用不再改变状态。返回 game_over"""
+        if self.game_over:
+            return True
+        p = self.params
+        self.game_time += 1
+        self.car_speed = car_speed_at(p, self.game_time)
+        self.dog_speed = dog_speed_for(p, volume_level)
+        course = self.course
+        if course is not None:
+            self.car_speed *= course.speed_factor('car')
+            self.dog_speed *= course.speed_factor('dog')
+            course.tick()
+            prev_car_x, prev_dog_x = self.car_x, self.dog_x
+
+        # 前进
+        self.car_x += self.car_speed
+        self.dog_x += self.dog_speed
+
+        # 限制车辆在赛道内（与初始位置一致）
+        self.car_x = max(0.5, min(p.game_width - 0.5, self.car_x))
+
+        # 道具：只检测本步扫过的区间，效果从下一步起生效
+        if course is not None:
+            course.sweep('car', prev_car_x, self.car_x)
+            course.sweep('dog', prev_dog_x, self.dog_x)
+
+        # 失败：撞到小狗（优先于到达终点判定）
+        if self.car_x + p.catch_margin >= self.dog_x:
+            self.game_over = True
+            self.dog_hit = True
+            self.mission_success = False
+        # 成功：小狗安全到达终点
+        elif self.dog_x >= p.finish_x:
+            self.game_over = True
+            self.mission_success = True
+
+        # 分数基于车辆移动距离
+        self.score += self.car_speed * 10
+        return self.game_over
+
+    @property
+    def outcome(self):
+        if self.mission_success:
+            return 'win'
+        if self.dog_hit:
+            return 'lose'
+        return 'running'
+
+    def run(self, volumes, max_ticks=None):
+        """用一串音量采样跑完一局（热路径：局部变量展开的 step，规则与 step 完全相同）
+
+        采样用完仍未分出胜负时，用最后一个采样继续（max_ticks 为上限）。
+        返回 dict：outcome ('win' / 'lose' / 'timeout')、ticks、score、car_x、dog_x。
+        """
+        if self.course is not None:
+            return self._run_steps(volumes, max_ticks)
+        p = self.params
+        min_car, max_car = p.min_car_speed, p.max_car_speed
+        accel, late_frames, late_accel = p.car_accel, p.late_game_frames, p.late_car_accel
+        late_base = min_car + accel * late_frames
+        dog_min, dog_range, expo = p.dog_min_speed, p.dog_max_speed - p.dog_min_speed, p.dog_speed_exponent
+        car_hi = p.game_width - 0.5
+        margin, finish = p.catch_margin, p.finish_x
+
+        car_x, dog_x, score, t = self.car_x, self.dog_x, self.score, self.game_time
+        car_v = self.car_speed
+        dog_v = self.dog_speed
+        n = len(volumes)
+        # 车速单调增加并最终超过狗的最高速度，一局必然结束；上限只是保险
+        limit = max_ticks if max_ticks is not None else n + 100000
+        last = volumes[-1] if n else 0.0
+        i = 0
+        while i < limit and not self.game_over:
+            volume = volumes[i] if i < n else last
+            i += 1
+            t += 1
+            eff = t - 1
+            if eff <= late_frames:
+                car_v = min_car + accel * eff
+            else:
+                car_v = late_base + late_accel * (eff - late_frames)
+            if car_v > max_car:
+                car_v = max_car
+            dog_v = dog_min + dog_range * volume ** expo
+            car_x += car_v
+            dog_x += dog_v
+            car_x = max(0.5, min(car_hi, car_x))
+            score += car_v * 10
+            if car_x + margin >= dog_x:
+                self.game_over = self.dog_hit = True
+            elif dog_x >= finish:
+                self.game_over = self.mission_success = True
+
+        self.car_x, self.dog_x, self.score, self.game_time = car_x, dog_x, score, t
+        self.car_speed, self.dog_speed = car_v, dog_v
+        return {
+            'outcome': self.outcome if self.game_over else 'timeout', 'ticks': t, 'score': score,
+            'car_x': car_x, 'dog_x': dog_x,
+        }
+
+    def _run_steps(self, volumes, max_ticks=None):
+        """带道具时的 run：逐步调用 step（展开的热路径不含道具规则）"""
+        n = len(volumes)
+        limit = max_ticks if max_ticks is not None else n + 100000
+        last = volumes[-1] if n else 0.0
+        i = 0
+        while i < limit and not self.game_over:
+            self.step(volumes[i] if i < n else last)
+            i += 1
+        return {
+            'outcome': self.outcome if self.game_over else 'timeout', 'ticks': self.game_time,
+            'score': self.score, 'car_x': self.car_x, 'dog_x': self.dog_x,
+        }
+
+
+class RaceSimulation:
+    """多人赛跑：一辆车追 N 只狗，狗的状态全部放在长度 N 的数组里
+
+    每只狗由自己的音量驱动；被车追上的狗出局并停在原地，到达终点的狗安全并记录名次。
+    所有狗都出局或到达终点时整局结束：至少一只到达终点为成功，否则失败。
+    规则与 ChaseSimulation 相同，N=1 时每一步的结果与之逐位一致。
+    """
+
+    def __init__(self, params=None, players=2):
+        self.params = params or ChaseParams()
+        self.players = int(players)
+        self.reset()
+
+    def reset(self):
+        """回到开局状态"""
+        p = self.params
+        n = self.players
+        self.car_x = p.car_start_x
+        self.car_speed = 0.0
+        self.dog_x = np.full(n, p.dog_start_x, dtype=np.float64)
+        self.dog_speed = np.full(n, p.dog_min_speed, dtype=np.float64)
+        self.running = np.ones(n, dtype=bool)
+        self.caught = np.zeros(n, dtype=bool)
+        self.finished = np.zeros(n, dtype=bool)
+        self.finish_tick = np.full(n, -1, dtype=np.int64)
+        self.game_time = 0
+        self.score = 0.0
+        self.game_over = False
+        self.dog_hit = False
+        self.mission_success = False
+
+    def step(self, volume_levels):
+        """推进一帧；volume_levels 为每只狗的音量（长度 N，或一个标量所有狗共用）。返回 game_over"""
+        if self.game_over:
+            return True
+        p = self.params
+        running = self.running
+        self.game_time += 1
+        self.car_speed = car_speed_at(p, self.game_time)
+        volumes = np.broadcast_to(np.asarray(volume_levels, dtype=np.float64), running.shape)
+        # float_power 与标量 `**` 逐位相同；出局或已到终点的狗速度为 0
+        speed = p.dog_min_speed + (p.dog_max_speed - p.dog_min_speed) * np.float_power(volumes, p.dog_speed_exponent)
+        np.copyto(self.dog_speed, np.where(running, speed, 0.0))
+
+        self.car_x += self.car_speed
+        self.dog_x = self.dog_x + self.dog_speed  # 新数组：调用方保存的上一帧位置不受影响
+        self.car_x = max(0.5, min(p.game_width - 0.5, self.car_x))
+
+        # 追上优先于到达终点（同 ChaseSimulation）
+        caught = running & (self.car_x + p.catch_margin >= self.dog_x)
+        finished = running & ~caught & (self.dog_x >= p.finish_x)
+        self.caught |= caught
+        self.finished |= finished
+        self.finish_tick[finished] = self.game_time
+        running &= ~(caught | finished)
+
+        if not running.any():
+            self.game_over = True
+            self.mission_success = bool(self.finished.any())
+            self.dog_hit = not self.mission_success
+
+        self.score += self.car_speed * 10
+        return self.game_over
+
+    def ranking(self):
+        """到达终点的狗按名次排列的下标"""
+        done = np.flatnonzero(self.finished)
+        return done[np.argsort(self.finish_tick[done], kind='stable')]
+
+    @property
+    def outcome(self):
+        if self.mission_success:
+            return 'win'
+        if self.dog_hit:
+            return 'lose'
+        return 'running'
+
+
+# 批量模拟的结果编码
+OUTCOME_LOSE = -1
+OUTCOME_TIMEOUT = 0
+OUTCOME_WIN = 1
+
+
+class BatchChaseSimulation:
+    """向量化批量模拟：N 局的车/狗状态放在 NumPy 数组里，每帧用数组运算一起推进
+
+    - volumes: (N, T) 音量矩阵；每局实际长度由 lengths 给出（缺省为 T），
+      与 ChaseSimulation.run 相同，采样用完后沿用该局最后一个采样；
+    - params 中任何字段都可以是长度 N 的数组（每局不同的难度参数），标量则所有局共用；
+    - 已结束的局用掩码剔除，之后的帧只计算仍在进行的局。
+    每局的结果与逐帧调用 ChaseSimulation.step 完全一致（相同的浮点运算顺序）。
+    """
+
+    def __init__(self, params=None):
+        self.params = params or ChaseParams()
+
+    def _per_game(self, n):
+        """把每个参数广播成长度 n 的 float64 数组"""
+        return {key: np.broadcast_to(np.asarray(getattr(self.params, key), dtype=np.float64), (n,)).copy()
+                for key in ChaseParams.FIELDS}
+
+    def run(self, volumes, lengths=None, max_ticks=None):
+        """跑完全部对局，返回 dict：outcome（OUTCOME_*）、ticks、score、car_x、dog_x（均为长度 N 的数组）"""
+        volumes = np.asarray(volumes, dtype=np.float64)
+        if volumes.ndim == 1:
+            volumes = volumes[None, :]
+        n, width = volumes.shape
+        if lengths is None:
+            lengths = np.full(n, width, dtype=np.int64)
+        lengths = np.clip(np.asarray(lengths, dtype=np.int64), 1, max(width, 1))
+        if width == 0:
+            volumes = np.zeros((n, 1))
+        limit = max_ticks if max_ticks is not None else int(lengths.max(initial=0)) + 100000
+
+        p = self._per_game(n)
+        outcome = np.full(n, OUTCOME_TIMEOUT, dtype=np.int8)
+        ticks = np.zeros(n, dtype=np.int64)
+        final_score = np.zeros(n)
+        final_car = p['car_start_x'].copy()
+        final_dog = p['dog_start_x'].copy()
+
+        # 仍在进行的局（紧凑存放，结束即剔除）
+        idx = np.arange(n)
+        car_x = p['car_start_x'].copy()
+        dog_x = p['dog_start_x'].copy()
+        score = np.zeros(n)
+        min_car, max_car = p['min_car_speed'], p['max_car_speed']
+        accel, late_frames, late_accel = p['car_accel'], p['late_game_frames'], p['late_car_accel']
+        late_base = min_car + accel * late_frames
+        dog_min = p['dog_min_speed']
+        dog_range = p['dog_max_speed'] - p['dog_min_speed']
+        expo = p['dog_speed_exponent']
+        car_hi = p['game_width'] - 0.5
+        margin, finish = p['catch_margin'], p['finish_x']
+        last_col = lengths - 1
+
+        t = 0
+        while idx.size and t < limit:
+            t += 1
+            eff = t - 1
+            car_v = np.where(eff <= late_frames, min_car + accel * eff,
+                             late_base + late_accel * (eff - late_frames))
+            car_v = np.minimum(car_v, max_car)
+            volume = volumes[idx, np.minimum(eff, last_col)]
+            # float_power 走逐元素 libm pow，与标量 `**` 的结果逐位相同（np.power 的 SIMD 实现可能差 1 ulp）
+            dog_v = dog_min + dog_range * np.float_power(volume, expo)
+            car_x += car_v
+            dog_x += dog_v
+            car_x = np.maximum(0.5, np.minimum(car_hi, car_x))
+            score += car_v * 10
+
+            lose = car_x + margin >= dog_x
+            win = ~lose & (dog_x >= finish)
+            done = lose | win
+            if done.any():
+                gone = idx[done]
+                outcome[gone] = np.where(lose[done], OUTCOME_LOSE, OUTCOME_WIN)
+                ticks[gone] = t
+                final_score[gone] = score[done]
+                final_car[gone] = car_x[done]
+                final_dog[gone] = dog_x[done]
+                keep = ~done
+                idx = idx[keep]
+                car_x, dog_x, score = car_x[keep], dog_x[keep], score[keep]
+                min_car, max_car, accel = min_car[keep], max_car[keep], accel[keep]
+                late_frames, late_accel, late_base = late_frames[keep], late_accel[keep], late_base[keep]
+                dog_min, dog_range, expo = dog_min[keep], dog_range[keep], expo[keep]
+                car_hi, margin, finish = car_hi[keep], margin[keep], finish[keep]
+                last_col = last_col[keep]
+
+        # 超过上限仍未结束的局
+        ticks[idx] = t
+        final_score[idx] = score
+        final_car[idx] = car_x
+        final_dog[idx] = dog_x
+        return {
+            'outcome': outcome, 'ticks': ticks, 'score': final_score,
+            'car_x': final_car, 'dog_x': final_dog,
+        }
+
+    @staticmethod
+    def summarize(result):
+        """胜率与完成时间的简单统计"""
+        outcome = result['outcome']
+        ticks = result['ticks']
+        wins = outcome == OUTCOME_WIN
+        summary = {
+            'games': int(outcome.size),
+            'win_rate': float(wins.mean()) if outcome.size else 0.0,
+            'lose_rate': float((outcome == OUTCOME_LOSE).mean()) if outcome.size else 0.0,
+        }
+        if wins.any():
+            summary['win_ticks_p50'] = float(np.percentile(ticks[wins], 50))
+            summary['win_ticks_p90'] = float(np.percentile(ticks[wins], 90))
+        return summary
+
+
+# 群跑模式中每只狗的状态
+PACK_RUNNING = 0
+PACK_CAUGHT = 1
+PACK_SAFE = 2
+
+
+class PackSimulation:
+    """群跑展示模式：lanes 条赛道同时比赛，每条赛道一辆车追 dogs_per_lane 只 AI 狗
+
+    - 全部实体的状态放在连续的 float32 数组里：x / y / v 的前 lanes * dogs_per_lane 个是狗（按赛道分组），
+      后 lanes 个是车；dog_x、car_x 等是这些数组的切片视图，每步的规则都是整段数组运算；
+    - AI 狗的“音量”是各自频率、相位和偏置的正弦加噪声，按 dog_speed_for 的曲线映射成速度；
+      车速按 car_speed_at 的分段加速，以各赛道自己的开局时间计算；
+    - 一条赛道的狗全部出局或到达终点后，等 restart_delay 个 tick 重新开局，演示一直循环下去。
+    """
+
+    def __init__(self, lanes, dogs_per_lane=4, params=None, seed=0, restart_delay=40):
+        self.params = params or ChaseParams()
+        self.lanes = int(lanes)
+        self.dogs_per_lane = int(dogs_per_lane)
+        self.restart_delay = int(restart_delay)
+        n_dogs = self.lanes * self.dogs_per_lane
+        self.n_dogs = n_dogs
+        n = n_dogs + self.lanes
+        self.x = np.zeros(n, dtype=np.float32)
+        self.y = np.zeros(n, dtype=np.float32)
+        self.v = np.zeros(n, dtype=np.float32)
+        self.state = np.zeros(n_dogs, dtype=np.int8)
+        self.dog_x, self.car_x = self.x[:n_dogs], self.x[n_dogs:]
+        self.dog_v, self.car_v = self.v[:n_dogs], self.v[n_dogs:]
+        # y 为赛道坐标：第 i 条赛道的中心在 i + 0.5，由渲染器换算到画面
+        lane_ids = np.arange(self.lanes, dtype=np.float32)
+        self.y[:n_dogs] = np.repeat(lane_ids, self.dogs_per_lane) + 0.5
+        self.y[n_dogs:] = lane_ids + 0.5
+        self.lane_time = np.zeros(self.lanes, dtype=np.int32)  # 各赛道开局以来的 tick
+        self.lane_wait = np.zeros(self.lanes, dtype=np.int32)  # 结束后距重开还剩的 tick
+
+        rng = np.random.default_rng(seed)
+        self.rng = rng
+        self.freq = rng.uniform(0.02, 0.08, n_dogs).astype(np.float32)
+        self.phase = rng.uniform(0.0, 2.0 * np.pi, n_dogs).astype(np.float32)
+        self.bias = rng.uniform(0.45, 0.95, n_dogs).astype(np.float32)
+        # 同一赛道的狗在起跑线附近错开，避免完全重叠
+        self.start_offset = np.tile(np.linspace(0.0, 0.6, self.dogs_per_lane, dtype=np.float32), self.lanes)
+        self.time = 0
+        self.wins = 0
+        self.losses = 0
+        self.reset_lanes(np.ones(self.lanes, dtype=bool))
+        # 各赛道的开局错开 0–3 秒，画面上不会整齐划一
+        self.lane_wait[:] = rng.integers(0, 120, self.lanes)
+
+    def lane_view(self, array):
+        """把按狗排列的数组看成 (赛道, 每道狗数)"""
+        return array.reshape(self.lanes, self.dogs_per_lane)
+
+    def reset_lanes(self, mask):
+        """把 mask 选中的赛道放回开局状态"""
+        p = self.params
+        dogs = np.repeat(mask, self.dogs_per_lane)
+        self.dog_x[dogs] = p.dog_start_x + self.start_offset[dogs]
+        self.dog_v[dogs] = 0.0
+        self.state[dogs] = PACK_RUNNING
+        self.car_x[mask] = p.car_start_x
+        self.car_v[mask] = 0.0
+        self.lane_time[mask] = 0
+
+    def ai_volumes(self):
+        """每只 AI 狗本 tick 的音量（0..1）"""
+        wave = np.sin(self.phase + self.freq * np.float32(self.time))
+        noise = self.rng.normal(0.0, 0.08, self.n_dogs).astype(np.float32)
+        return np.clip(self.bias + 0.35 * wave + noise, 0.0, 1.0)
+
+    def step(self):
+        """所有赛道推进一个 tick"""
+        p = self.params
+        self.time += 1
+        waiting = self.lane_wait > 0
+        self.lane_wait[waiting] -= 1
+        restart = waiting & (self.lane_wait == 0)
+        if restart.any():
+            self.reset_lanes(restart)
+        active = ~waiting
+        self.lane_time[active] += 1
+
+        # 车速：与 car_speed_at 相同的分段加速（各赛道自己的时间）
+        eff = np.maximum(self.lane_time - 1, 0).astype(np.float32)
+        early = p.min_car_speed + p.car_accel * eff
+        late = (p.min_car_speed + p.car_accel * p.late_game_frames
+                + p.late_car_accel * (eff - p.late_game_frames))
+        car_v = np.minimum(np.where(eff <= p.late_game_frames, early, late), p.max_car_speed)
+        self.car_v[:] = np.where(active, car_v, 0.0)
+
+        # 狗速：音量 → 速度，已出局或到终点的狗停下
+        running = self.state == PACK_RUNNING
+        speed = p.dog_min_speed + (p.dog_max_speed - p.dog_min_speed) * self.ai_volumes() ** p.dog_speed_exponent
+        self.dog_v[:] = np.where(running & np.repeat(active, self.dogs_per_lane), speed, 0.0)
+
+        # 全部实体一次前进，车限制在赛道内
+        self.x += self.v
+        np.minimum(self.car_x, p.game_width - 0.5, out=self.car_x)
+
+        # 追上优先于到达终点（同 ChaseSimulation）；每条赛道只和自己的车比较
+        lane_running = self.lane_view(running)
+        caught = lane_running & (self.car_x[:, None] + p.catch_margin >= self.lane_view(self.dog_x))
+        safe = lane_running & ~caught & (self.lane_view(self.dog_x) >= p.finish_x)
+        states = self.lane_view(self.state)
+        states[caught] = PACK_CAUGHT
+        states[safe] = PACK_SAFE
+
+        # 整条赛道分出结果：记一次胜负，等待重开
+        done = active & (states != PACK_RUNNING).all(axis=1)
+        if done.any():
+            won = (states[done] == PACK_SAFE).any(axis=1)
+            self.wins += int(won.sum())
+            self.losses += int((~won).sum())
+            self.lane_wait[done] = self.restart_delay
@@ -0,0 +1,57 @@
+"""固定步长时间累加器
+
+模拟核心按固定的 tick（25 ms）推进，渲染帧率则随机器快慢变化。每帧把真实流逝的时间
+累加起来，够几个 tick 就推进几步；剩余不足一个 tick 的部分用于插值绘制位置。
+机器再慢也只是掉帧，游戏本身不会变成慢动作。
+"""
+import time
+
+
+class FixedStepClock:
+    """把墙钟时间换算成模拟步数
+
+    - advance() 返回本帧应推进的 tick 数（最多 max_steps，超出的积压直接丢弃，避免越追越慢）
+    - alpha 为剩余时间占一个 tick 的比例，用于在上一步与当前步之间插值
+    """
+
+    def __init__(self, dt, max_steps=5, timer=time.perf_counter):
+        self.dt = float(dt)
+        self.max_steps = int(max_steps)
+        self.timer = timer
+        self.reset()
+
+    def reset(self):
+        self.last = None
+        self.accumulator = 0.0
+        self.steps = 0
+        self.ticks = 0
+        self.dropped_steps = 0
+
+    def advance(self, now=None):
+        """计入自上次调用以来的真实时间，返回本帧应推进的步数"""
+        now = self.timer() if now is None else now
+        if self.last is None:
+            # 首帧直接推进一步，之后按真实时间计
+            self.accumulator = self.dt
+        else:
+            self.accumulator += max(0.0, now - self.last)
+        self.last = now
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            self.accumulator -= (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        self.steps = steps
+        self.ticks += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """插值系数 0..1"""
+        return min(max(self.accumulator / self.dt, 0.0), 1.0)
+
+    @property
+    def behind(self):
+        """本帧需要补不止一步：渲染跟不上 tick 速率"""
+        return self.steps > 1
@@ -0,0 +1,123 @@
+"""逐阶段帧耗时统计
+
+每帧用单调时钟（perf_counter）给各阶段计时，写入滚动直方图：
+- 最近 window 帧的样本环形缓冲区 → 实时 p50 / p95 / p99；
+- 整局的对数分桶计数 → 结束时的汇总（近似分位数、均值、最大值）。
+"""
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class RollingHistogram:
+    """单个阶段的耗时分布（毫秒）"""
+
+    def __init__(self, window=240, edges=None):
+        self.samples = np.zeros(int(window), dtype=np.float64)
+        self.index = 0
+        self.filled = 0
+        # 0.01 ms ~ 1000 ms 对数分桶，覆盖从微秒级计算到整帧卡顿
+        self.edges = np.geomspace(0.01, 1000.0, 61) if edges is None else np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples[self.index] = ms
+        self.index = (self.index + 1) % len(self.samples)
+        if self.filled < len(self.samples):
+            self.filled += 1
+        self.counts[np.searchsorted(self.edges, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def recent_percentiles(self, qs=(50, 95, 99)):
+        """最近 window 帧的分位数"""
+        if self.filled == 0:
+            return [0.0 for _ in qs]
+        return [float(v) for v in np.percentile(self.samples[:self.filled], qs)]
+
+    def session_percentiles(self, qs=(50, 95, 99)):
+        """整局的近似分位数（取所在分桶的上边界）"""
+        if self.count == 0:
+            return [0.0 for _ in qs]
+        cumulative = np.cumsum(self.counts)
+        upper = np.append(self.edges, self.max)
+        result = []
+        for q in qs:
+            bucket = int(np.searchsorted(cumulative, q / 100.0 * self.count))
+            result.append(float(min(upper[min(bucket, len(upper) - 1)], self.max)))
+        return result
+
+    def summary(self):
+        p50, p95, p99 = self.session_percentiles()
+        r50, r95, r99 = self.recent_percentiles()
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'max_ms': self.max,
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'recent_p50_ms': r50, 'recent_p95_ms': r95, 'recent_p99_ms': r99,
+        }
+
+
+class FrameProfiler:
+    """按阶段名计时；enabled=False 时 section 几乎没有开销"""
+
+    def __init__(self, phases=(), window=240, enabled=True):
+        self.enabled = enabled
+        self.window = window
+        self.phases = {}
+        for name in phases:
+            self.phases[name] = RollingHistogram(window)
+        self.frames = 0
+        self.counters = {}  # 额外计数（如丢弃的模拟步、跳过的绘制），随汇总一起输出
+
+    def record(self, name, seconds):
+        hist = self.phases.get(name)
+        if hist is None:
+            hist = self.phases[name] = RollingHistogram(self.window)
+        hist.add(seconds * 1000.0)
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def hud_lines(self, labels=None):
+        """HUD 文本：每个阶段一行 p50/p95/p99（毫秒）；labels 可把阶段名换成简短标签"""
+        labels = labels or {}
+        lines = ['PERF ms   p50   p95   p99']
+        for name, hist in self.phases.items():
+            if hist.filled == 0:
+                continue
+            p50, p95, p99 = hist.recent_percentiles()
+            label = labels.get(name, name)[:8]
+            lines.append(f"{label:<8}{p50:6.2f}{p95:6.2f}{p99:6.2f}")
+        return lines
+
+    def summary(self):
+        return {
+            'frames': self.frames,
+            'counters': dict(self.counters),
+            'phases': {name: hist.summary() for name, hist in self.phases.items()},
+        }
+
+    def dump_json(self, path=None):
+        """输出 JSON 汇总：给出 path 时写文件，否则返回字符串"""
+        text = json.dumps(self.summary(), indent=2, ensure_ascii=False)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,160 @@
+"""响度估计器（可插拔）
+
+把每帧的原始 RMS 平滑成控制用的响度值。所有估计器：
+- 每帧 O(1)，update 不分配新数组：多声道的状态保存在预分配的 NumPy 数组里，
+  单声道的滑动平均直接用 Python float 与 list（不产生临时 NumPy 标量）；
+- 通过 lag_ms 报告自身引入的控制延迟，便于按延迟预算挑选参数；
+- channels > 1 时同时平滑多个声道（多人模式），update 输入/输出长度为 channels 的数组，
+  单声道时输入/输出仍为标量，运算与单声道完全相同。
+"""
+import math
+
+import numpy as np
+
+
+class MovingAverageLoudness:
+    """滑动平均（累加和实现），与原来 20 帧 volume_history 取均值的结果一致
+
+    初始历史全为 0，与旧实现相同。群延迟为 (N - 1) / 2 帧。
+    """
+
+    def __init__(self, window=20, frame_ms=25.0, channels=1):
+        self.window = int(window)
+        self.frame_ms = float(frame_ms)
+        self.channels = int(channels)
+        # 单声道：历史为 list、累加和为 float；多声道：(window, channels) 数组与按声道的累加和数组
+        if self.channels == 1:
+            self.history = [0.0] * self.window
+            self.state = 0.0
+        else:
+            self.history = np.zeros((self.window, self.channels), dtype=np.float64)
+            self.state = np.zeros(self.channels, dtype=np.float64)
+        self._out = np.zeros(self.channels, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+
+    @classmethod
+    def from_latency_budget(cls, budget_ms, frame_ms=25.0, channels=1):
+        """按延迟预算选窗口：群延迟 (N-1)/2 帧不超过 budget_ms"""
+        window = max(1, int(2 * budget_ms / frame_ms) + 1)
+        return cls(window, frame_ms, channels)
+
+    def update(self, value):
+        """输入一帧 RMS（多声道时为数组），返回平滑后的值"""
+        i = self.index
+        history = self.history
+        if self.channels == 1:
+            value = float(value)
+            self.state += value - history[i]
+            history[i] = value
+        else:
+            row = history[i]
+            self.state += value
+            self.state -= row
+            row[:] = value
+        self.index = (i + 1) % self.window
+        self.count += 1
+        # 每绕一圈重新求和一次，消除浮点累积误差（均摊仍是 O(1)）
+        if self.index == 0:
+            if self.channels == 1:
+                self.state = math.fsum(history)
+            else:
+                history.sum(axis=0, out=self.state)
+        return self.value
+
+    @property
+    def value(self):
+        """单声道为 float；多声道为复用的数组（下一次 update 会覆盖）"""
+        if self.channels == 1:
+            return self.state / self.window
+        return np.divide(self.state, self.window, out=self._out)
+
+    @property
+    def lag_ms(self):
+        """群延迟（毫秒）"""
+        return (self.window - 1) / 2.0 * self.frame_ms
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+        if self.channels == 1:
+            self.history = [0.0] * self.window
+            self.state = 0.0
+            return
+        self.history.fill(0.0)
+        self.state.fill(0.0)
+
+
+class EnvelopeFollower:
+    """起音/释音指数包络跟随器：声音变大时快速跟上，变小时缓慢回落
+
+    系数 a = 1 - exp(-frame_ms / tau)。控制延迟按起音时间常数报告
+    （阶跃输入约 tau 毫秒后到达 63%）。
+    """
+
+    def __init__(self, attack_ms=50.0, release_ms=250.0, frame_ms=25.0, channels=1):
+        self.frame_ms = float(frame_ms)
+        self.channels = int(channels)
+        self.attack_ms = float(attack_ms)
+        self.release_ms = float(release_ms)
+        self.attack = 1.0 - math.exp(-self.frame_ms / max(self.attack_ms, 1e-6))
+        self.release = 1.0 - math.exp(-self.frame_ms / max(self.release_ms, 1e-6))
+        self.state = np.zeros(self.channels, dtype=np.float64)
+        self._coeff = np.zeros(self.channels, dtype=np.float64)
+        self._mask = np.zeros(self.channels, dtype=bool)
+        self._tmp = np.zeros(self.channels, dtype=np.float64)
+
+    @classmethod
+    def from_latency_budget(cls, budget_ms, frame_ms=25.0, release_ratio=5.0, channels=1):
+        """起音时间常数取延迟预算，释音为其 release_ratio 倍"""
+        return cls(budget_ms, budget_ms * release_ratio, frame_ms, channels)
+
+    def update(self, value):
+        """输入一帧 RMS（多声道时为数组），返回包络值"""
+        if self.channels == 1:
+            y = self.state[0]
+            coeff = self.attack if value > y else self.release
+            self.state[0] = y + coeff * (value - y)
+            return float(self.state[0])
+        y = self.state
+        coeff = self._coeff
+        np.greater(value, y, out=self._mask)
+        np.copyto(coeff, self.release)
+        np.copyto(coeff, self.attack, where=self._mask)
+        np.subtract(value, y, out=self._tmp)
+        np.multiply(coeff, self._tmp, out=self._tmp)
+        y += self._tmp
+        return y
+
+    @property
+    def value(self):
+        """单声道为 float；多声道为状态数组本身"""
+        if self.channels == 1:
+            return float(self.state[0])
+        return self.state
+
+    @property
+    def lag_ms(self):
+        """起音时间常数（毫秒）"""
+        return self.attack_ms
+
+    def reset(self):
+        self.state.fill(0.0)
+
+
+LOUDNESS_ESTIMATORS = {
+    'moving_average': MovingAverageLoudness,
+    'envelope': EnvelopeFollower,
+}
+
+
+def make_loudness_estimator(mode='moving_average', frame_ms=25.0, window=20, latency_budget_ms=None, channels=1):
+    """按名称创建估计器；给出 latency_budget_ms 时按预算推导参数"""
+    if mode not in LOUDNESS_ESTIMATORS:
+        raise ValueError(f"未知的响度估计器: {mode}（可选: {', '.join(LOUDNESS_ESTIMATORS)}）")
+    cls = LOUDNESS_ESTIMATORS[mode]
+    if latency_budget_ms is not None:
+        return cls.from_latency_budget(latency_budget_ms, frame_ms, channels=channels)
+    if cls is MovingAverageLoudness:
+        return cls(window, frame_ms, channels)
+    return cls(frame_ms=frame_ms, channels=channels)
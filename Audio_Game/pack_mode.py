@@ -0,0 +1,220 @@
+"""群跑展示模式（attract mode）：数百只 AI 狗和车同时比赛
+
+    python Audio_Game/pack_mode.py --runners 500            # 打开窗口循环演示
+    python Audio_Game/pack_mode.py --runners 500 --bench 400  # 无窗口（Agg）测每帧耗时
+
+- 状态在 PackSimulation（dog_run_sim.py）的 float32 数组里，每个 tick 一次整段数组运算；
+- 画面是一块 uint8 帧缓冲：静态赛道只合成一次，每帧整块拷贝后按精灵种类批量贴图
+  （每种姿势一次花式索引赋值，与实体数量无关的 Python 调用次数），再交给 FramebufferImage 显示；
+- blit 模式下每帧只重画帧缓冲图像和状态文字。不需要麦克风。
+"""
+import argparse
+import os
+import sys
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import to_rgb
+
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GAME_DIR not in sys.path:
+    sys.path.insert(0, _GAME_DIR)
+
+from dog_run_sim import PACK_CAUGHT, PACK_RUNNING, PACK_SAFE, ChaseParams, PackSimulation
+from pixel_blit import BlitRenderer
+from pixel_framebuffer import FramebufferImage, Stamp, resample, to_uint8
+from pixel_sprites import get_sprite_atlas
+
+# 与 PixelCarChaseDogGame.pixel_colors 相同的调色板（图集按调色板缓存，两边共用）
+PALETTE = {
+    'sky': '#87CEEB', 'ground': '#228B22', 'track': '#404040', 'car_red': '#FF0000', 'car_blue': '#0000FF',
+    'dog_brown': '#8B4513', 'dog_gold': '#FFD700', 'white': '#FFFFFF', 'black': '#000000', 'yellow': '#FFFF00',
+}
+# 狗的状态 → 姿势：奔跑中平静、被追上惊慌（红眼）、安全到达回到开局姿势
+POSE_BY_STATE = {PACK_RUNNING: 'calm', PACK_CAUGHT: 'alert', PACK_SAFE: 'start'}
+
+
+class BatchStamp:
+    """一次贴 N 个相同的精灵：预先取出不透明像素的行列偏移和颜色（uint32），贴图时一次花式索引赋值"""
+
+    def __init__(self, rgba):
+        stamp = Stamp(rgba)
+        self.h, self.w = stamp.h, stamp.w
+        self.dr, self.dc = np.nonzero(stamp.mask)
+        self.colors = np.ascontiguousarray(stamp.rgba).view(np.uint32)[..., 0][self.dr, self.dc]
+
+    def draw(self, pixels, rows, cols):
+        """把精灵中心贴到像素 (rows[i], cols[i])；pixels 为 (H, W) uint32 视图，越界部分裁掉"""
+        if len(rows) == 0:
+            return
+        r = (rows - self.h // 2)[:, None] + self.dr
+        c = (cols - self.w // 2)[:, None] + self.dc
+        inside = (r >= 0) & (r < pixels.shape[0]) & (c >= 0) & (c < pixels.shape[1])
+        pixels[r[inside], c[inside]] = np.broadcast_to(self.colors, r.shape)[inside]
+
+
+class PackRenderer:
+    """群跑画面：静态赛道 + 按状态分组批量贴上的车和狗"""
+
+    def __init__(self, ax, sim, width, height, ppu=100):
+        self.sim = sim
+        self.ppu = ppu
+        self.width = int(round(width * ppu))
+        self.height = int(round(height * ppu))
+        self.lane_px = self.height / sim.lanes
+        self.frame = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        self.pixels = self.frame.view(np.uint32)[..., 0]
+        self.static = self.render_static()
+
+        # 精灵按赛道高度缩放：占一条赛道高度的 90%
+        atlas = get_sprite_atlas(PALETTE)
+        lane = height / sim.lanes
+        car = atlas.get('car')
+        self.car = BatchStamp(resample(car, 0.9 * lane / car.shape[0], ppu))
+        self.dogs = {}
+        for state, pose in POSE_BY_STATE.items():
+            dog = atlas.get(f'dog/{pose}')
+            self.dogs[state] = BatchStamp(resample(dog, 0.9 * lane / dog.shape[0], ppu))
+
+        self.image = FramebufferImage(ax, origin='upper', interpolation='nearest',
+                                      extent=(0, width, 0, height), zorder=0)
+        self.image.set_frame(self.frame)
+        ax.add_image(self.image)
+
+    def render_static(self):
+        """赛道：深浅交替的车道、起跑线与棋盘格终点线"""
+        p = self.sim.params
+        ppu = self.ppu
+        frame = np.empty_like(self.frame)
+        lane_of_row = (np.arange(self.height) / self.lane_px).astype(int)
+        dark, light = to_uint8(to_rgb('#404040')), to_uint8(to_rgb('#505050'))
+        frame[:] = np.where((lane_of_row % 2 == 0)[:, None, None], dark, light)
+        start = int(round(p.dog_start_x * ppu))
+        frame[:, start - 1:start + 1] = to_uint8(to_rgb('white'))
+        finish = int(round(p.finish_x * ppu))
+        square = max(2, int(round(self.lane_px / 2)))
+        checker = (np.arange(self.height) // square) % 2 == 0
+        black, white = to_uint8(to_rgb('black')), to_uint8(to_rgb('white'))
+        for i, col in enumerate(range(finish, finish + 2 * square, square)):
+            rows = checker if i % 2 == 0 else ~checker
+            frame[:, col:col + square] = np.where(rows[:, None, None], black, white)
+        return frame
+
+    def render(self):
+        """按当前状态合成一帧：一次整块拷贝 + 每种精灵一次批量贴图"""
+        sim = self.sim
+        np.copyto(self.frame, self.static)
+        cols = (sim.x * self.ppu).astype(np.intp)
+        rows = (self.height - sim.y * self.lane_px).astype(np.intp)
+        n = sim.n_dogs
+        self.car.draw(self.pixels, rows[n:], cols[n:])
+        for state, stamp in self.dogs.items():
+            mine = sim.state == state
+            stamp.draw(self.pixels, rows[:n][mine], cols[:n][mine])
+        self.image.set_frame(self.frame)
+        return self.image
+
+
+class PackShowcase:
+    """群跑演示窗口：定时器驱动，每帧推进一个 tick 并 blit 重画"""
+
+    GAME_WIDTH = 12
+    GAME_HEIGHT = 8
+
+    def __init__(self, runners=500, dogs_per_lane=4, seed=0, ppu=100):
+        lanes = max(1, runners // (dogs_per_lane + 1))
+        params = ChaseParams(game_width=self.GAME_WIDTH, finish_x=self.GAME_WIDTH - 1.0)
+        self.sim = PackSimulation(lanes, dogs_per_lane, params, seed=seed)
+        self.frame_interval_ms = 25
+
+        self.fig, self.ax = plt.subplots(1, 1, figsize=(16, 9))
+        self.ax.set_xlim(0, self.GAME_WIDTH)
+        self.ax.set_ylim(0, self.GAME_HEIGHT)
+        self.ax.set_aspect('equal')
+        self.ax.axis('off')
+        self.ax.set_title('Dog Run Run Run — PACK MODE', fontsize=24, fontweight='bold',
+                          color='white', pad=20, family='monospace')
+        self.fig.patch.set_facecolor('#000033')
+
+        self.renderer = PackRenderer(self.ax, self.sim, self.GAME_WIDTH, self.GAME_HEIGHT, ppu)
+        self.renderer.render()
+        self.status = self.ax.text(
+            0.15, self.GAME_HEIGHT - 0.15, '', fontsize=10, fontweight='bold', color='lime',
+            family='monospace', va='top', zorder=5,
+            bbox=dict(boxstyle='square,pad=0.3', facecolor='black', edgecolor='white', linewidth=1)
+        )
+        self.blitter = BlitRenderer(self.fig)
+        self.blitter.add_artists([self.renderer.image, self.status])
+        self.frame_times = []
+        self._last = None
+        self.timer = None
+        plt.tight_layout()
+
+    def update(self):
+        """推进一个 tick 并合成画面，返回需要重画的 artist"""
+        now = time.perf_counter()
+        if self._last is not None:
+            self.frame_times.append(now - self._last)
+        self._last = now
+        sim = self.sim
+        sim.step()
+        self.renderer.render()
+        if sim.time % 10 == 1:
+            recent = self.frame_times[-40:]
+            del self.frame_times[:-40]
+            fps = len(recent) / sum(recent) if recent else 0.0
+            self.status.set_text(
+                f"{sim.n_dogs} DOGS  {sim.lanes} CARS\n"
+                f"SAFE LANES: {sim.wins}  LOST: {sim.losses}\n"
+                f"FPS: {fps:.0f}"
+            )
+        return [self.renderer.image, self.status]
+
+    def frame(self):
+        self.blitter.update(self.update())
+
+    def run(self):
+        self.timer = self.fig.canvas.new_timer(interval=self.frame_interval_ms)
+        self.timer.add_callback(self.frame)
+        self.timer.start()
+        try:
+            plt.show()
+        finally:
+            self.timer.stop()
+            self.blitter.disconnect()
+
+
+def bench(runners, dogs_per_lane, frames, seed=0):
+    """无窗口跑 frames 帧（推进 + 合成 + blit 到 Agg 缓冲区），返回每帧耗时（毫秒）"""
+    show = PackShowcase(runners, dogs_per_lane, seed)
+    show.fig.set_dpi(100)
+    show.fig.canvas.draw()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        show.blitter.update(show.update())
+        times.append((time.perf_counter() - start) * 1000.0)
+    plt.close(show.fig)
+    return np.array(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pixel Dog Run pack mode: hundreds of AI dogs and cars')
+    parser.add_argument('--runners', type=int, default=500, help='Total dogs and cars (default 500)')
+    parser.add_argument('--dogs-per-lane', type=int, default=4, help='Dogs chased by each car (default 4)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', type=int, metavar='FRAMES', help='Run FRAMES frames offscreen and print timings')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        plt.switch_backend('Agg')
+        times = bench(args.runners, args.dogs_per_lane, args.bench, args.seed)
+        print(f"{args.runners} runners: mean {times.mean():.1f} ms  p50 {np.percentile(times, 50):.1f} ms  "
+              f"p95 {np.percentile(times, 95):.1f} ms  ({1000.0 / times.mean():.0f} fps)")
+        return
+    PackShowcase(args.runners, args.dogs_per_lane, args.seed).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""像素背景合成器
+
+把天空、草地、赛道条纹、中心虚线和棋盘格终点线一次性栅格化成一张 RGBA 数组，
+再用一个 imshow 图像显示，绘制开销不再随像素格子数量增长。
+长关卡按列分块时，每个图块各用一个带列偏移（col_offset）的合成器绘制，图案按全局列号计算，块与块无缝衔接。
+"""
+import numpy as np
+from matplotlib.colors import to_rgba
+
+
+def _over(dst, src_rgb, src_alpha, mask):
+    """在 mask 覆盖的格子上做 Porter-Duff "over" 合成（与 Matplotlib 叠加 patch 的结果一致）"""
+    a_s = src_alpha
+    a_d = dst[..., 3][mask]
+    out_a = a_s + a_d * (1.0 - a_s)
+    safe = np.where(out_a > 0, out_a, 1.0)
+    rgb = (np.asarray(src_rgb, dtype=np.float32) * a_s
+           + dst[..., :3][mask] * (a_d * (1.0 - a_s))[:, None]) / safe[:, None]
+    dst[..., :3][mask] = rgb
+    dst[..., 3][mask] = out_a
+
+
+class PixelBackgroundCompositor:
+    """按像素格子（PIXEL_SIZE）栅格化的静态背景层
+
+    数组的一个元素对应游戏里的一个像素块，imshow 用最近邻插值放大，外观与逐块 Rectangle 相同。
+    中心虚线的闪烁只有 4 种相位，预先合成 4 条虚线条带，运行时只切换条带数据。
+    """
+
+    DASH_PHASES = 4
+
+    def __init__(self, width, height, pixel_size, col_offset=0):
+        self.width = width
+        self.height = height
+        self.pixel_size = pixel_size
+        self.cols = int(width / pixel_size)
+        self.rows = int(height / pixel_size)
+        # 第 0 列对应的全局格子列：下面各方法的列参数都是全局列号
+        self.col_offset = col_offset
+        # 行 0 对应最底部（imshow 使用 origin='lower'）
+        self.base = np.zeros((self.rows, self.cols, 4), dtype=np.float32)
+        self.dash_cells = []  # [(col, row), ...]，按原 center_pixels 的顺序（本地列号）
+        self.dash_index = np.zeros(0, dtype=int)  # 每个虚线格子在整条虚线中的序号（决定闪烁相位）
+        self.dash_color = None
+        self._frames = None
+        self.image = None
+        self.dash_image = None
+        self.dash_phase = None
+        self._yy, self._xx = np.mgrid[0:self.rows, col_offset:col_offset + self.cols]
+
+    def cell(self, value):
+        """世界坐标 → 格子下标"""
+        return int(round(value / self.pixel_size))
+
+    def fill(self, mask, color, alpha=1.0):
+        """按布尔 mask 填充颜色"""
+        rgba = to_rgba(color)
+        _over(self.base, rgba[:3], alpha * rgba[3], mask)
+
+    def fill_rect(self, col0, row0, col1, row1, color):
+        """填充 [col0, col1) × [row0, row1) 的格子"""
+        col0, col1 = col0 - self.col_offset, col1 - self.col_offset
+        mask = np.zeros((self.rows, self.cols), dtype=bool)
+        mask[max(row0, 0):max(row1, 0), max(col0, 0):max(col1, 0)] = True
+        self.fill(mask, color)
+
+    def paint_sky_and_grass(self, sky_row_start, grass_rows):
+        """天空三色横条 + 草地双色棋盘"""
+        yy, xx = self._yy, self._xx
+        sky = yy >= sky_row_start
+        for rem, color in ((0, '#4169E1'), (1, '#6495ED'), (2, '#87CEEB')):
+            self.fill(sky & (yy % 3 == rem), color)
+        grass = yy < grass_rows
+        self.fill(grass & ((xx + yy) % 2 == 0), '#228B22')
+        self.fill(grass & ((xx + yy) % 2 == 1), '#32CD32')
+
+    def paint_track(self, col_start, col_end, row_start, row_end):
+        """赛道：上下金色边线 + 三种灰度的斜纹"""
+        yy, xx = self._yy, self._xx
+        track = (xx >= col_start) & (xx < col_end) & (yy >= row_start) & (yy < row_end)
+        edge = track & ((yy == row_start) | (yy == row_end - 1))
+        inner = track & ~edge
+        stripe = (xx + yy) % 4
+        self.fill(edge, '#FFD700')
+        self.fill(inner & (stripe == 0), '#404040')
+        self.fill(inner & (stripe == 2), '#505050')
+        self.fill(inner & ((stripe == 1) | (stripe == 3)), '#606060')
+
+    def set_center_dashes(self, cells, color='#FFFF00', first_index=0):
+        """登记中心虚线格子；其透明度由相位决定，单独合成为虚线条带
+
+        cells 只是整条虚线的一段时，first_index 为 cells[0] 在整条虚线中的序号。
+        """
+        lo = self.col_offset
+        keep = [(first_index + i, c - lo, r) for i, (c, r) in enumerate(cells)
+                if lo <= c < lo + self.cols and 0 <= r < self.rows]
+        self.dash_cells = [(c, r) for _, c, r in keep]
+        self.dash_index = np.array([i for i, _, _ in keep], dtype=int)
+        self.dash_color = color
+        self._frames = None
+
+    def paint_checker_column(self, col, row_start, row_count, first='#000000', second='#FFFFFF'):
+        """两列宽的棋盘格（终点线）"""
+        rows = np.arange(row_start, row_start + row_count)
+        rows = rows[(rows >= 0) & (rows < self.rows)]
+        even = (rows - row_start) % 2 == 0
+        col -= self.col_offset
+        for c, (a, b) in ((col, (first, second)), (col + 1, (second, first))):
+            if not 0 <= c < self.cols:
+                continue
+            for color, sel in ((a, even), (b, ~even)):
+                mask = np.zeros((self.rows, self.cols), dtype=bool)
+                mask[rows[sel], c] = True
+                self.fill(mask, color)
+
+    def paint_pattern(self, rgba, col, row):
+        """把图集图案（行 0 在上、格子全透明或不透明）贴到左下角为 (col, row) 的格子上"""
+        src = rgba[::-1]
+        h, w = src.shape[:2]
+        c0, r0 = col - self.col_offset, row
+        cr0, cc0 = max(r0, 0), max(c0, 0)
+        cr1, cc1 = min(r0 + h, self.rows), min(c0 + w, self.cols)
+        if cr0 >= cr1 or cc0 >= cc1:
+            return
+        src = src[cr0 - r0:cr1 - r0, cc0 - c0:cc1 - c0]
+        region = self.base[cr0:cr1, cc0:cc1]
+        opaque = src[..., 3] >= 0.5
+        region[opaque] = src[opaque]
+
+    def dash_alphas(self, phase):
+        """与原 update_dynamic_effects 相同的虚线透明度规则"""
+        idx = self.dash_index
+        return np.where((idx + phase) % 8 < 4, 1.0, 0.3)
+
+    @property
+    def dash_rows(self):
+        """虚线所在的行范围 [row0, row1)"""
+        if not self.dash_cells:
+            return 0, 0
+        rows = [r for _, r in self.dash_cells]
+        return min(rows), max(rows) + 1
+
+    @property
+    def frames(self):
+        """4 个虚线相位各自的虚线条带 RGBA（懒合成并缓存）
+
+        虚线是独立的一条细图层：静态背景可以整体缓存成位图，每帧只需重画这一条。
+        """
+        if self._frames is None:
+            frames = []
+            row0, row1 = self.dash_rows
+            rgba = to_rgba(self.dash_color or '#FFFF00')
+            cells = np.array(self.dash_cells, dtype=int).reshape(-1, 2)
+            for phase in range(self.DASH_PHASES):
+                strip = np.zeros((row1 - row0, self.cols, 4), dtype=np.float32)
+                alphas = self.dash_alphas(phase)
+                for alpha in np.unique(alphas):
+                    sel = cells[alphas == alpha]
+                    mask = np.zeros(strip.shape[:2], dtype=bool)
+                    mask[sel[:, 1] - row0, sel[:, 0]] = True
+                    _over(strip, rgba[:3], alpha * rgba[3], mask)
+                frames.append(strip)
+            self._frames = frames
+        return self._frames
+
+    def opaque_frames(self, face):
+        """各虚线相位一份：底图与虚线条带叠在底色 face 上，转成不透明 uint8 RGBA（行 0 在上）"""
+        face = np.asarray(to_rgba(face)[:3], dtype=np.float32)
+        alpha = self.base[..., 3:]
+        base = self.base[..., :3] * alpha + face * (1.0 - alpha)
+        row0, row1 = self.dash_rows
+        out = np.empty((self.DASH_PHASES, self.rows, self.cols, 4), dtype=np.uint8)
+        out[..., 3] = 255
+        for phase in range(self.DASH_PHASES):
+            rgb = base
+            if self.dash_cells:
+                rgb = base.copy()
+                strip = self.frames[phase]
+                a = strip[..., 3:]
+                rgb[row0:row1] = strip[..., :3] * a + rgb[row0:row1] * (1.0 - a)
+            out[phase, ..., :3] = np.clip(rgb[::-1], 0.0, 1.0) * 255.0 + 0.5
+        return out
+
+    def attach(self, ax, zorder=0):
+        """以两个 imshow 图像显示背景：静态底图 + 虚线条带（最近邻插值保持像素风）"""
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        size = self.pixel_size
+        self.image = ax.imshow(
+            self.base, origin='lower', interpolation='nearest',
+            extent=(0, self.cols * size, 0, self.rows * size),
+            zorder=zorder, aspect='equal'
+        )
+        self.dash_image = None
+        if self.dash_cells:
+            row0, row1 = self.dash_rows
+            self.dash_phase = 0
+            self.dash_image = ax.imshow(
+                self.frames[0], origin='lower', interpolation='nearest',
+                extent=(0, self.cols * size, row0 * size, row1 * size),
+                zorder=zorder, aspect='equal'
+            )
+        # imshow 会按图像范围自动缩放，恢复原坐标范围
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        return self.image
+
+    def set_dash_phase(self, phase):
+        """切换虚线相位；相位不变时不做任何事"""
+        phase %= self.DASH_PHASES
+        if self.dash_image is None or phase == self.dash_phase:
+            return False
+        self.dash_image.set_data(self.frames[phase])
+        self.dash_phase = phase
+        return True
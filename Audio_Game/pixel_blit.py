@@ -0,0 +1,68 @@
+"""Blit 渲染：把静态场景缓存成位图，每帧只重画动态（脏）artist
+
+流程与 Matplotlib 官方 blitting 教程一致：
+- 任何一次完整绘制（首帧、窗口缩放、invalidate）都会触发 draw_event，此时抓取背景位图；
+- 之后每帧 restore_region 恢复背景，再按 zorder 逐个 draw_artist 动态对象，最后 blit 到屏幕。
+动态对象需设置 animated=True，完整绘制时才不会被画进背景位图。
+"""
+
+
+class BlitRenderer:
+    """缓存背景位图并按帧重画动态 artist"""
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.background = None
+        self.animated = []
+        self.full_draws = 0
+        self._cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add_artists(self, artists):
+        """登记动态 artist（会被标记为 animated，不进入背景位图）"""
+        for artist in artists:
+            if artist is None or artist in self.animated:
+                continue
+            artist.set_animated(True)
+            self.animated.append(artist)
+
+    def remove_artists(self, artists):
+        """取消登记（artist 之后会重新画进背景位图）"""
+        for artist in artists:
+            if artist in self.animated:
+                self.animated.remove(artist)
+                artist.set_animated(False)
+
+    def on_draw(self, event):
+        """完整绘制后抓取背景（首帧、缩放、invalidate 都会经过这里）"""
+        if event is not None and event.canvas is not self.canvas:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.full_draws += 1
+        self._draw_animated(self.animated)
+
+    def invalidate(self):
+        """静态场景发生变化（如游戏结束叠加层），下一次空闲时完整重绘并重新抓取背景"""
+        self.background = None
+        self.canvas.draw_idle()
+
+    def _draw_animated(self, artists):
+        """按 zorder 从低到高重画（同层保持给定顺序），调用方不必自己排序"""
+        for artist in sorted(artists, key=lambda a: a.get_zorder()):
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def update(self, dirty):
+        """用缓存背景 + 脏 artist 刷新一帧；背景尚未就绪时等待下一次完整绘制"""
+        if self.background is None:
+            return False
+        self.canvas.restore_region(self.background)
+        self._draw_animated(dirty)
+        self.canvas.blit(self.fig.bbox)
+        return True
+
+    def disconnect(self):
+        try:
+            self.canvas.mpl_disconnect(self._cid)
+        except Exception:
+            pass
@@ -208,12 +208,14 @@ class FaceAvatarCarChaseGame(PixelCarChaseDogGame):
                 # 简单的像素边框
                 border_color = '#FFFFFF'
                 border_size = 0.06
+                border = []
                 for dx in np.arange(0, w_units + border_size, border_size):
-                    self.create_pixel_block(x0 + dx, y0, border_size, border_color)
-                    self.create_pixel_block(x0 + dx, y0 + h_units - border_size, border_size, border_color)
+                    border.append(self.create_pixel_block(x0 + dx, y0, border_size, border_color))
+                    border.append(self.create_pixel_block(x0 + dx, y0 + h_units - border_size, border_size, border_color))
                 for dy in np.arange(0, h_units + border_size, border_size):
-                    self.create_pixel_block(x0, y0 + dy, border_size, border_color)
-                    self.create_pixel_block(x0 + w_units - border_size, y0 + dy, border_size, border_color)
+                    border.append(self.create_pixel_block(x0, y0 + dy, border_size, border_color))
+                    border.append(self.create_pixel_block(x0 + w_units - border_size, y0 + dy, border_size, border_color))
+                self.register_overlays([self.avatar_artist] + border)
         except Exception as e:
             print(f"绘制头像失败: {e}")
 
@@ -0,0 +1,71 @@
+"""像素特效池
+
+危险闪烁边框、失败爆炸、胜利烟花和奖杯都在开局时预先创建并隐藏，
+运行时只切换可见性和位置，整局游戏中 artist 数量保持不变。
+"""
+import numpy as np
+from matplotlib.colors import to_rgba
+
+from pixel_sprites import PixelSprite
+
+
+class EffectPool:
+    """固定容量的像素精灵池：取出时显示并定位，归还时隐藏"""
+
+    def __init__(self, ax, atlas, name, cell_size, capacity, zorder=2):
+        self.sprites = [PixelSprite(ax, atlas, name, cell_size, zorder=zorder)
+                        for _ in range(capacity)]
+        self.active = 0
+        for sprite in self.sprites:
+            sprite.set_visible(False)
+
+    def spawn(self, x, y):
+        """在左下角 (x, y) 显示一个特效；池用尽时返回 None（不再新建 artist）"""
+        if self.active >= len(self.sprites):
+            return None
+        sprite = self.sprites[self.active]
+        self.active += 1
+        sprite.place(x, y)
+        sprite.set_visible(True)
+        return sprite
+
+    def release_all(self):
+        """全部归还（隐藏）"""
+        for sprite in self.sprites[:self.active]:
+            sprite.set_visible(False)
+        self.active = 0
+
+    @property
+    def artists(self):
+        return [sprite.image for sprite in self.sprites]
+
+
+class DangerBorder:
+    """红色危险边框：预先栅格化为一张图像，只切换开/关"""
+
+    def __init__(self, ax, width, height, block, color='red', zorder=2):
+        cols = int(width / block)
+        rows = int(height / block)
+        rgba = np.zeros((rows, cols, 4), dtype=np.float32)
+        ring = np.zeros((rows, cols), dtype=bool)
+        ring[0, :] = ring[-1, :] = True
+        ring[:, 0] = ring[:, -1] = True
+        rgba[ring] = to_rgba(color)
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        self.image = ax.imshow(
+            rgba, origin='lower', interpolation='nearest',
+            extent=(0, cols * block, 0, rows * block), zorder=zorder, aspect='equal'
+        )
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        self.image.set_visible(False)
+        self.active = False
+
+    def set_active(self, active):
+        """打开或关闭边框；状态不变时不做任何事"""
+        active = bool(active)
+        if active == self.active:
+            return False
+        self.active = active
+        self.image.set_visible(active)
+        return True
@@ -0,0 +1,162 @@
+"""HUD 用的 5×7 像素字体
+
+- 全部字形按颜色只栅格化一次，存成 (字形数, 行, 列, 4) 的 uint8 图集（get_glyph_atlas 按颜色缓存）；
+- PixelText 是一块定宽多行的字符网格图像：set_text 把字符串编码成字形下标网格，
+  与上一帧比较后只把变化的字符格从图集拷进缓冲区，不再经过 Matplotlib 的字体排版与文字栅格化；
+- 缓冲区由 FramebufferImage 最近邻放大显示，两种渲染后端、blit 与屏幕坐标（长关卡）都能直接使用；
+  低 DPI 下屏幕像素比字体像素还少时，最近邻会整行丢掉笔画，改用 Matplotlib 的抗锯齿缩小。
+"""
+import numpy as np
+from matplotlib.colors import to_rgb
+from matplotlib.image import AxesImage
+
+from pixel_framebuffer import FramebufferImage, to_uint8
+
+GLYPH_W, GLYPH_H = 5, 7
+# 字符格：字形右侧留 1 像素字距，上 1 下 2 像素行距
+CELL_W, CELL_H = 6, 10
+GLYPH_TOP = 1
+
+# 每个字形 7 行、每行 5 格，'#' 为笔画
+GLYPHS = {
+    '0': '.###. #...# #..## #.#.# ##..# #...# .###.',
+    '1': '..#.. .##.. ..#.. ..#.. ..#.. ..#.. .###.',
+    '2': '.###. #...# ....# ...#. ..#.. .#... #####',
+    '3': '##### ...#. ..#.. ...#. ....# #...# .###.',
+    '4': '...#. ..##. .#.#. #..#. ##### ...#. ...#.',
+    '5': '##### #.... ####. ....# ....# #...# .###.',
+    '6': '..##. .#... #.... ####. #...# #...# .###.',
+    '7': '##### ....# ...#. ..#.. .#... .#... .#...',
+    '8': '.###. #...# #...# .###. #...# #...# .###.',
+    '9': '.###. #...# #...# .#### ....# ...#. .##..',
+    'A': '.###. #...# #...# ##### #...# #...# #...#',
+    'B': '####. #...# #...# ####. #...# #...# ####.',
+    'C': '.###. #...# #.... #.... #.... #...# .###.',
+    'D': '###.. #..#. #...# #...# #...# #..#. ###..',
+    'E': '##### #.... #.... ####. #.... #.... #####',
+    'F': '##### #.... #.... ####. #.... #.... #....',
+    'G': '.###. #...# #.... #.### #...# #...# .####',
+    'H': '#...# #...# #...# ##### #...# #...# #...#',
+    'I': '.###. ..#.. ..#.. ..#.. ..#.. ..#.. .###.',
+    'J': '..### ...#. ...#. ...#. ...#. #..#. .##..',
+    'K': '#...# #..#. #.#.. ##... #.#.. #..#. #...#',
+    'L': '#.... #.... #.... #.... #.... #.... #####',
+    'M': '#...# ##.## #.#.# #.#.# #...# #...# #...#',
+    'N': '#...# #...# ##..# #.#.# #..## #...# #...#',
+    'O': '.###. #...# #...# #...# #...# #...# .###.',
+    'P': '####. #...# #...# ####. #.... #.... #....',
+    'Q': '.###. #...# #...# #...# #.#.# #..#. .##.#',
+    'R': '####. #...# #...# ####. #.#.. #..#. #...#',
+    'S': '.#### #.... #.... .###. ....# ....# ####.',
+    'T': '##### ..#.. ..#.. ..#.. ..#.. ..#.. ..#..',
+    'U': '#...# #...# #...# #...# #...# #...# .###.',
+    'V': '#...# #...# #...# #...# #...# .#.#. ..#..',
+    'W': '#...# #...# #...# #.#.# #.#.# #.#.# .#.#.',
+    'X': '#...# #...# .#.#. ..#.. .#.#. #...# #...#',
+    'Y': '#...# #...# .#.#. ..#.. ..#.. ..#.. ..#..',
+    'Z': '##### ....# ...#. ..#.. .#... #.... #####',
+    ':': '..... .##.. .##.. ..... .##.. .##.. .....',
+    '.': '..... ..... ..... ..... ..... .##.. .##..',
+    ',': '..... ..... ..... ..... .##.. ..#.. .#...',
+    '%': '##... ##..# ...#. ..#.. .#... #..## ...##',
+    '-': '..... ..... ..... ##### ..... ..... .....',
+    '+': '..... ..#.. ..#.. ##### ..#.. ..#.. .....',
+    '=': '..... ..... ##### ..... ##### ..... .....',
+    '/': '..... ....# ...#. ..#.. .#... #.... .....',
+    '!': '..#.. ..#.. ..#.. ..#.. ..#.. ..... ..#..',
+    '?': '.###. #...# ....# ...#. ..#.. ..... ..#..',
+    '(': '...#. ..#.. .#... .#... .#... ..#.. ...#.',
+    ')': '.#... ..#.. ...#. ...#. ...#. ..#.. .#...',
+    "'": '..#.. ..#.. .#... ..... ..... ..... .....',
+    '#': '.#.#. .#.#. ##### .#.#. ##### .#.#. .#.#.',
+}
+
+
+class GlyphAtlas:
+    """一种颜色的全部字形：glyphs[i] 为第 i 个字形的字符格 RGBA（行 0 在上，笔画外全透明）
+
+    下标 0 是空格；lut 把 ASCII 码映射到字形下标，小写按大写显示，没有字形的字符显示为 '?'。
+    """
+
+    def __init__(self, color):
+        chars = ' ' + ''.join(GLYPHS)
+        self.glyphs = np.zeros((len(chars), CELL_H, CELL_W, 4), dtype=np.uint8)
+        rgba = to_uint8(to_rgb(color))
+        for i, ch in enumerate(chars[1:], start=1):
+            mask = np.array([[c == '#' for c in row] for row in GLYPHS[ch].split()])
+            self.glyphs[i, GLYPH_TOP:GLYPH_TOP + GLYPH_H, :GLYPH_W][mask] = rgba
+        self.lut = np.full(128, chars.index('?'), dtype=np.intp)
+        for i, ch in enumerate(chars):
+            self.lut[ord(ch)] = i
+            self.lut[ord(ch.lower())] = i
+
+    def encode(self, text, rows, cols):
+        """把多行字符串编码成 (rows, cols) 的字形下标网格；超出的行和列截掉，不足的补空格"""
+        lines = text.split('\n')[:rows]
+        padded = ''.join(line[:cols].ljust(cols) for line in lines).ljust(rows * cols)
+        codes = np.frombuffer(padded.encode('ascii', 'replace'), dtype=np.uint8)
+        return self.lut[codes].reshape(rows, cols)
+
+
+_GLYPH_ATLASES = {}
+
+
+def get_glyph_atlas(color):
+    """按颜色缓存的字形图集，重开游戏时不再重新栅格化"""
+    key = tuple(to_rgb(color))
+    atlas = _GLYPH_ATLASES.get(key)
+    if atlas is None:
+        atlas = _GLYPH_ATLASES[key] = GlyphAtlas(color)
+    return atlas
+
+
+class PixelText(FramebufferImage):
+    """rows 行 × cols 列的像素字体文字，左上角在 (x, top)，每个字体像素边长 pixel_size
+
+    接口与 Matplotlib Text 的常用部分一致（set_text / get_text / set_visible / set_transform）；
+    redrawn 为累计重画的字符格数。
+    """
+
+    def __init__(self, ax, x, top, rows, cols, pixel_size, color, zorder=3):
+        super().__init__(ax, origin='upper', interpolation='nearest', zorder=zorder,
+                         extent=(x, x + cols * CELL_W * pixel_size, top - rows * CELL_H * pixel_size, top))
+        self.atlas = get_glyph_atlas(color)
+        self.grid_shape = (rows, cols)
+        self.buffer = np.zeros((rows * CELL_H, cols * CELL_W, 4), dtype=np.uint8)
+        # 按字符格切开的视图：cells[r, :, c] 就是第 r 行第 c 列的字符格
+        self.cells = self.buffer.reshape(rows, CELL_H, cols, CELL_W, 4)
+        self.chars = np.zeros(self.grid_shape, dtype=np.intp)
+        self.text = ''
+        self.redrawn = 0
+        self.set_frame(self.buffer)
+        ax.add_image(self)
+
+    def get_text(self):
+        return self.text
+
+    def set_text(self, text):
+        """换成新字符串，只重画与上一次不同的字符格；没有变化时返回 False"""
+        text = str(text)
+        if text == self.text:
+            return False
+        self.text = text
+        chars = self.atlas.encode(text, *self.grid_shape)
+        rows, cols = np.nonzero(chars != self.chars)
+        if len(rows) == 0:
+            return False
+        self.cells[rows, :, cols] = self.atlas.glyphs[chars[rows, cols]]
+        self.chars = chars
+        self.redrawn += len(rows)
+        self.set_frame(self.buffer)
+        return True
+
+    def draw(self, renderer):
+        x0, x1, y0, y1 = self.get_extent()
+        (_, b), (_, t) = self.get_transform().transform([(x0, y0), (x1, y1)])
+        shrunk = abs(t - b) < self.buffer.shape[0]
+        interpolation = 'antialiased' if shrunk else 'nearest'
+        if self.get_interpolation() != interpolation:
+            self.set_interpolation(interpolation)
+        if shrunk:
+            return AxesImage.draw(self, renderer)
+        return super().draw(renderer)
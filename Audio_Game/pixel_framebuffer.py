@@ -0,0 +1,340 @@
+"""软件帧缓冲渲染后端
+
+整幅游戏画面（背景、车和狗、HUD 色块、星星、危险边框、特效）都用 NumPy 切片
+合成进一块预分配的 uint8 RGBA 帧缓冲区，每帧把它原样交给一个 FramebufferImage 显示（不拷贝）。
+只有文字仍在帧缓冲之外：信息栏是像素字体图像（pixel_font.py），VOLUME 标题、性能面板与结束画面是 Matplotlib 文本对象。
+
+坐标约定：帧缓冲第 0 行在最上方，世界坐标 (x, y) 对应像素 (row = H - y*ppu, col = (x - 摄像机左边缘)*ppu)。
+长关卡（滚动）时背景来自 ScrollingBackground 的视口，HUD 底框与云作为屏幕层每帧叠在上面。
+"""
+import numpy as np
+from matplotlib.colors import to_rgb
+from matplotlib.image import AxesImage
+
+from pixel_sprites import DOG_PATTERNS
+from track_entities import ENTITY_KINDS
+
+
+def resample(rgba, cell_size, ppu):
+    """把按格子存放的图案最近邻放大到帧缓冲分辨率（每格 cell_size 世界单位）"""
+    rows, cols = rgba.shape[:2]
+    h = max(1, int(round(rows * cell_size * ppu)))
+    w = max(1, int(round(cols * cell_size * ppu)))
+    ri = np.arange(h) * rows // h
+    ci = np.arange(w) * cols // w
+    return rgba[ri[:, None], ci[None, :]]
+
+
+def to_uint8(rgb):
+    """浮点 RGB（0..1）→ 不透明的 uint8 RGBA"""
+    rgb = np.asarray(rgb, dtype=np.float32)
+    out = np.full(rgb.shape[:-1] + (4,), 255, dtype=np.uint8)
+    out[..., :3] = np.clip(rgb, 0.0, 1.0) * 255.0 + 0.5
+    return out
+
+
+class Stamp:
+    """预缩放好的精灵位图：uint8 RGBA + 不透明掩码（图案只有全透明/不透明两种格子）"""
+
+    def __init__(self, rgba):
+        self.rgba = to_uint8(rgba[..., :3])
+        self.mask = rgba[..., 3] >= 0.5
+        self.h, self.w = self.mask.shape
+
+
+class FramebufferImage(AxesImage):
+    """显示帧缓冲的 AxesImage：栅格后端上跳过通用的重采样流水线
+
+    通用的 AxesImage.draw 每帧要做掩码数组转换、加 alpha 通道和重采样，整幅画面需要数十毫秒。
+    帧缓冲本身已是不透明 RGBA，这里按像素中心预先算好最近邻的行列下标（窗口尺寸不变就复用），
+    以 uint32 整像素 take 放大后直接交给 renderer.draw_image。矢量后端（保存 PDF/SVG）仍走父类流程。
+    """
+
+    _scale_key = None
+
+    def set_frame(self, frame):
+        """直接引用帧缓冲（须为 uint8 RGBA），跳过 set_data 每次的整幅拷贝与取值范围检查
+
+        之后原地修改 frame 再调用一次本方法即可，图像绘制时读取的就是当前内容。
+        """
+        self._A = frame
+        self._imcache = None
+        self.stale = True
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        if renderer.option_scale_image():
+            return super().draw(renderer)
+        A = self._A
+        x0, x1, y0, y1 = self.get_extent()
+        (l, b), (r, t) = self.get_transform().transform([(x0, y0), (x1, y1)])
+        l, b, r, t = int(round(l)), int(round(b)), int(round(r)), int(round(t))
+        w, h = r - l, t - b
+        if w <= 0 or h <= 0:
+            return
+        key = (w, h, A.shape)
+        if key != self._scale_key:
+            self._scale_key = key
+            # draw_image 的第 0 行在最下方，行下标倒序即可，不必再翻转数组
+            self._rows = (((np.arange(h) + 0.5) * A.shape[0] / h).astype(np.intp))[::-1]
+            self._cols = ((np.arange(w) + 0.5) * A.shape[1] / w).astype(np.intp)
+            self._row_buf = np.empty((h, A.shape[1]), dtype=np.uint32)
+            self._scaled = np.empty((h, w), dtype=np.uint32)
+        pixels = np.ascontiguousarray(A).view(np.uint32)[..., 0]
+        np.take(pixels, self._rows, axis=0, out=self._row_buf, mode='clip')
+        np.take(self._row_buf, self._cols, axis=1, out=self._scaled, mode='clip')
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        if self.clipbox is None:
+            # 通用流程会把图像裁到坐标区以内；图像超出坐标区时（如滚动视口多出的一列）用裁剪矩形代替
+            gc.set_clip_rectangle(self.axes.bbox)
+        gc.set_alpha(self.get_alpha())
+        renderer.draw_image(gc, l, b, self._scaled.view(np.uint8).reshape(h, w, 4))
+        gc.restore()
+        self.stale = False
+
+
+class FramebufferRenderer:
+    """从游戏状态合成整帧画面
+
+    - 静态层（背景、云、花、信息框与音量框）只合成一次；中心虚线只有 4 种相位，
+      每种相位各合成一份完整静态帧，每帧只需整块拷贝一次（长关卡改为每帧从滚动视口放大背景）；
+    - 动态部分（星星、音量条、道具、车、各玩家的狗、边框、特效）每帧按状态贴到拷贝上。
+    """
+
+    def __init__(self, game, ppu=100):
+        self.game = game
+        self.atlas = game.atlas
+        self.effects = []  # [(特效种类, x, y)]，左下角坐标
+        self.star_rgb = np.array(to_rgb(game.pixel_colors['white']), dtype=np.float32) * 255.0
+        self.danger_rgba = to_uint8(to_rgb('red'))
+        self.image = FramebufferImage(game.ax, origin='upper', interpolation='nearest', zorder=0)
+        self.set_resolution(ppu)
+        game.ax.add_image(self.image)
+
+    def set_resolution(self, ppu):
+        """按内部分辨率 ppu（每世界单位像素数）重建帧缓冲、预缩放的精灵与静态层
+
+        图像对象不变、显示范围仍是整个游戏画面，FramebufferImage 最近邻放大到窗口；
+        画质调节时调用，装饰密度的变化也在这里重新合成进静态层。
+        """
+        game = self.game
+        self.ppu = ppu
+        self.width = int(round(game.GAME_WIDTH * ppu))
+        self.height = int(round(game.GAME_HEIGHT * ppu))
+        self.frame = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        self.car = self.make_stamp('car', game.CAR_PIXEL_SIZE)
+        self.dog_poses = {pose: self.make_stamp(f'dog/{pose}', game.DOG_PIXEL_SIZE) for pose in DOG_PATTERNS}
+        self.effect_stamps = {
+            'explosion': self.make_stamp('explosion', 0.1),
+            'firework': self.make_stamp('firework', 0.1),
+            'trophy': self.make_stamp('trophy', 0.12),
+        }
+        self.item_stamps = [self.make_stamp(f'item/{kind}', game.ITEM_PIXEL_SIZE) for kind in ENTITY_KINDS]
+        self.danger_px = max(1, int(round(0.2 * ppu)))
+        self.volume_bars = self.make_volume_bars()
+        self.static_frames = None
+        self._world_rows = None
+        self._phase = None  # 帧缓冲里当前是哪个虚线相位的静态帧（None：须整块拷贝）
+        self._dirty = []    # 上一帧画过动态内容的像素矩形 (r0, r1, c0, c1)
+        if game.scrolling:
+            self.overlay, self.overlay_mask = self.render_overlay()
+        else:
+            self.static_frames = self.render_static()
+            np.copyto(self.frame, self.static_frames[0])
+        self.image.set_frame(self.frame)
+        self.image.set_extent((0, self.width / ppu, 0, self.height / ppu))
+
+    def make_stamp(self, name, cell_size):
+        """把图集中的一个图案放大到帧缓冲分辨率"""
+        return Stamp(resample(self.atlas.get(name), cell_size, self.ppu))
+
+    def make_volume_bars(self):
+        """三种颜色的满格音量条（每格带 1 像素黑色描边），绘制时只截取前 N 格"""
+        g = self.game
+        cell_px = max(2, int(round(g.volume_cell * self.ppu)))
+        bars = {}
+        for name in ('lime', 'orange', 'red'):
+            bar = np.empty((cell_px, cell_px * g.volume_cells, 4), dtype=np.uint8)
+            bar[:] = to_uint8(to_rgb(name))
+            bar[0, :, :3] = bar[-1, :, :3] = 0
+            bar[:, ::cell_px, :3] = 0
+            bar[:, cell_px - 1::cell_px, :3] = 0
+            bars[name] = bar
+        return bars
+
+    def render_static(self):
+        """合成静态层：底色 + 背景合成器的底图 + 装饰与 HUD 底框，每个虚线相位一份"""
+        g = self.game
+        background = g.background
+        face = np.array(to_rgb(g.ax.get_facecolor()), dtype=np.float32)
+        ppu = self.ppu
+        canvas = np.empty((self.height, self.width, 3), dtype=np.float32)
+        canvas[:] = face
+        self.over(canvas, resample(background.base[::-1], background.pixel_size, ppu), 0.0, background.height)
+        for name, cell_size, positions in g.static_sprites():
+            rgba = resample(self.atlas.get(name), cell_size, ppu)
+            for x, y in positions:
+                self.over(canvas, rgba, x, y + self.atlas.shape(name)[0] * cell_size)
+
+        frames = []
+        if not background.dash_cells:
+            return [to_uint8(canvas)] * background.DASH_PHASES
+        row0, row1 = background.dash_rows
+        for strip in background.frames:
+            layer = canvas.copy()
+            self.over(layer, resample(strip[::-1], background.pixel_size, ppu), 0.0, row1 * background.pixel_size)
+            frames.append(to_uint8(layer))
+        return frames
+
+    def render_overlay(self):
+        """长关卡的屏幕层：HUD 底框与云（不随摄像机移动），返回 (RGBA, 不透明掩码)"""
+        overlay = np.zeros_like(self.frame)
+        mask = np.zeros(overlay.shape[:2], dtype=bool)
+        for name, cell_size, positions in self.game.static_sprites():
+            sprite = self.make_stamp(name, cell_size)
+            for x, y in positions:
+                r0 = self.height - int(round(y * self.ppu)) - sprite.h
+                c0 = int(round(x * self.ppu))
+                region, rgba = self.clip(overlay, sprite.rgba, r0, c0)
+                if region is None:
+                    continue
+                covered, opaque = self.clip(mask, sprite.mask, r0, c0)
+                np.copyto(region, rgba, where=opaque[..., None])
+                covered |= opaque
+        return overlay, mask
+
+    def draw_world(self, camera_left):
+        """长关卡：按摄像机位置把背景视口最近邻放大进帧缓冲（uint32 整像素 take），再叠上屏幕层"""
+        background = self.game.background
+        if self._world_rows is None:
+            size = background.pixel_size
+            self._world_rows = ((np.arange(self.height) + 0.5) / (size * self.ppu)).astype(np.intp)
+            self._world_x = (np.arange(self.width) + 0.5) / self.ppu
+            self._world_buf = np.empty((self.height, background.view_cols), dtype=np.uint32)
+        cols = ((camera_left + self._world_x) / background.pixel_size).astype(np.intp) - background.left_col
+        pixels = background.view.view(np.uint32)[..., 0]
+        np.take(pixels, self._world_rows, axis=0, out=self._world_buf, mode='clip')
+        np.take(self._world_buf, cols, axis=1, out=self.frame.view(np.uint32)[..., 0], mode='clip')
+        np.copyto(self.frame, self.overlay, where=self.overlay_mask[..., None])
+
+    def over(self, canvas, rgba, x, top):
+        """把 RGBA 图块（行 0 在上）按 alpha 叠加到浮点画布，左上角在世界坐标 (x, top)"""
+        c0 = int(round(x * self.ppu))
+        r0 = self.height - int(round(top * self.ppu))
+        region, src = self.clip(canvas, rgba, r0, c0)
+        if region is None:
+            return
+        alpha = src[..., 3:4]
+        region *= 1.0 - alpha
+        region += src[..., :3] * alpha
+
+    def touch(self, r0, r1, c0, c1):
+        """登记本帧画过的像素矩形，下一帧只需从静态帧恢复这些区域"""
+        self._dirty.append((max(r0, 0), max(r1, 0), max(c0, 0), max(c1, 0)))
+
+    def restore(self, static):
+        """把帧缓冲恢复成静态帧：相位不变时只恢复上一帧画过的矩形，否则整块拷贝"""
+        if self._phase is not static:
+            np.copyto(self.frame, static)
+            self._phase = static
+        else:
+            for r0, r1, c0, c1 in self._dirty:
+                self.frame[r0:r1, c0:c1] = static[r0:r1, c0:c1]
+        self._dirty.clear()
+
+    def clip(self, canvas, src, r0, c0):
+        """按画布边界裁剪，返回 (画布视图, 源视图)；完全在外时返回 (None, None)"""
+        h, w = src.shape[:2]
+        r1, c1 = r0 + h, c0 + w
+        cr0, cc0 = max(r0, 0), max(c0, 0)
+        cr1, cc1 = min(r1, canvas.shape[0]), min(c1, canvas.shape[1])
+        if cr0 >= cr1 or cc0 >= cc1:
+            return None, None
+        return canvas[cr0:cr1, cc0:cc1], src[cr0 - r0:cr1 - r0, cc0 - c0:cc1 - c0]
+
+    def stamp(self, sprite, x, y):
+        """按掩码把精灵贴到帧缓冲上，(x, y) 为左下角世界坐标"""
+        c0 = int(round(x * self.ppu))
+        r0 = self.height - int(round(y * self.ppu)) - sprite.h
+        region, rgba = self.clip(self.frame, sprite.rgba, r0, c0)
+        if region is None:
+            return
+        self.touch(r0, r0 + sprite.h, c0, c0 + sprite.w)
+        _, mask = self.clip(self.frame, sprite.mask, r0, c0)
+        np.copyto(region, rgba, where=mask[..., None])
+
+    def stamp_centered(self, sprite, cx, cy):
+        self.stamp(sprite, cx - sprite.w / (2.0 * self.ppu), cy - sprite.h / (2.0 * self.ppu))
+
+    def blend_rect(self, x, y, size, rgb, alpha):
+        """半透明纯色方块（星星闪烁）"""
+        ppu = self.ppu
+        c0 = int(round(x * ppu))
+        r1 = self.height - int(round(y * ppu))
+        n = int(round(size * ppu))
+        self.touch(r1 - n, r1, c0, c0 + n)
+        region = self.frame[max(r1 - n, 0):max(r1, 0), max(c0, 0):max(c0 + n, 0), :3]
+        if alpha >= 1.0:
+            region[:] = rgb.astype(np.uint8)
+        else:
+            region[:] = region * (1.0 - alpha) + rgb * alpha
+
+    def add_effect(self, kind, x, y):
+        """登记一个特效（左下角坐标），之后每帧都会绘制"""
+        self.effects.append((kind, x, y))
+
+    def clear_effects(self):
+        self.effects.clear()
+
+    def draw_volume_bar(self):
+        g = self.game
+        active = g.volume_active
+        if active <= 0:
+            return
+        bar = self.volume_bars[g.volume_color]
+        cell_px = bar.shape[0]
+        x = g.volume_x + g.volume_cell
+        y = g.volume_y + g.volume_cell
+        c0 = int(round(x * self.ppu))
+        r0 = self.height - int(round(y * self.ppu)) - cell_px
+        region, src = self.clip(self.frame, bar[:, :active * cell_px], r0, c0)
+        if region is not None:
+            self.touch(r0, r0 + cell_px, c0, c0 + active * cell_px)
+            region[:] = src
+
+    def draw_danger_border(self):
+        n = self.danger_px
+        frame = self.frame
+        frame[:n] = self.danger_rgba
+        frame[-n:] = self.danger_rgba
+        frame[:, :n] = self.danger_rgba
+        frame[:, -n:] = self.danger_rgba
+        h, w = frame.shape[:2]
+        for rect in ((0, n, 0, w), (h - n, h, 0, w), (0, h, 0, n), (0, h, w - n, w)):
+            self.touch(*rect)
+
+    def render(self):
+        """按当前游戏状态合成一帧并提交给图像对象"""
+        g = self.game
+        camera = g.prev_camera_left  # 世界坐标的对象按摄像机平移；星星、音量条、边框在屏幕坐标
+        if self.static_frames is None:
+            self.draw_world(camera)  # 长关卡每帧整幅重画背景，不需要脏矩形
+            self._dirty.clear()
+        else:
+            self.restore(self.static_frames[g.dash_phase])
+        for (x, y), alpha in zip(g.shown_stars(), g.star_alphas):
+            self.blend_rect(x, y, 0.1, self.star_rgb, alpha)
+        self.draw_volume_bar()
+        for kind, x in zip(*g.visible_items()):
+            self.stamp_centered(self.item_stamps[kind], x - camera, g.dog_y)
+        self.stamp_centered(self.car, g.car_x - camera, g.car_y)
+        for x, y, pose in zip(g.dog_xs, g.dog_ys, g.player_poses()):
+            self.stamp_centered(self.dog_poses[pose], x - camera, y)
+        if g.danger_flash:
+            self.draw_danger_border()
+        for kind, x, y in self.effects:
+            self.stamp(self.effect_stamps[kind], x - camera, y)
+        self.image.set_frame(self.frame)
+        return self.image
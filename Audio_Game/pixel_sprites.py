@@ -0,0 +1,262 @@
+"""像素精灵：车、狗、装饰与特效的图案，图案图集，以及只平移/切换姿势的精灵对象
+
+所有图案只在图集里解析一次（颜色名 → RGBA + 透明掩码），之后每帧只改图像位置或切换已编译好的姿势，
+不再每帧删除、重建上百个 Rectangle，也不再逐格查 pixel_colors。
+"""
+import numpy as np
+from matplotlib.colors import to_rgba
+
+
+# 车辆图案（'T' 表示透明）
+CAR_PATTERN = [
+    ['T', 'T', 'car_red', 'car_red', 'car_red', 'T', 'T'],
+    ['T', 'car_red', 'white', 'white', 'white', 'car_red', 'T'],
+    ['car_red', 'white', 'car_blue', 'car_blue', 'car_blue', 'white', 'car_red'],
+    ['car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red', 'car_red'],
+    ['T', 'black', 'T', 'T', 'T', 'black', 'T'],
+]
+
+# 狗的姿势：开局静止、追逐中平静、追逐中惊慌（红眼）
+DOG_PATTERNS = {
+    'start': [
+        ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
+        ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
+        ['T', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'T'],
+        ['dog_gold', 'dog_gold', 'white', 'black', 'black', 'white', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'black', 'pink', 'pink', 'black', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_gold', 'dog_gold', 'pink', 'pink', 'dog_gold', 'dog_gold', 'T'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
+        ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
+    ],
+    'calm': [
+        ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
+        ['dog_brown', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_brown'],
+        ['dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown'],
+        ['dog_gold', 'dog_gold', 'white', 'black', 'black', 'white', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'black', 'pink', 'pink', 'black', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_gold', 'dog_gold', 'pink', 'pink', 'dog_gold', 'dog_gold', 'T'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
+        ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
+    ],
+    'alert': [
+        ['dog_brown', 'dog_brown', 'dog_brown', 'T', 'T', 'dog_brown', 'dog_brown', 'dog_brown'],
+        ['dog_brown', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_brown'],
+        ['dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown'],
+        ['dog_gold', 'dog_gold', 'car_red', 'black', 'black', 'car_red', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'black', 'black', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'black', 'car_red', 'car_red', 'black', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_gold', 'car_red', 'pink', 'pink', 'car_red', 'dog_gold', 'T'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['dog_gold', 'dog_brown', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_brown', 'dog_gold'],
+        ['dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold', 'dog_gold'],
+        ['T', 'dog_brown', 'T', 'dog_brown', 'dog_brown', 'T', 'dog_brown', 'T'],
+        ['T', 'black', 'T', 'black', 'black', 'T', 'black', 'T'],
+    ],
+}
+
+# 失败爆炸（黄）、胜利烟花（绿）与奖杯
+EXPLOSION_PATTERN = [
+    ['T', 'yellow', 'T'],
+    ['yellow', 'white', 'yellow'],
+    ['T', 'yellow', 'T'],
+]
+
+FIREWORK_PATTERN = [
+    ['T', 'lime', 'T'],
+    ['lime', 'white', 'lime'],
+    ['T', 'lime', 'T'],
+]
+
+TROPHY_PATTERN = [
+    ['T', 'yellow', 'yellow', 'yellow', 'T'],
+    ['yellow', 'yellow', 'white', 'yellow', 'yellow'],
+    ['yellow', 'yellow', 'yellow', 'yellow', 'yellow'],
+    ['T', 'yellow', 'yellow', 'yellow', 'T'],
+    ['T', 'T', 'yellow', 'T', 'T'],
+    ['T', 'T', 'yellow', 'T', 'T'],
+    ['T', 'yellow', 'yellow', 'yellow', 'T'],
+]
+
+
+CLOUD_PATTERN = [
+    ['T', 'white', 'white', 'T'],
+    ['white', 'white', 'white', 'white'],
+    ['T', 'white', 'white', 'T'],
+]
+
+FLOWER_PATTERN = [
+    ['T', 'pink', 'T'],
+    ['pink', 'yellow', 'pink'],
+    ['T', 'pink', 'T'],
+    ['T', 'green', 'T'],
+]
+
+# 赛道道具：水坑（狗减速）、骨头（狗加速）、路障（车减速）
+ITEM_PATTERNS = {
+    'puddle': [
+        ['T', 'cyan', 'cyan', 'cyan', 'cyan', 'T'],
+        ['cyan', 'blue', 'blue', 'cyan', 'blue', 'cyan'],
+        ['T', 'cyan', 'cyan', 'cyan', 'cyan', 'T'],
+    ],
+    'bone': [
+        ['white', 'T', 'T', 'T', 'T', 'white'],
+        ['white', 'white', 'white', 'white', 'white', 'white'],
+        ['white', 'T', 'T', 'T', 'T', 'white'],
+    ],
+    'cone': [
+        ['T', 'T', 'orange', 'T', 'T'],
+        ['T', 'T', 'white', 'T', 'T'],
+        ['T', 'orange', 'orange', 'orange', 'T'],
+        ['T', 'white', 'white', 'white', 'T'],
+        ['orange', 'orange', 'orange', 'orange', 'orange'],
+    ],
+}
+
+# 图集里的默认图案（名称 → 图案），狗的各姿势以 'dog/姿势名'、道具以 'item/种类' 登记
+SPRITE_PATTERNS = {
+    'car': CAR_PATTERN,
+    **{f'dog/{pose}': pattern for pose, pattern in DOG_PATTERNS.items()},
+    'cloud': CLOUD_PATTERN,
+    'flower': FLOWER_PATTERN,
+    'explosion': EXPLOSION_PATTERN,
+    'firework': FIREWORK_PATTERN,
+    'trophy': TROPHY_PATTERN,
+    **{f'item/{kind}': pattern for kind, pattern in ITEM_PATTERNS.items()},
+}
+
+
+def compile_pattern(pattern, palette):
+    """把颜色名图案编译为 RGBA 数组（第 0 行在最上方，'T' 为全透明）
+
+    每种颜色名只解析一次，再用下标数组一次性查表填充。
+    """
+    names = np.array(pattern, dtype=object)
+    unique, index = np.unique(names.astype(str), return_inverse=True)
+    lut = np.array([(0.0, 0.0, 0.0, 0.0) if name == 'T' else to_rgba(palette.get(name, name))
+                    for name in unique], dtype=np.float32)
+    return lut[index.reshape(names.shape)]
+
+
+class SpriteAtlas:
+    """把所有图案打包进一张 RGBA 图集（逐个向下堆叠）并附带透明掩码
+
+    - regions: {名称: (行, 列, 行数, 列数)}；get / mask_of 返回图集上的视图，不拷贝
+    - 同一调色板的图集由 get_sprite_atlas 缓存，重开游戏时不再重新解析
+    """
+
+    def __init__(self, palette, patterns=None):
+        self.palette = dict(palette)
+        self.regions = {}
+        self.rgba = np.zeros((0, 0, 4), dtype=np.float32)
+        self.mask = np.zeros((0, 0), dtype=bool)
+        self.add_many(SPRITE_PATTERNS if patterns is None else patterns)
+
+    def add_many(self, patterns):
+        """登记一批图案（已存在的名称直接复用）；图集只扩容一次"""
+        compiled = [(name, compile_pattern(p, self.palette))
+                    for name, p in patterns.items() if name not in self.regions]
+        if not compiled:
+            return
+        height = self.rgba.shape[0] + sum(rgba.shape[0] for _, rgba in compiled)
+        width = max([self.rgba.shape[1]] + [rgba.shape[1] for _, rgba in compiled])
+        atlas = np.zeros((height, width, 4), dtype=np.float32)
+        atlas[:self.rgba.shape[0], :self.rgba.shape[1]] = self.rgba
+        row = self.rgba.shape[0]
+        for name, rgba in compiled:
+            rows, cols = rgba.shape[:2]
+            atlas[row:row + rows, :cols] = rgba
+            self.regions[name] = (row, 0, rows, cols)
+            row += rows
+        self.rgba = atlas
+        self.mask = atlas[..., 3] > 0.0
+
+    def add(self, name, pattern):
+        self.add_many({name: pattern})
+        return self.get(name)
+
+    def get(self, name):
+        """名称对应的 RGBA 视图（第 0 行在最上方）"""
+        row, col, rows, cols = self.regions[name]
+        return self.rgba[row:row + rows, col:col + cols]
+
+    def mask_of(self, name):
+        row, col, rows, cols = self.regions[name]
+        return self.mask[row:row + rows, col:col + cols]
+
+    def shape(self, name):
+        return self.regions[name][2:]
+
+
+_ATLASES = {}
+
+
+def get_sprite_atlas(palette):
+    """按调色板缓存的默认图集"""
+    key = tuple(sorted(palette.items()))
+    atlas = _ATLASES.get(key)
+    if atlas is None:
+        atlas = _ATLASES[key] = SpriteAtlas(palette)
+    return atlas
+
+
+class PixelSprite:
+    """由单个 imshow 图像承载的像素精灵
+
+    - poses: {姿势名: 图集名称}（或单个图集名称），图像数据直接取自图集
+    - move_to 只更新图像范围（平移）；set_pose 只在姿势变化时替换图像数据
+    """
+
+    def __init__(self, ax, atlas, poses, cell_size, zorder=2):
+        self.ax = ax
+        self.cell_size = cell_size
+        if isinstance(poses, str):
+            poses = {poses: poses}
+        self.poses = {name: atlas.get(key) for name, key in poses.items()}
+        self.pose = next(iter(self.poses))
+        rows, cols = self.poses[self.pose].shape[:2]
+        self.width = cols * cell_size
+        self.height = rows * cell_size
+        self.x = 0.0
+        self.y = 0.0
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        self.image = ax.imshow(
+            self.poses[self.pose], origin='upper', interpolation='nearest',
+            extent=(0, self.width, 0, self.height), zorder=zorder, aspect='equal'
+        )
+        # imshow 会自动缩放坐标轴，恢复原范围
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+
+    def move_to(self, cx, cy):
+        """把精灵中心移动到 (cx, cy)"""
+        return self.place(cx - self.width / 2, cy - self.height / 2)
+
+    def place(self, x, y):
+        """把精灵左下角移动到 (x, y)（与 create_pixel_sprite 的坐标约定相同）"""
+        if x == self.x and y == self.y:
+            return False
+        self.x, self.y = x, y
+        self.image.set_extent((x, x + self.width, y, y + self.height))
+        return True
+
+    def set_pose(self, name):
+        """切换到预编译的姿势"""
+        if name == self.pose:
+            return False
+        self.pose = name
+        self.image.set_data(self.poses[name])
+        return True
+
+    def set_visible(self, visible):
+        self.image.set_visible(visible)
+
+    def remove(self):
+        self.image.remove()
@@ -0,0 +1,77 @@
+"""画质预设与按帧耗时预算自动调节画质
+
+- QUALITY_PRESETS：low / medium / high 三档，每档规定
+  dpi（启动时的图形 DPI，None 为 Matplotlib 默认；运行中改 DPI 会改变窗口大小，自动调节不动它）、
+  framebuffer_ppu（framebuffer 后端的内部分辨率，由 FramebufferImage 最近邻放大到窗口，像素风不变）、
+  decoration_density（云、花、星星保留的比例）与 effect_every（虚线与星星闪烁每几帧更新一次）；
+- QualityController：每 window 帧看一次这段时间的 p90 帧耗时（推进 + 绘制），超出预算就降一档，
+  远低于预算并且稳定一段时间才升一档；升档后很快又超预算的等级，下次要等更久才会再试。
+"""
+import numpy as np
+
+QUALITY_LEVELS = ('low', 'medium', 'high')
+QUALITY_PRESETS = {
+    'low': {'dpi': 50, 'framebuffer_ppu': 50, 'decoration_density': 0.25, 'effect_every': 4},
+    'medium': {'dpi': 72, 'framebuffer_ppu': 75, 'decoration_density': 0.5, 'effect_every': 2},
+    'high': {'dpi': None, 'framebuffer_ppu': 100, 'decoration_density': 1.0, 'effect_every': 1},
+}
+
+
+def decoration_count(total, density):
+    """按密度保留的装饰个数（有装饰时至少保留 1 个）"""
+    if total == 0:
+        return 0
+    return min(total, max(1, int(np.ceil(total * density))))
+
+
+class QualityController:
+    """按帧耗时在 QUALITY_LEVELS 之间升降档
+
+    - observe(ms) 记录一帧耗时，需要换档时返回新等级名，否则返回 None；
+    - 降档看 p90 > budget_ms，升档看 p90 < headroom * budget_ms，且距上次换档已过 raise_after 帧；
+    - 刚升上去的等级若又超预算，该等级的升档等待时间加倍（避免在两档之间来回抖动）。
+    """
+
+    def __init__(self, level='high', budget_ms=25.0, window=30, headroom=0.6, raise_after=200):
+        self.index = QUALITY_LEVELS.index(level)
+        self.budget_ms = float(budget_ms)
+        self.headroom = float(headroom)
+        self.samples = np.zeros(int(window))
+        self.filled = 0
+        self.raise_after = {name: int(raise_after) for name in QUALITY_LEVELS}
+        self.since_change = 0
+        self.raised = False  # 当前等级是否由升档得来
+        self.last_p90 = 0.0
+        self.drops = 0
+        self.raises = 0
+
+    @property
+    def level(self):
+        return QUALITY_LEVELS[self.index]
+
+    def observe(self, ms):
+        self.samples[self.filled] = ms
+        self.filled += 1
+        self.since_change += 1
+        if self.filled < len(self.samples):
+            return None
+        self.filled = 0
+        p90 = self.last_p90 = float(np.percentile(self.samples, 90))
+        if p90 > self.budget_ms and self.index > 0:
+            if self.raised and self.since_change <= self.raise_after[self.level]:
+                self.raise_after[self.level] *= 2
+            return self._change(-1)
+        if (p90 < self.headroom * self.budget_ms and self.index < len(QUALITY_LEVELS) - 1
+                and self.since_change >= self.raise_after[QUALITY_LEVELS[self.index + 1]]):
+            return self._change(+1)
+        return None
+
+    def _change(self, step):
+        self.index += step
+        self.raised = step > 0
+        self.since_change = 0
+        if step > 0:
+            self.raises += 1
+        else:
+            self.drops += 1
+        return self.level
@@ -0,0 +1,177 @@
+"""离屏导出：把录音会话渲染成 PNG 序列或未压缩的 .npy 帧堆栈
+
+    python Audio_Game/session_export.py session.dogrec --out frames/          # frame_000000.png ...
+    python Audio_Game/session_export.py session.dogrec --out session.npy      # (帧数, 高, 宽, 3) uint8
+
+- 使用 Agg 后端，不开窗口、不用定时器：每帧固定推进一个 tick（realtime_physics = False），
+  由导出循环直接调用 game_loop，并用 blit 只重画动态对象，结果只取决于录音内容；
+- 会话里的每一局结束后停留 --hold 帧结束画面再热重开（reset），直到录音放完且最后一局结束；
+- 先用不绘图的快速预演算出总帧数，再把帧区间切成 --chunk 帧一段分给多个工作进程。
+  每个进程先不绘图快进到本段起点，再逐帧绘制写出。PNG 各写各的文件；.npy 由主进程预先创建（open_memmap），
+  各进程写入互不重叠的切片。分段渲染与单进程顺序渲染的结果逐像素相同。
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from PIL import Image
+
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+if _GAME_DIR not in sys.path:
+    sys.path.insert(0, _GAME_DIR)
+
+from session_record import KIND_RAW, read_header
+from Pixel_Dog_Run import RENDER_BACKENDS, PixelCarChaseDogGame
+
+TICK_SECONDS = 0.025  # 游戏每个 tick 对应的真实时间，用于换算导出速度
+
+
+class SessionDriver:
+    """按帧确定性地驱动一个离屏游戏对象（不依赖墙钟时间）"""
+
+    def __init__(self, replay_path, render_backend='framebuffer', dpi=50, hold_frames=40):
+        header = read_header(replay_path)
+        players = header['channels'] if header['kind'] == KIND_RAW else 1
+        self.hold_frames = hold_frames
+        self.frame = 0
+        self._held = 0
+        # 游戏对象的提示输出对导出没有意义，构造与推进时都静默
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.game = PixelCarChaseDogGame(replay_path=replay_path, render_backend=render_backend,
+                                             use_blit=True, players=players)
+        self.game.realtime_physics = False
+        self.game.fig.set_dpi(dpi)
+        self.canvas = self.game.fig.canvas
+        self.dirty = []
+
+    @property
+    def size(self):
+        """输出帧的 (宽, 高)"""
+        return self.canvas.get_width_height()
+
+    @property
+    def finished(self):
+        """录音放完、最后一局的结束画面也停留够了"""
+        game = self.game
+        return game.game_over and game.replay.exhausted and self._held >= self.hold_frames
+
+    def advance(self):
+        """推进一帧，返回这一帧的脏对象；结束画面停留够 hold_frames 帧且录音还有剩余时热重开"""
+        game = self.game
+        with contextlib.redirect_stdout(io.StringIO()):
+            if game.game_over:
+                if self._held >= self.hold_frames and not game.replay.exhausted:
+                    game.reset(rewind=False)
+                    self._held = 0
+                else:
+                    self._held += 1
+            self.dirty = game.game_loop(self.frame) or []
+        self.frame += 1
+        return self.dirty
+
+    def draw(self, first=False):
+        """把当前帧画到 Agg 缓冲区：段首整幅绘制（顺带抓取 blit 背景），之后只 blit 脏对象"""
+        game = self.game
+        if first:
+            self.canvas.draw()
+        elif self.dirty:
+            game.blitter.update(self.dirty)
+
+    def pixels(self):
+        """当前帧的 RGB 视图（指向 Agg 缓冲区，下一次绘制会覆盖）"""
+        return np.asarray(self.canvas.buffer_rgba())[..., :3]
+
+    def close(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.game.cleanup()
+
+
+def plan_session(replay_path, hold_frames, dpi):
+    """不绘图地预演一遍，返回 (总帧数, (宽, 高))"""
+    driver = SessionDriver(replay_path, 'patches', dpi, hold_frames)
+    size = driver.size
+    while not driver.finished:
+        driver.advance()
+    frames = driver.frame
+    driver.close()
+    return frames, size
+
+
+def frame_path(out_dir, index):
+    return os.path.join(out_dir, f"frame_{index:06d}.png")
+
+
+def render_chunk(replay_path, start, end, out, render_backend='framebuffer', dpi=50, hold_frames=40):
+    """渲染 [start, end) 帧并写出：out 为 PNG 目录或已创建好的 .npy 文件；返回渲染的帧数"""
+    driver = SessionDriver(replay_path, render_backend, dpi, hold_frames)
+    stack = np.load(out, mmap_mode='r+') if out.endswith('.npy') else None
+    while driver.frame < start:
+        driver.advance()
+    count = 0
+    for index in range(start, end):
+        driver.advance()
+        driver.draw(first=index == start)
+        rgb = driver.pixels()
+        if stack is not None:
+            stack[index] = rgb
+        else:
+            # 快速压缩档：PNG 编码是写文件的主要开销，体积稍大但快得多
+            Image.fromarray(rgb).save(frame_path(out, index), compress_level=1)
+        count += 1
+    if stack is not None:
+        stack.flush()
+        del stack
+    driver.close()
+    return count
+
+
+def export_session(replay_path, out, render_backend='framebuffer', dpi=50, hold_frames=40,
+                   chunk_frames=500, workers=None):
+    """导出整段会话，返回总帧数"""
+    frames, (width, height) = plan_session(replay_path, hold_frames, dpi)
+    if out.endswith('.npy'):
+        # 只建好带头部的 .npy 文件（临时 memmap 随即释放），各进程再以 r+ 打开各自写入
+        np.lib.format.open_memmap(out, mode='w+', dtype=np.uint8, shape=(frames, height, width, 3))
+    else:
+        os.makedirs(out, exist_ok=True)
+    chunks = [(start, min(start + chunk_frames, frames)) for start in range(0, frames, chunk_frames)]
+    print(f"{frames} frames ({width}x{height}) in {len(chunks)} chunks")
+    if len(chunks) == 1 or workers == 1:
+        for start, end in chunks:
+            render_chunk(replay_path, start, end, out, render_backend, dpi, hold_frames)
+        return frames
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_chunk, replay_path, start, end, out, render_backend, dpi, hold_frames)
+                   for start, end in chunks]
+        for future in futures:
+            future.result()
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render a recorded Pixel Dog Run session to frames without a display')
+    parser.add_argument('replay', help='.dogrec session recording')
+    parser.add_argument('--out', required=True, help='Output directory for PNG frames, or a .npy file for a frame stack')
+    parser.add_argument('--renderer', choices=RENDER_BACKENDS, default='framebuffer')
+    parser.add_argument('--dpi', type=int, default=50, help='Frame resolution: 16x9 inches at this dpi (default 800x450)')
+    parser.add_argument('--hold', type=int, default=40, help='Frames to hold each game-over screen before restarting')
+    parser.add_argument('--chunk', type=int, default=500, help='Frames per worker task')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    frames = export_session(args.replay, args.out, args.renderer, args.dpi, args.hold, args.chunk, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"exported {frames} frames to {args.out} in {elapsed:.1f} s "
+          f"({frames * TICK_SECONDS / elapsed:.1f}x real time)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""麦克风会话录制与回放
+
+文件格式（.dogrec，小端）：
+- 64 字节头：magic 'DOGREC1\\0'、kind（0=原始 int16 CHUNK，1=每帧归一化音量 float64）、
+  rate、chunk、channels、count（记录条数，关闭时回写）、其余保留为 0；
+  程序崩溃或被杀掉时 count 没来得及回写（仍为 0），读取时按文件大小推算完整的记录条数；
+- 之后紧跟连续数据：kind=0 时为 count × chunk × channels 个 int16，kind=1 时为 count 个 float64（与游戏内的音量逐位相同，回放可完全复现）。
+数据区按固定偏移连续存放，回放时直接 np.memmap，长录音不需要整体读入内存。
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'DOGREC1\x00'
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sIIIIQ')  # magic, kind, rate, chunk, channels, count
+
+KIND_RAW = 0
+KIND_VOLUME = 1
+KIND_NAMES = {'raw': KIND_RAW, 'volume': KIND_VOLUME}
+
+
+def _pack_header(kind, rate, chunk, channels, count):
+    header = _HEADER.pack(MAGIC, kind, rate, chunk, channels, count)
+    return header + b'\x00' * (HEADER_SIZE - len(header))
+
+
+def read_header(path):
+    """读取文件头，返回 dict（kind/rate/chunk/channels/count）"""
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f"不是有效的录音文件（文件太短）: {path}")
+    magic, kind, rate, chunk, channels, count = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"不是有效的录音文件（magic 不匹配）: {path}")
+    if kind not in (KIND_RAW, KIND_VOLUME):
+        raise ValueError(f"未知的录音类型 kind={kind}: {path}")
+    if count == 0:
+        # 没有正常 close 的录音：按数据区大小推算，末尾写了一半的记录丢弃
+        record_size = chunk * channels * 2 if kind == KIND_RAW else 8
+        count = max(0, os.path.getsize(path) - HEADER_SIZE) // record_size if record_size else 0
+    return {'kind': kind, 'rate': rate, 'chunk': chunk, 'channels': channels, 'count': count}
+
+
+class SessionRecorder:
+    """逐帧追加写入录音文件；close 时回写条数"""
+
+    def __init__(self, path, kind='raw', rate=44100, chunk=1024, channels=1):
+        self.path = path
+        self.kind = KIND_NAMES[kind] if isinstance(kind, str) else kind
+        self.rate = rate
+        self.chunk = chunk
+        self.channels = channels
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(_pack_header(self.kind, rate, chunk, channels, 0))
+
+    def write_chunk(self, samples):
+        """记录一帧的原始 int16 采样（长度需为 chunk × channels）"""
+        data = np.ascontiguousarray(samples, dtype='<i2').reshape(-1)
+        if data.size != self.chunk * self.channels:
+            raise ValueError(f"CHUNK 大小不符: {data.size} != {self.chunk * self.channels}")
+        self._file.write(data.tobytes())
+        self.count += 1
+
+    def write_volume(self, volume):
+        """记录一帧的归一化音量"""
+        self._file.write(struct.pack('<d', float(volume)))
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(_pack_header(self.kind, self.rate, self.chunk, self.channels, self.count))
+        self._file.close()
+        self._file = None
+
+
+class SessionReplay:
+    """以内存映射方式回放录音文件"""
+
+    def __init__(self, path):
+        self.path = path
+        info = read_header(path)
+        self.kind = info['kind']
+        self.rate = info['rate']
+        self.chunk = info['chunk']
+        self.channels = info['channels']
+        self.count = info['count']
+        if self.kind == KIND_RAW:
+            shape = (self.count, self.chunk * self.channels)
+            dtype = '<i2'
+        else:
+            shape = (self.count,)
+            dtype = '<f8'
+        # count 为 0 时 memmap 无法映射空区域
+        self.data = (np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=shape)
+                     if self.count else np.zeros(shape, dtype=dtype))
+        self.position = 0
+
+    @property
+    def exhausted(self):
+        return self.position >= self.count
+
+    def next(self):
+        """下一帧数据（raw: int16 视图；volume: float）；回放结束返回 None"""
+        if self.exhausted:
+            return None
+        item = self.data[self.position]
+        self.position += 1
+        return item if self.kind == KIND_RAW else float(item)
+
+    def volumes(self):
+        """整段归一化音量（kind=volume 时为内存映射视图）"""
+        if self.kind != KIND_VOLUME:
+            raise ValueError("原始音频录音需要经过 analyze_audio 才能得到音量")
+        return self.data
+
+    def rewind(self):
+        self.position = 0
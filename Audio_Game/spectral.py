@@ -0,0 +1,103 @@
+"""频谱控制：用音高或频谱质心代替响度驱动小狗
+
+每帧对一个 CHUNK 做一次实数 FFT：
+- 汉宁窗、频率表、频带下标在构造时算好，加窗、取幅度写进预分配的缓冲区（rfft 的 out 参数要 NumPy 2，
+  这里拷进复用的频谱缓冲区，NumPy 1.x 也能用）；
+- pitch：在频带内用向量化比较找出所有局部峰，取幅度不低于最强峰 peak_ratio 倍的最低频峰
+  （避免把泛音当成基频），再做抛物线插值细化到亚 bin 精度；
+- centroid：频带内幅度加权的平均频率。
+得到的频率按对数刻度映射到 0..1（f_low → 0，f_high → 1），之后沿用响度的 volume_level → dog_speed 映射。
+"""
+import numpy as np
+
+SPECTRAL_FEATURES = ('pitch', 'centroid')
+
+
+class SpectralAnalyzer:
+    """逐帧频谱特征（每帧只有 rfft 的结果是新分配的）
+
+    - analyze(samples) 输入长度为 chunk 的单声道 float32 采样（-1..1），返回 0..1 的控制值；
+      频带内没有可用的峰（静音、纯噪声底）时返回 0
+    - frequency 为最近一帧估计出的频率（Hz），无效时为 0
+    """
+
+    def __init__(self, feature='pitch', rate=44100, chunk=1024, f_low=120.0, f_high=1000.0, peak_ratio=0.5):
+        if feature not in SPECTRAL_FEATURES:
+            raise ValueError(f"未知的频谱特征: {feature}（可选: {', '.join(SPECTRAL_FEATURES)}）")
+        self.feature = feature
+        self.rate = int(rate)
+        self.chunk = int(chunk)
+        self.f_low = float(f_low)
+        self.f_high = float(f_high)
+        self.peak_ratio = float(peak_ratio)
+
+        self.window = np.hanning(self.chunk).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.chunk, 1.0 / self.rate)
+        # 频带下标（两侧各多留一个 bin，供峰值比较与抛物线插值使用）
+        self.lo = max(1, int(np.searchsorted(freqs, self.f_low)))
+        self.hi = min(len(freqs) - 1, int(np.searchsorted(freqs, self.f_high, side='right')))
+        self.band_freqs = freqs[self.lo:self.hi].astype(np.float64)
+        self.bin_hz = self.rate / self.chunk
+        self.log_low = np.log2(self.f_low)
+        self.log_span = np.log2(self.f_high) - self.log_low
+
+        self._windowed = np.empty(self.chunk, dtype=np.float32)
+        self._spectrum = np.empty(len(freqs), dtype=np.complex64)
+        self._magnitude = np.empty(len(freqs), dtype=np.float32)
+        n = self.hi - self.lo
+        self._is_peak = np.empty(n, dtype=bool)
+        self._scratch = np.empty(n, dtype=bool)
+        self.frequency = 0.0
+
+    def magnitude(self, samples):
+        """加窗 + rfft，返回（复用的）幅度谱"""
+        np.multiply(samples[:self.chunk], self.window, out=self._windowed)
+        self._spectrum[:] = np.fft.rfft(self._windowed)
+        np.abs(self._spectrum, out=self._magnitude)
+        return self._magnitude
+
+    def pitch(self, mag):
+        """频带内最低的显著局部峰（抛物线插值），找不到时返回 0"""
+        lo, hi = self.lo, self.hi
+        band = mag[lo:hi]
+        is_peak = self._is_peak
+        np.greater(band, mag[lo - 1:hi - 1], out=is_peak)
+        np.greater_equal(band, mag[lo + 1:hi + 1], out=self._scratch)
+        is_peak &= self._scratch
+        peaks = np.flatnonzero(is_peak)
+        if peaks.size == 0:
+            return 0.0
+        heights = band[peaks]
+        top = heights.max()
+        if top <= 0.0:
+            return 0.0
+        k = int(peaks[np.argmax(heights >= self.peak_ratio * top)]) + lo
+        # 抛物线插值：用相邻两个 bin 的幅度估计真实峰位置
+        a, b, c = float(mag[k - 1]), float(mag[k]), float(mag[k + 1])
+        denom = a - 2.0 * b + c
+        offset = 0.5 * (a - c) / denom if denom != 0.0 else 0.0
+        return (k + offset) * self.bin_hz
+
+    def centroid(self, mag):
+        """频带内幅度加权的平均频率"""
+        band = mag[self.lo:self.hi]
+        total = float(band.sum())
+        if total <= 0.0:
+            return 0.0
+        return float(np.dot(self.band_freqs, band)) / total
+
+    def to_level(self, frequency):
+        """频率 → 0..1（对数刻度）"""
+        if frequency <= 0.0:
+            return 0.0
+        level = (np.log2(frequency) - self.log_low) / self.log_span
+        return float(min(max(level, 0.0), 1.0))
+
+    def analyze(self, samples):
+        """输入一帧采样，返回 0..1 的控制值"""
+        mag = self.magnitude(samples)
+        if self.feature == 'pitch':
+            self.frequency = self.pitch(mag)
+        else:
+            self.frequency = self.centroid(mag)
+        return self.to_level(self.frequency)
@@ -0,0 +1,101 @@
+"""异步遥测：替代游戏循环里的逐帧 print
+
+- emit 只把一条记录追加进有界环形缓冲区（deque，满了丢最旧的并计数），低于当前级别时立即返回；
+- 后台写线程按固定间隔批量取出记录，写成 JSON Lines（文件或 stdout），每次最多写 max_batch 条；
+- 默认级别 off：正常游戏时不产生任何输出，也不启动线程。
+"""
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'off': 100}
+
+
+class Telemetry:
+    """带级别的遥测记录器，写出由后台线程完成，游戏循环中不做任何 I/O"""
+
+    def __init__(self, level='off', path=None, capacity=1024, flush_interval=0.25, max_batch=64):
+        if level not in LEVELS:
+            raise ValueError(f"未知的遥测级别: {level}（可选: {', '.join(LEVELS)}）")
+        self.level_name = level
+        self.level = LEVELS[level]
+        self.path = path
+        self.buffer = deque(maxlen=int(capacity))
+        self.flush_interval = float(flush_interval)
+        self.max_batch = int(max_batch)
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self._stream = None
+        self._thread = None
+        self._stop = threading.Event()
+        if self.enabled:
+            self.start()
+
+    @property
+    def enabled(self):
+        return self.level < LEVELS['off']
+
+    def start(self):
+        """打开输出并启动后台写线程"""
+        self._stream = open(self.path, 'a', encoding='utf-8') if self.path else sys.stdout
+        self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self._thread.start()
+
+    def emit(self, level, event, **fields):
+        """记录一条事件（低于当前级别时直接返回）"""
+        if LEVELS[level] < self.level:
+            return
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        fields['t'] = time.time()
+        fields['level'] = level
+        fields['event'] = event
+        self.buffer.append(fields)
+        self.emitted += 1
+
+    def debug(self, event, **fields):
+        if self.level <= 10:
+            self.emit('debug', event, **fields)
+
+    def info(self, event, **fields):
+        if self.level <= 20:
+            self.emit('info', event, **fields)
+
+    def warning(self, event, **fields):
+        if self.level <= 30:
+            self.emit('warning', event, **fields)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush(self.max_batch)
+        self.flush()
+
+    def flush(self, limit=None):
+        """取出至多 limit 条记录批量写出；超出本批上限的留到下一次"""
+        lines = []
+        buffer = self.buffer
+        while buffer and (limit is None or len(lines) < limit):
+            try:
+                record = buffer.popleft()
+            except IndexError:
+                break
+            lines.append(json.dumps(record, ensure_ascii=False))
+        if not lines or self._stream is None:
+            return 0
+        self._stream.write('\n'.join(lines) + '\n')
+        self._stream.flush()
+        self.written += len(lines)
+        return len(lines)
+
+    def close(self):
+        """停止写线程并写出剩余记录"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._stream.close()
+        self._stream = None
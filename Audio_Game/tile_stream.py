@@ -0,0 +1,123 @@
+"""长关卡的分块背景：图块列随摄像机按需生成、在身后淘汰
+
+关卡沿 x 方向切成等宽的图块（tile_cols 个像素格子一块）。摄像机移动时：
+- TileStreamer.update 保证视口覆盖的图块及前方 lookahead 块已驻留，视口之外（主要是身后）的图块立即淘汰，
+  驻留块数只取决于视口宽度，与关卡长度无关；
+- 图块由 render_tile(index) 生成（程序化绘制或从文件读取均可），格式为
+  (虚线相位, 行, 列, 4) 的不透明 uint8 RGBA，行 0 在上，可直接拷给帧缓冲图像；
+- ScrollingBackground 把当前可见的列拷进一块固定大小的视口缓冲区，用 FramebufferImage 显示，
+  摄像机每移动一个格子才更新一次。
+启动时只生成第一屏附近的几块，关卡 12 单位还是 12000 单位，内存与启动时间都一样。
+"""
+import numpy as np
+
+from pixel_framebuffer import FramebufferImage
+
+
+class TileStreamer:
+    """按列区间驻留 / 淘汰图块
+
+    - render_tile(index) 返回第 index 块（全局列 [index * tile_cols, (index + 1) * tile_cols)）
+    - generated / evicted 为累计生成与淘汰的块数
+    """
+
+    def __init__(self, render_tile, tile_cols, level_cols, lookahead=1):
+        self.render_tile = render_tile
+        self.tile_cols = int(tile_cols)
+        self.level_cols = int(level_cols)
+        self.lookahead = int(lookahead)
+        # 最后一块覆盖到关卡终点之后一列（视口为亚格子滚动多留的一列）
+        self.last_index = self.level_cols // self.tile_cols
+        self.tiles = {}
+        self.generated = 0
+        self.evicted = 0
+
+    @property
+    def resident(self):
+        return len(self.tiles)
+
+    def update(self, col0, col1):
+        """驻留覆盖全局列 [col0, col1) 的图块与前方 lookahead 块，淘汰其余图块"""
+        first = max(0, col0 // self.tile_cols)
+        last = min(self.last_index, (col1 - 1) // self.tile_cols + self.lookahead)
+        for index in [i for i in self.tiles if not first <= i <= last]:
+            del self.tiles[index]
+            self.evicted += 1
+        for index in range(first, last + 1):
+            if index not in self.tiles:
+                self.tiles[index] = self.render_tile(index)
+                self.generated += 1
+
+    def copy_columns(self, col0, phase, out):
+        """把全局列 [col0, col0 + out 宽) 在虚线相位 phase 下的像素拷进 out（图块须已驻留）"""
+        tc = self.tile_cols
+        col, end = col0, col0 + out.shape[1]
+        while col < end:
+            index, start = divmod(col, tc)
+            n = min(tc - start, end - col)
+            out[:, col - col0:col - col0 + n] = self.tiles[index][phase, :, start:start + n]
+            col += n
+
+
+class ScrollingBackground:
+    """长关卡的背景视口（与 PixelBackgroundCompositor 的显示接口相同：attach / set_dash_phase）
+
+    视口宽为一屏的格子数再加一列，摄像机在格子之间滚动时仍能铺满画面。
+    """
+
+    DASH_PHASES = 4
+    dash_image = None
+
+    def __init__(self, streamer, view_width, height, pixel_size):
+        self.streamer = streamer
+        self.pixel_size = pixel_size
+        self.height = height
+        self.rows = int(height / pixel_size)
+        self.view_cols = int(round(view_width / pixel_size)) + 1
+        self.view = np.empty((self.rows, self.view_cols, 4), dtype=np.uint8)
+        self.left_col = None
+        self.dash_phase = 0
+        self.image = None
+        self.scroll_to(0.0)
+
+    @property
+    def left(self):
+        """视口左边缘的世界坐标"""
+        return self.left_col * self.pixel_size
+
+    def attach(self, ax, zorder=0):
+        """以一个帧缓冲图像显示视口（整屏不透明，跳过通用重采样）"""
+        self.image = FramebufferImage(ax, origin='upper', interpolation='nearest', zorder=zorder)
+        self.image.set_frame(self.view)
+        self.image.set_extent(self.extent())
+        ax.add_image(self.image)
+        return self.image
+
+    def extent(self):
+        size = self.pixel_size
+        return (self.left, (self.left_col + self.view_cols) * size, 0, self.rows * size)
+
+    def scroll_to(self, camera_left):
+        """摄像机左边缘移动到 camera_left；跨过格子边界时才更新视口，返回是否更新"""
+        col = int(np.floor(camera_left / self.pixel_size))
+        if col == self.left_col:
+            return False
+        self.left_col = col
+        self.streamer.update(col, col + self.view_cols)
+        self.refresh()
+        return True
+
+    def set_dash_phase(self, phase):
+        """切换虚线相位；相位不变时不做任何事"""
+        phase %= self.DASH_PHASES
+        if phase == self.dash_phase:
+            return False
+        self.dash_phase = phase
+        self.refresh()
+        return True
+
+    def refresh(self):
+        self.streamer.copy_columns(self.left_col, self.dash_phase, self.view)
+        if self.image is not None:
+            self.image.set_frame(self.view)
+            self.image.set_extent(self.extent())
@@ -0,0 +1,154 @@
+"""赛道道具：水坑、骨头与路障
+
+- EntityStore：固定容量的实体池，位置、种类、存活状态都放在 NumPy 数组里，取用与归还只改空槽栈，不分配新对象；
+  按 x 排好序的槽位下标只在生成实体后重建一次，查询用 np.searchsorted 二分出区间内的实体，
+  每个 tick 的检测开销只与区间里的实体数有关，与赛道上的实体总数无关；
+- Course：一条赛道的道具布局与规则。模拟每步先取速度倍率，移动后只检测本步扫过的区间 (x0, x1]，
+  每个道具恰好被碰到一次：狗踩到水坑减速、吃到骨头加速，车撞到路障减速；骨头和路障被碰到后归还实体池。
+布局只由数量、种子和赛道长度决定，录音回放时使用相同参数即可重现。
+"""
+import numpy as np
+
+ENTITY_KINDS = ('puddle', 'bone', 'cone')
+# 种类 → (作用对象, 速度倍率, 持续 tick, 碰到后是否消失)
+ENTITY_RULES = {
+    'puddle': ('dog', 0.5, 40, False),
+    'bone': ('dog', 1.5, 60, True),
+    'cone': ('car', 0.5, 30, True),
+}
+# 随机布局中各种类的比例
+ENTITY_WEIGHTS = (0.4, 0.3, 0.3)
+
+
+class EntityStore:
+    """固定容量的实体池（结构数组）：x、kind（ENTITY_KINDS 下标）、alive"""
+
+    def __init__(self, capacity):
+        self.x = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity - 1, -1, -1))  # 空槽栈，小下标先取
+        self._order = np.zeros(0, dtype=np.intp)  # 按 x 排序的槽位
+        self._sorted_x = np.zeros(0)
+        self._dirty = False
+
+    @property
+    def capacity(self):
+        return len(self.x)
+
+    @property
+    def count(self):
+        return self.capacity - len(self._free)
+
+    def spawn(self, kind, x):
+        """取一个空槽放置实体，返回槽位；池用尽时返回 None（不扩容）"""
+        if not self._free:
+            return None
+        slot = self._free.pop()
+        self.x[slot] = x
+        self.kind[slot] = kind
+        self.alive[slot] = True
+        self._dirty = True
+        return slot
+
+    def release(self, slot):
+        """归还槽位；排序下标不必重建（查询时按 alive 过滤）"""
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self._free.append(slot)
+
+    def clear(self):
+        self.alive[:] = False
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self._dirty = True
+
+    def _reindex(self):
+        slots = np.flatnonzero(self.alive)
+        self._order = slots[np.argsort(self.x[slots], kind='stable')]
+        self._sorted_x = self.x[self._order]
+        self._dirty = False
+
+    def query(self, x0, x1):
+        """x0 < x <= x1 的存活实体槽位（按 x 升序）"""
+        if self._dirty:
+            self._reindex()
+        lo = np.searchsorted(self._sorted_x, x0, side='right')
+        hi = np.searchsorted(self._sorted_x, x1, side='right')
+        slots = self._order[lo:hi]
+        return slots[self.alive[slots]]
+
+
+class Course:
+    """道具布局 + 碰撞规则 + 每个对象（'dog' / 'car'）的速度效果计时"""
+
+    def __init__(self, xs, kinds, reach=0.2):
+        self.layout_x = np.asarray(xs, dtype=np.float64)
+        self.layout_kind = np.asarray(kinds, dtype=np.int8)
+        self.store = EntityStore(len(self.layout_x))
+        self.reach = reach  # 车头 / 狗头到中心的距离：前端碰到道具即生效
+        self.reset()
+
+    def reset(self):
+        """把全部道具放回原位，清除速度效果"""
+        store = self.store
+        store.clear()
+        for kind, x in zip(self.layout_kind, self.layout_x):
+            store.spawn(kind, x)
+        self.timers = {'dog': 0, 'car': 0}
+        self.factors = {'dog': 1.0, 'car': 1.0}
+        self.hits = dict.fromkeys(ENTITY_KINDS, 0)
+
+    def speed_factor(self, target):
+        """当前 tick 的速度倍率（效果结束后为 1）"""
+        return self.factors[target] if self.timers[target] > 0 else 1.0
+
+    def tick(self):
+        """一个 tick 过去：效果计时减一"""
+        for target, left in self.timers.items():
+            if left > 0:
+                self.timers[target] = left - 1
+
+    def status(self, target):
+        """信息栏用的效果标记：加速 / 减速 / 无"""
+        if self.timers[target] <= 0:
+            return ''
+        return 'BOOST' if self.factors[target] > 1.0 else 'SLOW'
+
+    def sweep(self, target, x0, x1):
+        """target 的中心本步从 x0 移动到 x1：检测前端扫过的道具并应用效果，返回碰到的个数"""
+        store = self.store
+        slots = store.query(x0 + self.reach, x1 + self.reach)
+        hit = 0
+        for slot in slots:
+            kind = ENTITY_KINDS[store.kind[slot]]
+            affects, factor, duration, consumed = ENTITY_RULES[kind]
+            if affects != target:
+                continue
+            self.factors[target] = factor
+            self.timers[target] = duration
+            self.hits[kind] += 1
+            hit += 1
+            if consumed:
+                store.release(slot)
+        return hit
+
+    def visible(self, x0, x1):
+        """区间内仍在赛道上的道具：(种类下标数组, x 数组)"""
+        slots = self.store.query(x0, x1)
+        return self.store.kind[slots], self.store.x[slots]
+
+    def peak_count(self, kind, width):
+        """布局中任意长 width 的区间里最多有几个 kind 种类的道具（按它给精灵池定容量）"""
+        xs = self.layout_x[self.layout_kind == kind]
+        if len(xs) == 0:
+            return 0
+        ends = np.searchsorted(xs, xs + width, side='right')
+        return int((ends - np.arange(len(xs))).max())
+
+
+def make_course(count, start_x, end_x, seed=0):
+    """在 [start_x, end_x) 内随机撒 count 个道具（按 ENTITY_WEIGHTS 取种类）"""
+    rng = np.random.default_rng(seed)
+    xs = np.sort(rng.uniform(start_x, end_x, count))
+    kinds = rng.choice(len(ENTITY_KINDS), size=count, p=ENTITY_WEIGHTS)
+    return Course(xs, kinds)